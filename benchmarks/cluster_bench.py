@@ -0,0 +1,55 @@
+'''
+Benchmarks sharding the game server with stratego.cluster: Runs
+the same load test against clusters of increasing size on
+loopback, and reports how throughput scales with the number of
+worker processes. The clients run on the same machine, so scaling
+flattens once they, rather than the server, fill the cores.
+
+Usage: python -m benchmarks.cluster_bench --workers 1 2 4
+'''
+
+import argparse
+import multiprocessing
+from typing import List, Optional, Sequence
+
+from stratego.loadtest import LoadReport, run_load_test
+from stratego.metrics import percentile
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    '''
+    Command line entry point.
+    '''
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='cluster sizes to measure')
+    parser.add_argument('--clients', type=int, default=32, help='simultaneous games')
+    parser.add_argument('--max-turns', type=int, default=200,
+                        help='moves per side before a game is halted')
+    parser.add_argument('--timeout', type=float, default=120.0,
+                        help='seconds before stragglers count as errors')
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    print(f'{args.clients} clients, {multiprocessing.cpu_count()} cores')
+    print()
+    print(f'{"workers":>7} {"moves/s":>9} {"speedup":>8} {"p50 rtt":>10} {"p99 rtt":>10} '
+          f'{"errors":>6}')
+
+    reports: List[LoadReport] = []
+
+    for workers in args.workers:
+        report: LoadReport = run_load_test(args.clients, args.max_turns, args.timeout,
+                                           workers=workers)
+        reports.append(report)
+
+        speedup: float = report.throughput / reports[0].throughput \
+            if reports[0].throughput else 0.0
+
+        print(f'{workers:>7} {report.throughput:>9.1f} {speedup:>7.2f}x '
+              f'{percentile(report.round_trips, 50) * 1000:>7.3f} ms '
+              f'{percentile(report.round_trips, 99) * 1000:>7.3f} ms {report.errors:>6}')
+
+
+if __name__ == '__main__':
+    main()
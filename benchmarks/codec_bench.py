@@ -0,0 +1,142 @@
+'''
+Benchmarks the payload codecs in stratego.codec: Bytes saved
+against CPU spent, on boards from random games. Setups (each
+player's first board, and snapshots) are compressed alone, and
+moves against the previous board from the same player, as they
+are over the network.
+
+Usage: python -m benchmarks.codec_bench --games 20
+'''
+
+import argparse
+import random
+import time
+from typing import Callable, List, Literal, Optional, Sequence, Tuple
+
+from stratego.board import Board
+from stratego.bot import random_move, random_setup
+from stratego.codec import CODEC_NAMES, Codec, make_codec
+from stratego.network import StrategoNetworker
+
+# The header every record carries: state, seq and size fields
+RECORD_HEADER_SIZE: int = len(StrategoNetworker.make_record('GOOD', 1, b''))
+
+# (previous board from the same player, if any, and the board)
+Sample = Tuple[Optional[bytes], bytes]
+
+
+def sample_games(games: int, max_turns: int, seed: int) -> Tuple[List[Sample], List[Sample]]:
+    '''
+    Plays random games, collecting every board each player would
+    send.
+
+    :param games: The number of games.
+    :param max_turns: The most moves per game.
+    :param seed: The random seed.
+    :returns: The (setup, move) samples.
+    '''
+
+    rng: random.Random = random.Random(seed)
+    setups: List[Sample] = []
+    moves: List[Sample] = []
+
+    for _ in range(games):
+        board: Board = Board.detached()
+        random_setup(board, 'RED', rng)
+        random_setup(board, 'BLUE', rng)
+
+        sent: List[bytes] = [board.encode()]
+        setups.append((None, sent[0]))
+        color: Literal['RED', 'BLUE'] = 'RED'
+
+        for _ in range(max_turns):
+            move = random_move(board, color, rng)
+            if move is None:
+                break
+
+            state: str = board.move(color, *move)
+            sent.append(board.encode())
+
+            # Each player's previous board is from two moves ago
+            if len(sent) > 2:
+                moves.append((sent[-3], sent[-1]))
+            else:
+                setups.append((None, sent[-1]))
+
+            if state != 'GOOD':
+                break
+
+            color = 'BLUE' if color == 'RED' else 'RED'
+
+    return (setups, moves)
+
+
+def time_each(call: Callable[[], object], repeat: int) -> float:
+    '''
+    :returns: The mean seconds per call.
+    '''
+
+    started: float = time.perf_counter()
+
+    for _ in range(repeat):
+        call()
+
+    return (time.perf_counter() - started) / repeat
+
+
+def measure(codec: Codec, samples: Sequence[Sample], repeat: int) -> Tuple[float, float, float]:
+    '''
+    :returns: The mean (payload bytes, compress seconds,
+        decompress seconds) over the samples.
+    '''
+
+    size: int = 0
+    compress: float = 0.0
+    decompress: float = 0.0
+
+    for previous, payload in samples:
+        data: bytes = codec.compress(payload, previous)
+        assert codec.decompress(data, previous) == payload
+
+        size += len(data)
+        compress += time_each(lambda: codec.compress(payload, previous), repeat)
+        decompress += time_each(lambda: codec.decompress(data, previous), repeat)
+
+    count: int = max(1, len(samples))
+    return (size / count, compress / count, decompress / count)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    '''
+    Command line entry point.
+    '''
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=20, help='random games to sample')
+    parser.add_argument('--max-turns', type=int, default=200, help='moves per game')
+    parser.add_argument('--repeat', type=int, default=20, help='timing repeats per board')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    setups, moves = sample_games(args.games, args.max_turns, args.seed)
+
+    board: Board = Board.decode(setups[0][1])
+    encode: float = time_each(board.encode, 1000)
+    print(f'{len(setups)} setups, {len(moves)} moves; '
+          f'encoding a board takes {encode * 1e6:.1f} us')
+    print()
+    print(f'{"codec":<6} {"boards":<7} {"payload":>8} {"record":>8} {"saved":>6} '
+          f'{"compress":>11} {"decompress":>11}')
+
+    for name in CODEC_NAMES:
+        for kind, samples in (('setup', setups), ('move', moves)):
+            size, compress, decompress = measure(make_codec(name), samples, args.repeat)
+            raw: float = sum(len(payload) for _, payload in samples) / max(1, len(samples))
+            saved: float = 1 - (size + RECORD_HEADER_SIZE) / (raw + RECORD_HEADER_SIZE)
+
+            print(f'{name:<6} {kind:<7} {size:>7.1f}B {size + RECORD_HEADER_SIZE:>7.1f}B '
+                  f'{saved:>6.0%} {compress * 1e6:>8.1f} us {decompress * 1e6:>8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+'''
+Benchmarks sprite scaling in stratego.sprites against scaling
+pixel by pixel, as StrategoGUI used to: The time to load and scale
+every sprite the GUI ships, once each, as on first render. Needs a
+display, such as Xvfb.
+
+Usage: python -m benchmarks.sprite_bench --size 32 --repeat 3
+'''
+
+import argparse
+import glob
+import time
+import tkinter as tk
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from stratego.gui import _resize_pixels
+from stratego.sprites import load_sprite, scale_photo, scale_png
+
+
+def time_all(scale: Callable[[str], object], paths: Sequence[str], repeat: int) -> float:
+    '''
+    :returns: The least seconds taken to scale every path.
+    '''
+
+    best: float = float('inf')
+
+    for _ in range(repeat):
+        started: float = time.perf_counter()
+
+        for path in paths:
+            scale(path)
+
+        best = min(best, time.perf_counter() - started)
+
+    return best
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    '''
+    Command line entry point.
+    '''
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=32, help='sprite width and height')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repeats')
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    size: int = args.size
+    paths: List[str] = sorted(glob.glob('stratego/images/*.png'))
+
+    # Images need a Tk interpreter
+    root: tk.Tk = tk.Tk()
+    root.withdraw()
+
+    def zoom(path: str) -> object:
+        return scale_photo(tk.PhotoImage(file=path), size, size)
+
+    methods: List[Tuple[str, Callable[[str], object]]] = [
+        ('per pixel', lambda path: _resize_pixels(tk.PhotoImage(file=path), size, size)),
+        ('tk zoom', zoom),
+        ('pillow nearest', lambda path: load_sprite(path, size, size, 'nearest')),
+        ('pillow bilinear', lambda path: load_sprite(path, size, size, 'bilinear')),
+        ('pillow lanczos', lambda path: load_sprite(path, size, size, 'lanczos')),
+        ('pillow alone', lambda path: scale_png(path, size, size, 'lanczos')),
+    ]
+
+    print(f'{len(paths)} sprites, scaled to {size}x{size}')
+    print()
+    print(f'{"method":<16} {"total":>10} {"per sprite":>12} {"speedup":>8}')
+
+    baseline: Optional[float] = None
+
+    for name, scale in methods:
+        if name == 'tk zoom' and zoom(paths[0]) is None:
+            continue
+
+        seconds: float = time_all(scale, paths, args.repeat)
+        baseline = baseline or seconds
+
+        print(f'{name:<16} {seconds * 1e3:>7.1f} ms {seconds / len(paths) * 1e6:>9.0f} us '
+              f'{baseline / seconds:>7.1f}x')
+
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
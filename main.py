@@ -4,8 +4,22 @@
 Driver for OOP Network-based Stratego in Python.
 '''
 
+import os
+from typing import Optional
+
 from stratego.gui import StrategoGUI
+from stratego.metrics import FrameTracer, MetricsServer
 
 # Call the main function, launching the game.
 if __name__ == '__main__':
-    StrategoGUI()
+
+    # Serve networking metrics, if asked to
+    if os.environ.get('STRATEGO_METRICS_PORT'):
+        MetricsServer(port=int(os.environ['STRATEGO_METRICS_PORT'])).start()
+
+    # Time the GUI, writing a trace on quitting, if asked to
+    tracer: Optional[FrameTracer] = None
+    if os.environ.get('STRATEGO_TRACE'):
+        tracer = FrameTracer(os.environ['STRATEGO_TRACE'])
+
+    StrategoGUI(tracer=tracer)
@@ -0,0 +1,356 @@
+'''
+Move and battle animations for a CanvasBoard. Animations are
+stepped a frame at a time from the Tk event loop, with
+root.after, so they never block input or networking: Each frame
+positions every animation by the time elapsed, so a late frame
+skips ahead rather than falling behind, and a frame over its
+budget leaves the remaining animations where they are until the
+next. Once an animation's time is up, it ends at once, whatever
+the budget, leaving the board as it would be without it.
+'''
+
+import abc
+import time
+import tkinter as tk
+from typing import Any, Callable, List, Optional, Tuple
+
+import stratego.board as b
+from stratego.boardview import CanvasBoard, Square
+import stratego.pieces as p
+
+# Schedules a call after some milliseconds, as root.after does
+Scheduler = Callable[[int, Callable[[], None]], Any]
+
+
+class Animation(abc.ABC):
+    '''
+    Something drawn over the board for a while.
+    '''
+
+    # Seconds taken, by default
+    _DURATION: float = 0.25
+
+    def __init__(self, view: CanvasBoard, duration: Optional[float] = None,
+                 delay: float = 0.0) -> None:
+        '''
+        :param view: The board to draw on.
+        :param duration: Seconds taken. Defaults to _DURATION.
+        :param delay: Seconds to wait before stepping. Whatever
+            begin draws is shown meanwhile.
+        '''
+
+        self.view: CanvasBoard = view
+        self.duration: float = duration if duration is not None else type(self)._DURATION
+        self.delay: float = delay
+
+    @abc.abstractmethod
+    def begin(self) -> None:
+        '''
+        Draws the first frame. Called once added.
+        '''
+
+    @abc.abstractmethod
+    def step(self, t: float) -> None:
+        '''
+        Draws a frame.
+
+        :param t: How far through, from 0 to 1.
+        '''
+
+    @abc.abstractmethod
+    def end(self) -> None:
+        '''
+        Undoes whatever was drawn, leaving the board as it was.
+        '''
+
+    def _pixels(self, square: Square) -> Tuple[int, int]:
+        '''
+        :returns: The canvas position of the square's top left.
+        '''
+
+        return (square[0] * self.view.size, square[1] * self.view.size)
+
+
+class Slide(Animation):
+    '''
+    Slides the piece now on a square there from another, by
+    moving the square's own image item.
+    '''
+
+    _DURATION = 0.15
+
+    def __init__(self, view: CanvasBoard, origin: Square, destination: Square,
+                 duration: Optional[float] = None, delay: float = 0.0) -> None:
+        '''
+        :param view: The board to draw on.
+        :param origin: Where the piece came from.
+        :param destination: Where it is now.
+        :param duration: Seconds taken. Defaults to _DURATION.
+        :param delay: Seconds to wait at the origin first.
+        '''
+
+        super().__init__(view, duration, delay)
+
+        self.origin: Square = origin
+        self.destination: Square = destination
+        self.__item: int = view.item(*destination)
+
+    def begin(self) -> None:
+        '''
+        Moves the piece back to the origin, above the rest.
+        '''
+
+        self.view.canvas.tag_raise(self.__item)
+        self.view.canvas.coords(self.__item, *self._pixels(self.origin))
+
+    def step(self, t: float) -> None:
+        '''
+        Moves the piece part of the way, easing out.
+        '''
+
+        eased: float = 1 - (1 - t) ** 2
+        (x0, y0), (x1, y1) = self._pixels(self.origin), self._pixels(self.destination)
+
+        self.view.canvas.coords(self.__item, x0 + (x1 - x0) * eased, y0 + (y1 - y0) * eased)
+
+    def end(self) -> None:
+        '''
+        Puts the piece back on its square.
+        '''
+
+        self.view.canvas.coords(self.__item, *self._pixels(self.destination))
+
+
+class Reveal(Animation):
+    '''
+    Shows an image over a square, such as a hidden piece in
+    battle.
+    '''
+
+    _DURATION = 0.4
+
+    def __init__(self, view: CanvasBoard, square: Square, image: tk.PhotoImage,
+                 duration: Optional[float] = None, delay: float = 0.0) -> None:
+        '''
+        :param view: The board to draw on.
+        :param square: Where to show the image.
+        :param image: What to show.
+        :param duration: Seconds shown. Defaults to _DURATION.
+        :param delay: Seconds to wait first.
+        '''
+
+        super().__init__(view, duration, delay)
+
+        self.square: Square = square
+        self.image: tk.PhotoImage = image
+        self._item: Optional[int] = None
+
+    def begin(self) -> None:
+        '''
+        Draws the image over the square.
+        '''
+
+        self._item = self.view.canvas.create_image(*self._pixels(self.square),
+                                                   image=self.image, anchor='nw')
+
+    def step(self, t: float) -> None:
+        '''
+        Keeps the image shown.
+        '''
+
+    def end(self) -> None:
+        '''
+        Deletes the image.
+        '''
+
+        if self._item is not None:
+            self.view.canvas.delete(self._item)
+            self._item = None
+
+
+class Capture(Reveal):
+    '''
+    Shows a piece which lost a battle blinking out.
+    '''
+
+    _BLINKS: int = 3
+
+    def step(self, t: float) -> None:
+        '''
+        Shows or hides the piece, by which half of a blink this
+        is.
+        '''
+
+        if self._item is not None:
+            hidden: bool = int(t * self._BLINKS * 2) % 2 == 1
+            self.view.canvas.itemconfigure(self._item, state='hidden' if hidden else 'normal')
+
+
+class Animator:
+    '''
+    Runs animations from the Tk event loop, a frame at a time.
+    '''
+
+    _FRAME_MS: int = 16
+
+    # The most seconds a frame may spend stepping animations
+    _BUDGET: float = 0.004
+
+    def __init__(self, schedule: Scheduler,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        '''
+        :param schedule: Calls a function after some
+            milliseconds. Pass root.after.
+        :param clock: The time source, in seconds.
+        '''
+
+        self.__schedule: Scheduler = schedule
+        self.__clock: Callable[[], float] = clock
+
+        # Animations by when each is to start stepping
+        self.__running: List[Tuple[float, Animation]] = []
+        self.__scheduled: bool = False
+        self.__last_frame: Optional[float] = None
+
+        # Statistics
+        self.frames: int = 0
+        self.frames_skipped: int = 0
+        self.steps_dropped: int = 0
+
+    @property
+    def running(self) -> int:
+        '''
+        :returns: The number of animations not yet ended.
+        '''
+
+        return len(self.__running)
+
+    def add(self, animation: Animation) -> None:
+        '''
+        Begins an animation.
+
+        :param animation: The animation.
+        '''
+
+        animation.begin()
+        self.__running.append((self.__clock() + animation.delay, animation))
+
+        if not self.__scheduled:
+            self.__scheduled = True
+            self.__last_frame = None
+            self.__schedule(self._FRAME_MS, self.__frame)
+
+    def finish_all(self) -> None:
+        '''
+        Ends every animation now, as before the board changes.
+        '''
+
+        running: List[Tuple[float, Animation]] = self.__running
+        self.__running = []
+
+        for _, animation in running:
+            animation.end()
+
+    def __frame(self) -> None:
+        '''
+        Steps every animation, ending those whose time is up,
+        then schedules the next frame, if need be.
+        '''
+
+        self.__scheduled = False
+        now: float = self.__clock()
+        self.__count_frame(now)
+
+        deadline: float = now + self._BUDGET
+        running: List[Tuple[float, Animation]] = []
+
+        for start, animation in self.__running:
+            t: float = (now - start) / animation.duration if animation.duration > 0 else 1.0
+
+            if t >= 1.0:
+                animation.end()
+                continue
+
+            running.append((start, animation))
+
+            if t < 0.0:
+                continue
+
+            if self.__clock() < deadline:
+                animation.step(t)
+            else:
+                self.steps_dropped += 1
+
+        self.__running = running
+
+        if self.__running:
+            self.__scheduled = True
+            self.__schedule(self._FRAME_MS, self.__frame)
+
+    def __count_frame(self, now: float) -> None:
+        '''
+        Counts the frame, and any skipped for being late.
+
+        :param now: When this frame is.
+        '''
+
+        if self.__last_frame is not None:
+            period: float = self._FRAME_MS / 1000
+            self.frames_skipped += max(0, int((now - self.__last_frame) / period) - 1)
+
+        self.__last_frame = now
+        self.frames += 1
+
+
+def animate_move(animator: Animator,
+                 view: CanvasBoard,
+                 before: b.Board,
+                 after: b.Board,
+                 image: Callable[[b.Square], tk.PhotoImage]) -> bool:
+    '''
+    Animates the move taking one board to the other, if it was
+    a single move: A slide, or a battle. In battle, the defender
+    is revealed, then either the winner slides in or the losers
+    blink out.
+
+    :param animator: What runs the animations.
+    :param view: The board being shown, now showing after.
+    :param before: The board before the move.
+    :param after: The board after it.
+    :param image: Gives a square's image, revealing pieces.
+    :returns: False if this was not one move, and so was not
+        animated.
+    '''
+
+    vacated: List[Square] = []
+    entered: List[Square] = []
+
+    for y in range(after.height):
+        for x in range(after.width):
+            old: b.Square = before.get(x, y)
+            new: b.Square = after.get(x, y)
+
+            if b.encode_square(old) == b.encode_square(new):
+                continue
+
+            (entered if isinstance(new, p.Piece) else vacated).append((x, y))
+
+    if len(vacated) == 1 and len(entered) == 1:
+        delay: float = 0.0
+        defender: b.Square = before.get(*entered[0])
+
+        if isinstance(defender, p.Piece):
+            reveal: Reveal = Reveal(view, entered[0], image(defender))
+            animator.add(reveal)
+            delay = reveal.duration
+
+        animator.add(Slide(view, vacated[0], entered[0], delay=delay))
+        return True
+
+    if len(vacated) in (1, 2) and not entered:
+        for square in vacated:
+            animator.add(Capture(view, square, image(before.get(*square))))
+
+        return True
+
+    return False
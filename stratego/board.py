@@ -3,7 +3,8 @@ This module defines the board class for an Object-Oriented
 Stratego game.
 '''
 
-from typing import Union, List, Optional, Tuple, Literal, Callable
+from itertools import count
+from typing import Union, List, Optional, Tuple, Literal, Callable, Dict
 import stratego.pieces as p
 
 
@@ -24,6 +25,84 @@ class InvalidMoveError(Exception):
 # A square on a stratego board (via typedef)
 Square = Optional[Union[p.Piece, LakeSquare]]
 
+# All legal destinations, indexed by origin (via typedef)
+MoveMap = Dict[Tuple[int, int], List[Tuple[int, int]]]
+
+# Compact, one-byte-per-square encoding of squares. The high
+# nibble is the color and the low nibble is the kind of piece.
+_EMPTY_CODE: int = 0x00
+_LAKE_CODE: int = 0x01
+_COLOR_CODES: Dict[str, int] = {'RED': 0x10, 'BLUE': 0x20}
+_BOMB_CODE: int = 0x0B
+_FLAG_CODE: int = 0x0C
+
+# The rows each color sets up in, as a (start, end) range
+SETUP_ROWS: Dict[str, Tuple[int, int]] = {'RED': (0, 4), 'BLUE': (6, 10)}
+
+# Board versions, shared by every board so that no two states of
+# any boards share one
+_VERSIONS = count()
+
+
+def encode_square(square: Square) -> int:
+    '''
+    Encodes the given square as a single byte.
+
+    :param square: The square to encode.
+    :returns: The byte value.
+    '''
+
+    if square is None:
+        return _EMPTY_CODE
+
+    if not isinstance(square, p.Piece):
+        return _LAKE_CODE
+
+    kind: int = square.rank
+
+    if isinstance(square, p.Bomb):
+        kind = _BOMB_CODE
+    elif isinstance(square, p.Flag):
+        kind = _FLAG_CODE
+
+    return _COLOR_CODES[square.color] | kind
+
+
+def decode_square(code: int) -> Square:
+    '''
+    Decodes a byte made by encode_square.
+
+    :param code: The byte value.
+    :returns: The square it represents.
+    '''
+
+    if code == _EMPTY_CODE:
+        return None
+
+    if code == _LAKE_CODE:
+        return LakeSquare()
+
+    colors: Dict[int, Literal['RED', 'BLUE']] = {0x10: 'RED', 0x20: 'BLUE'}
+    color: Optional[Literal['RED', 'BLUE']] = colors.get(code & 0xF0)
+    kind: int = code & 0x0F
+
+    if color is None or not 1 <= kind <= _FLAG_CODE:
+        raise ValueError(f'Invalid square code {code}')
+
+    specials: Dict[int, Callable[[Literal['RED', 'BLUE']], p.Piece]] = {
+        1: p.Spy,
+        2: p.Scout,
+        3: p.Miner,
+        10: p.Marshal,
+        _BOMB_CODE: p.Bomb,
+        _FLAG_CODE: p.Flag
+    }
+
+    if kind in specials:
+        return specials[kind](color)
+
+    return p.Troop(color, kind)
+
 
 class Board:
     '''
@@ -70,6 +149,95 @@ class Board:
 
         type(self).__INSTANCE = self
 
+        self.__build_places()
+
+    @classmethod
+    def detached(cls) -> 'Board':
+        '''
+        Constructs a standard board which is NOT the singleton
+        instance. This is for headless players (IE bots and
+        servers) which must hold several boards in one process.
+        :returns: A new, empty board with lakes.
+        '''
+
+        out: 'Board' = cls.__new__(cls)
+        out.__build_places()
+
+        return out
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'Board':
+        '''
+        Constructs a detached board from an encoding made by
+        encode(). This replaces pickling boards over the network:
+        It is far smaller, and cannot execute arbitrary code.
+
+        :param data: One byte per square, row by row.
+        :returns: The decoded board.
+        '''
+
+        if len(data) != cls._WIDTH * cls._HEIGHT:
+            raise ValueError(f'Invalid board encoding of size {len(data)}')
+
+        out: 'Board' = cls.detached()
+        out.fill((0, 0),
+                 (cls._WIDTH, cls._HEIGHT),
+                 lambda x, y: decode_square(data[y * cls._WIDTH + x]))
+
+        return out
+
+    def encode(self) -> bytes:
+        '''
+        Encodes this board compactly, as one byte per square.
+
+        :returns: The encoding, to be read by decode().
+        '''
+
+        return bytes(encode_square(s) for row in self._places for s in row)
+
+    def encode_setup(self, color: Literal['RED', 'BLUE']) -> bytes:
+        '''
+        Encodes only the given color's setup rows, as one byte
+        per square. This is all the other player needs to know
+        about a setup.
+
+        :param color: The color whose setup to encode.
+        :returns: The encoding, to be read by place_setup().
+        '''
+
+        start, end = SETUP_ROWS[color]
+
+        return bytes(encode_square(s) for row in self._places[start:end] for s in row)
+
+    def place_setup(self, color: Literal['RED', 'BLUE'], data: bytes) -> None:
+        '''
+        Overwrites the given color's setup rows with a setup
+        made by encode_setup(), a whole row at a time.
+
+        :param color: The color whose setup this is.
+        :param data: The encoded setup.
+        :raises ValueError: If this is not exactly the given
+            color's 40 pieces.
+        '''
+
+        start, end = SETUP_ROWS[color]
+        width: int = type(self)._WIDTH
+
+        expected: List[int] = sorted(encode_square(piece) for piece in self.all_pieces(color))
+        if len(data) != (end - start) * width or sorted(data) != expected:
+            raise ValueError(f'Invalid {color} setup')
+
+        for i, y in enumerate(range(start, end)):
+            self._places[y][:] = [decode_square(code) for code in data[i * width:(i + 1) * width]]
+
+        self.__touch()
+
+    def __build_places(self) -> None:
+        '''
+        Populates this board with empty squares and the standard
+        lake setup.
+        '''
+
         self._places: List[List[Square]] = []
 
         # For each row requested
@@ -93,6 +261,15 @@ class Board:
         self._places[5][6] = LakeSquare()
         self._places[5][7] = LakeSquare()
 
+        self.__touch()
+
+    def __touch(self) -> None:
+        '''
+        Gives this board a new version, as it has changed.
+        '''
+
+        self.__version: int = next(_VERSIONS)
+
     @staticmethod
     def all_pieces(color: Literal['RED', 'BLUE']) -> List[p.Piece]:
         '''
@@ -115,6 +292,17 @@ class Board:
                     p.Troop(color, 5),
                     p.Troop(color, 4)] * 4)
 
+    @property
+    def version(self) -> int:
+        '''
+        :return: A number which changes whenever this board
+            does, and is never shared with another board, so
+            anything computed from the board may be cached by
+            it.
+        '''
+
+        return self.__version
+
     @property
     def height(self) -> int:
         '''
@@ -131,6 +319,15 @@ class Board:
 
         return self._WIDTH
 
+    def reset(self) -> None:
+        '''
+        Returns the board to how it was constructed: Empty, save
+        for the standard lakes. Unlike clear(), this keeps the
+        lakes.
+        '''
+
+        self.__build_places()
+
     def clear(self) -> None:
         '''
         Erase all pieces from the board.
@@ -162,6 +359,8 @@ class Board:
                 for x in range(start[0], end[0]):
                     self._places[y][x] = to(x, y)
 
+        self.__touch()
+
     def get(self, x: int, y: int) -> Square:
         '''
         Get the piece at the given point.
@@ -194,6 +393,78 @@ class Board:
             raise ValueError('Invalid dimension')
 
         self._places[y][x] = what
+        self.__touch()
+
+    def legal_moves(self, color: Literal['BLUE', 'RED']) -> MoveMap:
+        '''
+        Finds every legal move for the given color, in a single
+        pass over the board.
+
+        :param color: The color whose moves to find.
+        :returns: A dict mapping the (x, y) of each movable piece
+            to the list of (x, y) it can legally move to.
+        '''
+
+        out: MoveMap = {}
+
+        for from_y, row in enumerate(self._places):
+            for from_x, s in enumerate(row):
+
+                # Cannot move nothing, lakes, bombs, flags, or the
+                # other player's pieces
+                if not isinstance(s, p.Piece) or s.color != color:
+                    continue
+                if isinstance(s, (p.Bomb, p.Flag)):
+                    continue
+
+                destinations: List[Tuple[int, int]] = \
+                    self.__destinations(from_x, from_y, s)
+
+                if destinations:
+                    out[(from_x, from_y)] = destinations
+
+        return out
+
+    def __destinations(self,
+                       from_x: int,
+                       from_y: int,
+                       piece: p.Piece) -> List[Tuple[int, int]]:
+        '''
+        Lists the squares which the given movable piece can
+        legally move to from the given position.
+
+        :param from_x: The origin x.
+        :param from_y: The origin y.
+        :param piece: The piece at the origin.
+        :returns: All legal destination (x, y)'s.
+        '''
+
+        reach: int = max(self._WIDTH, self._HEIGHT) if isinstance(piece, p.Scout) else 1
+        out: List[Tuple[int, int]] = []
+
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            for step in range(1, reach + 1):
+                to_x: int = from_x + dx * step
+                to_y: int = from_y + dy * step
+
+                if not (0 <= to_x < self._WIDTH and 0 <= to_y < self._HEIGHT):
+                    break
+
+                t: Square = self._places[to_y][to_x]
+
+                # Cannot move into lakes or onto own pieces
+                if isinstance(t, LakeSquare):
+                    break
+                if isinstance(t, p.Piece) and t.color == piece.color:
+                    break
+
+                out.append((to_x, to_y))
+
+                # Scouts cannot move through other pieces
+                if t is not None:
+                    break
+
+        return out
 
     def move(self,
              color: Literal['BLUE', 'RED'],
@@ -236,6 +507,7 @@ class Board:
 
             self._places[to_y][to_x] = mover.confront(defender)
             self._places[from_y][from_x] = None
+            self.__touch()
 
             if isinstance(self._places[to_y][to_x], p.Flag):
                 return color
@@ -244,6 +516,7 @@ class Board:
 
         self._places[to_y][to_x] = self._places[from_y][from_x]
         self._places[from_y][from_x] = None
+        self.__touch()
         return 'GOOD'
 
     @classmethod
@@ -0,0 +1,300 @@
+'''
+Renderers for the GUI's board. Each shows one image per square,
+reconfiguring only squares whose image changed, and reports
+clicks as board coordinates. ButtonBoard uses a button per
+square; CanvasBoard draws every square on a single canvas, so
+costs one widget however large the board.
+'''
+
+import abc
+import tkinter as tk
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# The names make_view accepts
+VIEW_NAMES: Tuple[str, ...] = ('canvas', 'buttons')
+
+# Called with the (x, y) of a clicked square
+Handler = Callable[[int, int], None]
+
+Square = Tuple[int, int]
+
+
+class BoardView(abc.ABC):
+    '''
+    A board on screen, drawn square by square. Subclasses
+    decide with what widgets.
+    '''
+
+    _HIGHLIGHT_COLOR: str = 'gold'
+
+    def __init__(self, width: int, height: int, size: int) -> None:
+        '''
+        :param width: The number of columns.
+        :param height: The number of rows.
+        :param size: The width and height of a square, in pixels.
+        '''
+
+        self.width: int = width
+        self.height: int = height
+        self.size: int = size
+
+        # What clicking a square calls
+        self.on_click: Handler = lambda _, __: None
+
+        self.__shown: Dict[Square, tk.PhotoImage] = {}
+        self.__highlighted: Set[Square] = set()
+
+    @property
+    @abc.abstractmethod
+    def widget(self) -> tk.Widget:
+        '''
+        :returns: The widget to pack.
+        '''
+
+    @property
+    def highlighted(self) -> Set[Square]:
+        '''
+        :returns: The squares currently highlighted.
+        '''
+
+        return set(self.__highlighted)
+
+    def show(self, x: int, y: int, image: tk.PhotoImage) -> bool:
+        '''
+        Shows the image on the square, unless it already is.
+        Images are compared by identity, so pass cached ones.
+
+        :returns: True if the square was redrawn.
+        '''
+
+        if self.__shown.get((x, y)) is image:
+            return False
+
+        self._draw(x, y, image)
+        self.__shown[(x, y)] = image
+        return True
+
+    def highlight(self, squares: Iterable[Square]) -> None:
+        '''
+        Highlights the given squares, and no others.
+        '''
+
+        wanted: Set[Square] = set(squares)
+
+        for square in self.__highlighted - wanted:
+            self._mark(*square, False)
+
+        for square in wanted - self.__highlighted:
+            self._mark(*square, True)
+
+        self.__highlighted = wanted
+
+    def click(self, x: int, y: int) -> None:
+        '''
+        Reports a click on the given square, if it is on the
+        board.
+        '''
+
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.on_click(x, y)
+
+    @abc.abstractmethod
+    def _draw(self, x: int, y: int, image: tk.PhotoImage) -> None:
+        '''
+        Puts the image on the square.
+        '''
+
+    @abc.abstractmethod
+    def _mark(self, x: int, y: int, on: bool) -> None:
+        '''
+        Turns the square's highlight on or off.
+        '''
+
+
+class ButtonBoard(BoardView):
+    '''
+    A frame holding a row of buttons per board row.
+    '''
+
+    def __init__(self, master: tk.Misc, width: int, height: int, size: int) -> None:
+        '''
+        :param master: The widget to create the board in.
+        :param width: The number of columns.
+        :param height: The number of rows.
+        :param size: The width and height of a square, in pixels.
+        '''
+
+        super().__init__(width, height, size)
+
+        self.__frame: tk.Frame = tk.Frame(master)
+        self.__buttons: List[List[tk.Button]] = []
+        self.__background: Optional[str] = None
+
+        for y in range(height):
+            row: tk.Frame = tk.Frame(self.__frame)
+            self.__buttons.append([])
+
+            for x in range(width):
+                button: tk.Button = tk.Button(row,
+                                              command=ButtonCallbackWrapper(x, y, self.click),
+                                              border=0,
+                                              width=size,
+                                              height=size)
+                button.pack(side='left')
+                self.__buttons[y].append(button)
+
+            row.pack()
+
+    @property
+    def widget(self) -> tk.Widget:
+        '''
+        :returns: The frame to pack.
+        '''
+
+        return self.__frame
+
+    def _draw(self, x: int, y: int, image: tk.PhotoImage) -> None:
+        '''
+        Sets the square's button's image.
+        '''
+
+        self.__buttons[y][x].configure(image=image)
+
+    def _mark(self, x: int, y: int, on: bool) -> None:
+        '''
+        Recolors the square's button.
+        '''
+
+        button: tk.Button = self.__buttons[y][x]
+
+        if self.__background is None:
+            self.__background = str(button.cget('background'))
+
+        button.configure(background=self._HIGHLIGHT_COLOR if on else self.__background)
+
+
+class CanvasBoard(BoardView):
+    '''
+    A single canvas, with an image item per square and one
+    click handler for them all.
+    '''
+
+    def __init__(self, master: tk.Misc, width: int, height: int, size: int) -> None:
+        '''
+        :param master: The widget to create the board in.
+        :param width: The number of columns.
+        :param height: The number of rows.
+        :param size: The width and height of a square, in pixels.
+        '''
+
+        super().__init__(width, height, size)
+
+        self.__canvas: tk.Canvas = tk.Canvas(master,
+                                             width=width * size,
+                                             height=height * size,
+                                             borderwidth=0,
+                                             highlightthickness=0)
+
+        self.__items: List[List[int]] = [
+            [self.__canvas.create_image(x * size, y * size, anchor='nw') for x in range(width)]
+            for y in range(height)]
+
+        # Highlight outlines, by square, drawn over the images
+        self.__marks: Dict[Square, int] = {}
+
+        self.__canvas.bind('<Button-1>',
+                           lambda event: self.click(*self.square_at(event.x, event.y)))
+
+    @property
+    def widget(self) -> tk.Widget:
+        '''
+        :returns: The canvas to pack.
+        '''
+
+        return self.__canvas
+
+    @property
+    def canvas(self) -> tk.Canvas:
+        '''
+        :returns: The canvas, for drawing over the board.
+        '''
+
+        return self.__canvas
+
+    def square_at(self, px: int, py: int) -> Square:
+        '''
+        :param px: A pixel's x, from the canvas's left.
+        :param py: A pixel's y, from the canvas's top.
+        :returns: The (x, y) of the square holding the pixel.
+        '''
+
+        return (px // self.size, py // self.size)
+
+    def item(self, x: int, y: int) -> int:
+        '''
+        :returns: The canvas item showing the square's image,
+            which may be moved to animate it.
+        '''
+
+        return self.__items[y][x]
+
+    def _draw(self, x: int, y: int, image: tk.PhotoImage) -> None:
+        '''
+        Sets the square's image item's image.
+        '''
+
+        self.__canvas.itemconfigure(self.__items[y][x], image=image)
+
+    def _mark(self, x: int, y: int, on: bool) -> None:
+        '''
+        Draws or deletes an outline around the square.
+        '''
+
+        if not on:
+            self.__canvas.delete(self.__marks.pop((x, y)))
+            return
+
+        self.__marks[(x, y)] = self.__canvas.create_rectangle(
+            x * self.size + 1, y * self.size + 1,
+            (x + 1) * self.size - 1, (y + 1) * self.size - 1,
+            outline=self._HIGHLIGHT_COLOR,
+            width=2)
+
+
+class ButtonCallbackWrapper:
+    '''
+    An internal callable class for board button
+    callbacks.
+    '''
+
+    def __init__(self,
+                 x: int,
+                 y: int,
+                 c: Callable[[int, int], None]) -> None:
+        self.x = x
+        self.y = y
+        self.c = c
+
+    def __call__(self) -> None:
+        self.c(self.x, self.y)
+
+
+def make_view(name: str, master: tk.Misc, width: int, height: int, size: int) -> BoardView:
+    '''
+    Creates a board renderer by name.
+
+    :param name: One of VIEW_NAMES.
+    :param master: The widget to create the board in.
+    :param width: The number of columns.
+    :param height: The number of rows.
+    :param size: The width and height of a square, in pixels.
+    :returns: A new, blank, renderer.
+    '''
+
+    if name == 'canvas':
+        return CanvasBoard(master, width, height, size)
+
+    if name == 'buttons':
+        return ButtonBoard(master, width, height, size)
+
+    raise ValueError(f'Unknown board view {name!r}')
@@ -0,0 +1,255 @@
+'''
+Headless Stratego players for OOP Stratego. These play random
+legal games over a StrategoNetworker without any GUI, and are
+used by the game server and the load testing harness.
+'''
+
+import random
+import threading
+import time
+from typing import Callable, List, Literal, Optional, Tuple
+
+from stratego.board import SETUP_ROWS, Board
+from stratego.network import NetworkTask, StrategoNetworker
+from stratego.transport import MemoryTransport, Transport
+import stratego.pieces as p
+
+
+def random_setup(board: Board,
+                 color: Literal['RED', 'BLUE'],
+                 rng: random.Random) -> None:
+    '''
+    Randomly places all 40 of the given color's pieces in their
+    setup rows on the given board.
+
+    :param board: The board to place pieces on.
+    :param color: The color to set up.
+    :param rng: The source of randomness.
+    '''
+
+    to_place: List[p.Piece] = Board.all_pieces(color)
+    rng.shuffle(to_place)
+
+    start, end = SETUP_ROWS[color]
+    board.fill((0, start), (board.width, end), lambda _, __: to_place.pop())
+
+
+def random_move(board: Board,
+                color: Literal['RED', 'BLUE'],
+                rng: random.Random) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    '''
+    Picks a uniformly random legal move for the given color.
+
+    :param board: The board to move on.
+    :param color: The color to move.
+    :param rng: The source of randomness.
+    :returns: A (from, to) pair, or None if there are no legal
+        moves.
+    '''
+
+    moves = board.legal_moves(color)
+
+    if not moves:
+        return None
+
+    origin: Tuple[int, int] = rng.choice(list(moves))
+    return (origin, rng.choice(moves[origin]))
+
+
+class RandomBot:
+    '''
+    A headless player which makes random legal moves. This
+    mirrors the game flow of the GUI: Both players send their
+    setups and merge in each other's, then RED makes the first
+    move.
+    '''
+
+    def __init__(self,
+                 networker: StrategoNetworker,
+                 color: Literal['RED', 'BLUE'],
+                 seed: Optional[int] = None,
+                 max_turns: int = 500) -> None:
+        '''
+        :param networker: An already-connected networker.
+        :param color: The color to play as.
+        :param seed: The random seed, for reproducible games.
+        :param max_turns: The number of moves after which the
+            game is halted, since random games can run long.
+        '''
+
+        self.__net: StrategoNetworker = networker
+        self.__color: Literal['RED', 'BLUE'] = color
+        self.__rng: random.Random = random.Random(seed)
+        self.__max_turns: int = max_turns
+
+        # Seconds between sending each move and receiving the
+        # reply to it
+        self.round_trips: List[float] = []
+        self.moves: int = 0
+
+    def play(self, on_turn: Optional[Callable[[Board], None]] = None) -> str:
+        '''
+        Plays a whole game, from setup until a terminal state.
+
+        :param on_turn: Called with the board after every move
+            this bot makes.
+        :returns: The final game state.
+        '''
+
+        board: Board = self.__sync()
+
+        if self.__color == 'BLUE':
+            board, state = self.__net.recv_game()
+            if state != 'GOOD':
+                return state
+
+        return self.__play_from(board, on_turn)
+
+    def resume(self, on_turn: Optional[Callable[[Board], None]] = None) -> str:
+        '''
+        Continues a game which the networker has resumed, from
+        its latest board: See StrategoNetworker.restore_session.
+
+        :param on_turn: Called with the board after every move
+            this bot makes.
+        :returns: The final game state.
+        :raises ValueError: If there is no game to resume.
+        '''
+
+        latest: Optional[Tuple[Board, str]] = self.__net.latest
+        if latest is None:
+            raise ValueError('There is no game to resume')
+
+        board, state = latest
+        if state != 'GOOD':
+            return state
+
+        # RED moves first, so is level with BLUE on its turn,
+        # and BLUE one behind on its own
+        lead: int = self.__net.last_received_seq - self.__net.last_sent_seq
+        if lead != (1 if self.__color == 'BLUE' else 0):
+            board, state = self.__net.recv_game()
+            if state != 'GOOD':
+                return state
+
+        return self.__play_from(board, on_turn)
+
+    def __play_from(self, board: Board, on_turn: Optional[Callable[[Board], None]]) -> str:
+        '''
+        Plays from the given board, on which it is our turn,
+        until a terminal state.
+
+        :returns: The final game state.
+        '''
+
+        while True:
+            state = self.__move(board)
+
+            if on_turn is not None:
+                on_turn(board)
+
+            sent_at: float = time.perf_counter()
+            self.__net.send_game(board, state)
+
+            if StrategoNetworker.is_terminal_state(state):
+                return state
+
+            board, state = self.__net.recv_game()
+            self.round_trips.append(time.perf_counter() - sent_at)
+
+            if state != 'GOOD':
+                return state
+
+    def __sync(self) -> Board:
+        '''
+        Performs the setup exchange.
+
+        :returns: The merged board.
+        '''
+
+        board: Board = Board.detached()
+        random_setup(board, self.__color, self.__rng)
+        self.__net.send_setup(board, self.__color)
+
+        other: Literal['RED', 'BLUE'] = 'BLUE' if self.__color == 'RED' else 'RED'
+        board.place_setup(other, self.__net.recv_setup())
+
+        return board
+
+    def __move(self, board: Board) -> str:
+        '''
+        Makes one random move on the given board.
+
+        :returns: The resulting game state.
+        '''
+
+        move = random_move(board, self.__color, self.__rng)
+
+        if move is None or self.moves >= self.__max_turns:
+            return 'HALT'
+
+        self.moves += 1
+        return board.move(self.__color, move[0], move[1])
+
+
+def local_match(seed: Optional[int] = None,
+                max_turns: int = 500,
+                transport: Optional[Transport] = None) -> Tuple[RandomBot, RandomBot]:
+    '''
+    Plays one whole game between two RandomBots in this process,
+    over the same protocol as networked games. By default they
+    are connected in memory, skipping the network stack.
+
+    :param seed: The random seed, for reproducible games.
+    :param max_turns: Passed on to each RandomBot.
+    :param transport: How to connect the bots.
+    :returns: The (RED, BLUE) bots, after the game.
+    '''
+
+    if transport is None:
+        transport = MemoryTransport()
+
+    host: StrategoNetworker = StrategoNetworker.detached(transport)
+    joiner: StrategoNetworker = StrategoNetworker.detached(transport)
+
+    password: str = host.host_game('127.0.0.1', 0)
+    assert host.host_address is not None
+
+    waiter: threading.Thread = threading.Thread(target=host.host_wait_for_join, daemon=True)
+    waiter.start()
+
+    try:
+        if joiner.join_game(*host.host_address, password) != 0:
+            raise ConnectionError('Could not join the local match')
+        waiter.join()
+
+        red: RandomBot = RandomBot(host, 'RED', seed=seed, max_turns=max_turns)
+        blue: RandomBot = RandomBot(joiner,
+                                    'BLUE',
+                                    seed=None if seed is None else seed + 1,
+                                    max_turns=max_turns)
+
+        def play_red() -> str:
+            '''
+            Plays RED, unblocking BLUE if RED fails.
+            '''
+
+            try:
+                return red.play()
+            except (ValueError, OSError):
+                host.disconnect()
+                raise
+
+        red_game: NetworkTask[str] = NetworkTask(play_red)
+        red_game.start()
+        blue.play()
+
+        red_game.wait()
+        red_game.result()
+
+    finally:
+        joiner.close_game()
+        host.close_game()
+        host.cancel()
+
+    return (red, blue)
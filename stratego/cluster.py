@@ -0,0 +1,333 @@
+'''
+Sharding for the headless game server. One Python process
+saturates one core, so a Cluster runs several worker processes,
+each with a GameServer listening on the same port via
+SO_REUSEPORT, and the kernel spreads joiners among them.
+
+Each game is named by its join password, and belongs to the
+worker which consistent hashing picks for that name. A joiner
+whom the kernel hands to any other worker is redirected to the
+owner's own port, so a player who reconnects always lands on the
+worker holding their game, and changing the number of workers
+moves only a few games. Each worker parks the games whose player
+left in its own SessionStore, to resume when they return.
+
+Usage: python -m stratego.cluster --workers 4 --port 12345
+       python -m stratego.cluster --ip 0.0.0.0 --advertise 203.0.113.7
+'''
+
+import argparse
+import bisect
+import hashlib
+import multiprocessing
+import multiprocessing.synchronize
+import signal
+import socket
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from stratego.server import GameServer, Router
+from stratego.sessions import SessionStore
+from stratego.transport import Address, TCPTransport
+
+
+class HashRing:
+    '''
+    Consistent hashing of names onto nodes: Each node owns many
+    points on a ring, and a name belongs to the node owning the
+    first point after the name's hash.
+    '''
+
+    def __init__(self, nodes: int, replicas: int = 64) -> None:
+        '''
+        :param nodes: The number of nodes, numbered from 0.
+        :param replicas: Points per node. More spread names more
+            evenly.
+        '''
+
+        points: List[Tuple[int, int]] = sorted((_hash(f'{node}:{replica}'), node)
+                                               for node in range(nodes)
+                                               for replica in range(replicas))
+
+        self.__hashes: List[int] = [point for point, _ in points]
+        self.__nodes: List[int] = [node for _, node in points]
+
+    def node_for(self, name: str) -> int:
+        '''
+        :param name: What to place, such as a game's password.
+        :returns: The node it belongs to.
+        '''
+
+        index: int = bisect.bisect(self.__hashes, _hash(name)) % len(self.__hashes)
+        return self.__nodes[index]
+
+
+def _hash(name: str) -> int:
+    '''
+    :returns: A hash of the name which, unlike hash(), is the
+        same in every process.
+    '''
+
+    return int.from_bytes(hashlib.blake2b(name.encode('UTF-8'), digest_size=8).digest(), 'big')
+
+
+def _transport() -> TCPTransport:
+    '''
+    :returns: How every worker listens.
+    '''
+
+    return TCPTransport(reuse_address=True,
+                        send_buffer=GameServer._SEND_BUFFER,
+                        reuse_port=True)
+
+
+def _router(index: int, host: str, ports: Sequence[int]) -> Router:
+    '''
+    :param index: This worker's number.
+    :param host: The address joiners reach every worker at.
+    :param ports: Each worker's own port.
+    :returns: What gives the address of the worker which owns
+        the named game, unless it is this one.
+    '''
+
+    ring: HashRing = HashRing(len(ports))
+
+    def router(name: str) -> Optional[Address]:
+        '''
+        :returns: The address of the worker which owns the named
+            game, unless it is this one.
+        '''
+
+        owner: int = ring.node_for(name)
+        return None if owner == index else (host, ports[owner])
+
+    return router
+
+
+def run_worker(index: int,
+               ip: str,
+               advertise: str,
+               port: int,
+               ports: Sequence[int],
+               password: Optional[str],
+               max_turns: int,
+               join_rate: Optional[float],
+               ready: 'multiprocessing.synchronize.Event') -> None:
+    '''
+    The body of one worker process: Serves the shared port,
+    redirecting joiners whose game belongs to another worker,
+    and its own port, to which it is redirected.
+
+    :param index: This worker's number.
+    :param ip: The IPv4 address to serve on.
+    :param advertise: The IPv4 address joiners are redirected
+        to.
+    :param port: The port shared by every worker.
+    :param ports: Each worker's own port.
+    :param password: Passed on to GameServer.
+    :param max_turns: Passed on to GameServer.
+    :param join_rate: Passed on to GameServer.
+    :param ready: Set once both ports are being listened on.
+    '''
+
+    store: SessionStore = SessionStore()
+
+    shared: GameServer = GameServer(ip, port, password, max_turns,
+                                    transport=_transport(),
+                                    join_rate=join_rate,
+                                    router=_router(index, advertise, ports),
+                                    sessions=store)
+    own: GameServer = GameServer(ip, ports[index], password, max_turns,
+                                 transport=_transport(),
+                                 join_rate=join_rate,
+                                 sessions=store)
+
+    # Cluster.shutdown terminates workers, so stop serving on
+    # SIGTERM rather than dying, to clean up the store
+    signal.signal(signal.SIGTERM, lambda _, __: shared.shutdown(0.0))
+
+    threading.Thread(target=own.serve_forever, daemon=True).start()
+    ready.set()
+
+    try:
+        shared.serve_forever()
+    finally:
+        own.shutdown(0.0)
+        store.close()
+
+
+class Cluster:
+    '''
+    Several GameServer worker processes sharing one port.
+    '''
+
+    def __init__(self,
+                 ip: str,
+                 port: int,
+                 workers: int,
+                 password: Optional[str] = None,
+                 max_turns: int = 500,
+                 join_rate: Optional[float] = 5.0,
+                 advertise: Optional[str] = None) -> None:
+        '''
+        Reserves, but does not start serving on, the shared port
+        and each worker's own port.
+
+        :param ip: The IPv4 address to serve on.
+        :param port: The shared port. 0 picks a free one.
+        :param workers: The number of worker processes.
+        :param password: Passed on to a single GameServer. None,
+            the default, lets every joiner name their own game.
+        :param max_turns: Passed on to each GameServer.
+        :param join_rate: Passed on to each GameServer. Limits
+            apply per worker.
+        :param advertise: The IPv4 address joiners reach the
+            workers at, and are redirected to. Defaults to ip.
+        :raises ValueError: If given a password with several
+            workers, since games are sharded by password, or no
+            address to advertise when serving on every
+            interface.
+        :raises NotImplementedError: If the platform lacks
+            SO_REUSEPORT.
+        '''
+
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            raise NotImplementedError('SO_REUSEPORT is not supported here')
+
+        if password is not None and workers > 1:
+            raise ValueError('A fixed password would put every game on one worker')
+
+        if advertise is None and ip in ('', '0.0.0.0'):
+            raise ValueError(f'Serving on {ip!r} needs an address to advertise')
+
+        self.__ip: str = ip
+        self.__advertise: str = ip if advertise is None else advertise
+        self.__password: Optional[str] = password
+        self.__max_turns: int = max_turns
+        self.__join_rate: Optional[float] = join_rate
+
+        # Bound, but not listening, so that the kernel gives
+        # them no connections, and nothing else takes them
+        self.__reserved: List[socket.socket] = [_reserve(ip, port)]
+        self.__reserved += [_reserve(ip, 0) for _ in range(workers)]
+
+        ports: List[int] = [sock.getsockname()[1] for sock in self.__reserved]
+        self.__port: int = ports[0]
+        self.__ports: List[int] = ports[1:]
+
+        self.__processes: List[multiprocessing.Process] = []
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        '''
+        :returns: The (ip, port) which joiners connect to.
+        '''
+
+        return (self.__advertise, self.__port)
+
+    @property
+    def worker_addresses(self) -> List[Tuple[str, int]]:
+        '''
+        :returns: Each worker's own (ip, port), which joiners
+            are redirected to.
+        '''
+
+        return [(self.__advertise, port) for port in self.__ports]
+
+    def start(self, timeout: float = 10.0) -> None:
+        '''
+        Starts every worker, and waits until they all listen.
+
+        :param timeout: The most seconds to wait for each.
+        :raises TimeoutError: If any did not start in time.
+        '''
+
+        for index in range(len(self.__ports)):
+            ready: 'multiprocessing.synchronize.Event' = multiprocessing.Event()
+            process: multiprocessing.Process = multiprocessing.Process(
+                target=run_worker,
+                args=(index, self.__ip, self.__advertise, self.__port, self.__ports,
+                      self.__password,
+                      self.__max_turns, self.__join_rate, ready),
+                daemon=True)
+
+            process.start()
+            self.__processes.append(process)
+
+            if not ready.wait(timeout):
+                self.shutdown()
+                raise TimeoutError(f'Worker {index} did not start')
+
+        for sock in self.__reserved:
+            sock.close()
+
+        self.__reserved = []
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        '''
+        Stops every worker, ending their games.
+
+        :param timeout: The most seconds to wait for each.
+        '''
+
+        for process in self.__processes:
+            process.terminate()
+
+        for process in self.__processes:
+            process.join(timeout)
+
+        for sock in self.__reserved:
+            sock.close()
+
+        self.__processes = []
+        self.__reserved = []
+
+
+def _reserve(ip: str, port: int) -> socket.socket:
+    '''
+    Binds a socket which workers may also bind.
+
+    :returns: The bound socket.
+    '''
+
+    sock: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((ip, port))
+
+    return sock
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    '''
+    Command line entry point.
+    '''
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ip', default='127.0.0.1', help='address to serve on')
+    parser.add_argument('--port', type=int, default=12345, help='port to serve on')
+    parser.add_argument('--advertise',
+                        help='address joiners reach the workers at; needed with --ip 0.0.0.0')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help='worker processes; defaults to one per core')
+    parser.add_argument('--max-turns', type=int, default=500,
+                        help='moves per side before a game is halted')
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    cluster: Cluster = Cluster(args.ip, args.port, args.workers, max_turns=args.max_turns,
+                               advertise=args.advertise)
+    cluster.start()
+
+    print(f'Serving on {args.ip}:{cluster.address[1]}, as {cluster.address[0]}, '
+          f'with {args.workers} workers')
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+    cluster.shutdown(1.0)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,26 +4,51 @@ aggregate the board and networking. This is what should be
 presented to the user.
 '''
 
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+import glob
 from random import shuffle
 import tkinter as tk
-from typing import Optional, List, Callable, Tuple, Dict, Literal
+from typing import (Optional, List, Callable, Tuple, Dict, Deque, Literal, TypeVar, Any,
+                    ParamSpec)
 
 import stratego
 import stratego.board as b
 import stratego.network
 import stratego.pieces as p
+from stratego.animation import Animator, animate_move
+from stratego.boardview import BoardView, ButtonCallbackWrapper, CanvasBoard, make_view
+from stratego.metrics import FrameTracer
+from stratego.sprites import (Quality, SpriteCache, build_atlas, load_sprite, scale_photo,
+                              slice_atlas)
 
 
 def resize_image(img: tk.PhotoImage, w: int, h: int) -> tk.PhotoImage:
     '''
-    Resizes a tk.PhotoImage object. There is a better way to do
-    this, but this is the only way that works with mypy.
+    Resizes a tk.PhotoImage object. Ratios of small whole numbers
+    use Tk's zoom and subsample; others fall back to copying
+    pixel by pixel, which is slow. Prefer sprites.load_sprite for
+    image files.
     :param img: The image to resize.
     :param w: The desired width.
     :param h: The desired height.
     :returns: The resized image.
     '''
 
+    scaled: Optional[tk.PhotoImage] = scale_photo(img, w, h)
+    if scaled is not None:
+        return scaled
+
+    return _resize_pixels(img, w, h)
+
+
+def _resize_pixels(img: tk.PhotoImage, w: int, h: int) -> tk.PhotoImage:
+    '''
+    Resizes by copying pixel by pixel, as nearest neighbour.
+    This handles any ratio, but costs several Tcl calls per
+    pixel.
+    '''
+
     old_w: int = img.width()
     old_h: int = img.height()
 
@@ -52,6 +77,9 @@ def resize_image(img: tk.PhotoImage, w: int, h: int) -> tk.PhotoImage:
     return out
 
 
+T = TypeVar('T')
+P = ParamSpec('P')
+
 ScreenType = Literal['HOME', 'INFO', 'WIN', 'LOSE', 'ERROR',
                      'SETUP', 'HOST_GAME', 'JOIN_GAME',
                      'YOUR_TURN', 'THEIR_TURN', '']
@@ -65,23 +93,14 @@ class StrategoGUI:
 
     __INSTANCE: Optional['StrategoGUI'] = None
     _BUTTON_SIZE: int = 32
+    _SPRITE_QUALITY: Quality = 'nearest'
+    _BOARD_VIEW: str = 'canvas'
+    _POLL_MS: int = 20
+    _OVERLAY_MS: int = 500
+    _ANIMATE: bool = True
 
-    class ButtonCallbackWrapper:
-        '''
-        An internal callable class for board button
-        callbacks.
-        '''
-
-        def __init__(self,
-                     x: int,
-                     y: int,
-                     c: Callable[[int, int], None]) -> None:
-            self.x = x
-            self.y = y
-            self.c = c
-
-        def __call__(self) -> None:
-            self.c(self.x, self.y)
+    # Now used by ButtonBoard, which the board's buttons belong to
+    ButtonCallbackWrapper = ButtonCallbackWrapper
 
     @classmethod
     def get_instance(cls) -> 'StrategoGUI':
@@ -116,10 +135,14 @@ class StrategoGUI:
         assert key in self.__keybindings
         self.__keybindings[key]()
 
-    def __init__(self) -> None:
+    def __init__(self, tracer: Optional[FrameTracer] = None) -> None:
         '''
         Initialize the GUI window, given that none already
         exist.
+
+        :param tracer: Times inputs, screens and repaints, if
+            given, showing frame times in a corner and dumping
+            a trace to tracer.path (if set) on quitting.
         '''
 
         assert type(self).__INSTANCE is None, 'Cannot reinstantiate singleton'
@@ -130,6 +153,10 @@ class StrategoGUI:
         # TK root object; This is the screen we write in.
         self.__root: tk.Tk = tk.Tk()
 
+        # Instrumentation, if any, and where it is shown
+        self.__tracer: Optional[FrameTracer] = tracer
+        self.__overlay: Optional[tk.Label] = None
+
         # Global configuration options.
         self.__root.configure(bg='white')
         self.__root.option_add('*Background', 'white')
@@ -147,21 +174,78 @@ class StrategoGUI:
         self.__to_selection: Optional[Tuple[int, int]] = None
         self.__left_to_place: List[p.Piece] = []
 
+        # Whether a game is being played, and thus may be resumed
+        # after a dropped connection
+        self.__in_play: bool = False
+
+        # The (ip, port, password) last joined, for reconnecting
+        self.__join_address: Tuple[str, int, str] = ('127.0.0.1', 12345, '')
+
         # Internal optimizations and bookkeeping
         self.__keybindings: Dict[str, Callable[[], None]] = {}
         self.__image_cache: Dict[str, tk.PhotoImage] = {}
 
+        # Scaled sprites from earlier launches
+        self.__sprite_cache: SpriteCache = SpriteCache()
+        self.__preload_sprites()
+
         # For finding board buttons
         self.__misc_widgets: Dict[str, tk.Widget] = {}
 
+        # Our legal moves, and the (board version, color) they
+        # were found for
+        self.__moves: b.MoveMap = {}
+        self.__moves_key: Optional[Tuple[int, str]] = None
+
+        # Statistics: Times our legal moves were found
+        self.move_lists_built: int = 0
+
+        # The displayed board, if any
+        self.__view: Optional[BoardView] = None
+
+        # Statistics: Squares redrawn by the last refresh
+        self.squares_refreshed: int = 0
+
+        # What animates moves on the displayed board, if anything,
+        # and the board as last shown, to find the moves in
+        self.__animator: Optional[Animator] = None
+        self.__shown_board: Optional[bytes] = None
+
+        # The networking call currently running in the background
+        self.__task: Optional[stratego.network.NetworkTask[Any]] = None
+
+        # The screen drawn on entering each state
+        self.__screens: Dict[ScreenType, Callable[[], None]] = {
+            'HOME': self.__home_screen,
+            'INFO': self.__info_screen,
+            'WIN': self.__win_screen,
+            'LOSE': self.__lose_screen,
+            'ERROR': self.__error_screen,
+            'SETUP': self.__setup_screen,
+            'HOST_GAME': self.__host_game_screen,
+            'JOIN_GAME': self.__join_game_screen,
+            'YOUR_TURN': self.__your_turn_screen,
+            'THEIR_TURN': self.__their_turn_screen
+        }
+
+        # Transitions not yet made, and whether they are being
+        self.__transitions: Deque[Tuple[ScreenType, Optional[Callable[[], None]]]] = deque()
+        self.__dispatching: bool = False
+
+        # Statistics: The most transitions queued at once
+        self.transitions_queued: int = 0
+
         # This keybinding is not tracked and thus not erased
         self.__root.bind('q', lambda _: self.__quit())
 
         # Set title
         self.__root.title(self.__title)
 
-        # Initiate game
-        self.__home_screen()
+        # Initiate game. This is the only event loop; Screens
+        # return to it rather than calling one another.
+        self.__go('HOME')
+        self.__update_overlay()
+        self.__root.mainloop()
 
     @property
     def screen(self) -> ScreenType:
@@ -177,21 +261,8 @@ class StrategoGUI:
         Moves to the given string, as long as it exists.
         '''
 
-        cases: Dict[ScreenType, Callable[[], None]] = {
-            'HOME': self.__home_screen,
-            'INFO': self.__info_screen,
-            'WIN': self.__win_screen,
-            'LOSE': self.__lose_screen,
-            'ERROR': self.__error_screen,
-            'SETUP': self.__setup_screen,
-            'HOST_GAME': self.__host_game_screen,
-            'JOIN_GAME': self.__join_game_screen,
-            'YOUR_TURN': self.__your_turn_screen,
-            'THEIR_TURN': self.__their_turn_screen
-        }
-
-        assert to in cases
-        cases[to]()
+        assert to in self.__screens
+        self.__go(to)
 
     @property
     def color(self) -> Literal['RED', 'BLUE']:
@@ -209,6 +280,31 @@ class StrategoGUI:
 
         self.__color = to
 
+    @property
+    def tracer(self) -> Optional[FrameTracer]:
+        '''
+        :returns: What times the GUI, if anything.
+        '''
+
+        return self.__tracer
+
+    @property
+    def board_view(self) -> Optional[BoardView]:
+        '''
+        :returns: The board being displayed, if any.
+        '''
+
+        return self.__view
+
+    @property
+    def animator(self) -> Optional[Animator]:
+        '''
+        :returns: What animates moves on the displayed board, if
+            anything.
+        '''
+
+        return self.__animator
+
     @property
     def board(self) -> b.Board:
         '''
@@ -217,9 +313,11 @@ class StrategoGUI:
 
         return self.__board
 
-    def __get_image(self, piece: b.Square) -> tk.PhotoImage:
+    def __get_image(self, piece: b.Square, reveal: bool = False) -> tk.PhotoImage:
         '''
         :param piece: The piece to load the image from.
+        :param reveal: Whether to show the other player's piece
+            as what it is, as in battle.
         :returns: A tk-compatible version of that image.
         '''
 
@@ -232,45 +330,175 @@ class StrategoGUI:
 
             elif isinstance(piece, p.Piece):
 
-                if piece.color != self.__color:
+                if piece.color != self.__color and not reveal:
                     path = f'stratego/images/{piece.color}_blank.png'
 
                 else:
                     path = f'stratego/images/{piece.color}_{repr(piece)}.png'
 
         if path not in self.__image_cache:
-            raw: tk.PhotoImage = tk.PhotoImage(file=path)
-            self.__image_cache[path] = resize_image(raw,
-                                                    self._BUTTON_SIZE,
-                                                    self._BUTTON_SIZE)
+            with self.__span('image_miss'):
+                self.__image_cache[path] = load_sprite(path,
+                                                       self._BUTTON_SIZE,
+                                                       self._BUTTON_SIZE,
+                                                       self._SPRITE_QUALITY,
+                                                       self.__sprite_cache)
 
         return self.__image_cache[path]
 
+    def __preload_sprites(self) -> None:
+        '''
+        Scales every sprite into one atlas in the background,
+        then slices it into the image cache on the GUI thread,
+        so that no image is loaded mid-game. Until then, or if
+        it fails, images are loaded as they are needed.
+        '''
+
+        paths: List[str] = sorted(glob.glob('stratego/images/*.png'))
+        size: int = self._BUTTON_SIZE
+        quality: Quality = self._SPRITE_QUALITY
+        cache: SpriteCache = self.__sprite_cache
+
+        task: stratego.network.NetworkTask[bytes] = stratego.network.NetworkTask(
+            lambda: build_atlas(paths, size, quality, cache))
+        task.start()
+
+        def poll() -> None:
+            '''
+            Checks on the task, rescheduling itself if need be.
+            '''
+
+            if not task.done():
+                self.__root.after(self._POLL_MS, poll)
+                return
+
+            try:
+                atlas: bytes = task.result()
+            except (ValueError, OSError):
+                return
+
+            for path, sprite in slice_atlas(atlas, paths, size).items():
+                self.__image_cache.setdefault(path, sprite)
+
+        poll()
+
     def __refresh_board(self,
                         callback: Callable[[int, int], None]) -> None:
         '''
-        Refreshes, but does not redraw, the board.
+        Refreshes, but does not redraw, the board. Only squares
+        whose image changed are redrawn, so a move touches two
+        squares rather than all of them.
+
+        :param callback: The function which clicking a square
+            will now call.
         '''
 
         assert 'board' in self.__misc_widgets
+        assert self.__view is not None
 
-        board: tk.Widget = self.__misc_widgets['board']
+        self.__view.on_click = self.__traced('click', callback)
+        self.squares_refreshed = 0
+
+        # Whatever is animating is out of date
+        if self.__animator is not None:
+            self.__animator.finish_all()
+
+        with self.__span('refresh'):
+
+            for y in range(self.__view.height):
+
+                for x in range(self.__view.width):
+
+                    if self.__view.show(x, y, self.__get_image(self.__board.get(x, y))):
+                        self.squares_refreshed += 1
+
+        self.__animate()
+        self.__repaint()
+
+    def __animate(self) -> None:
+        '''
+        Animates the move since the board was last shown, if
+        playing. The board is already drawn as it is now; The
+        animations only run from later frames, scheduled with
+        root.after, so they never delay input.
+        '''
 
-        for y, row in enumerate(board.winfo_children()):
+        if self.__animator is None or not isinstance(self.__view, CanvasBoard):
+            return
+
+        shown: Optional[bytes] = self.__shown_board
+        self.__shown_board = self.__board.encode()
+
+        if self.__in_play and shown is not None and shown != self.__shown_board:
+            with self.__span('animate'):
+                animate_move(self.__animator,
+                             self.__view,
+                             b.Board.decode(shown),
+                             self.__board,
+                             lambda piece: self.__get_image(piece, reveal=True))
+
+    def __repaint(self) -> None:
+        '''
+        Repaints, without handling input from within this call.
+        This closes any frame being traced.
+        '''
+
+        with self.__span('repaint'):
+            self.__root.update_idletasks()
+
+        if self.__tracer is not None:
+            self.__tracer.repainted()
+
+    def __span(self, name: str) -> AbstractContextManager[None]:
+        '''
+        :param name: What is being timed.
+        :returns: A context which times its body, if tracing.
+        '''
+
+        if self.__tracer is None:
+            return nullcontext()
+
+        return self.__tracer.span(name)
+
+    def __traced(self, name: str, call: Callable[P, None]) -> Callable[P, None]:
+        '''
+        Wraps an input handler so that, if tracing, it opens a
+        frame and is timed. Should it not repaint, the frame
+        closes once Tk is next idle, having repainted itself.
+
+        :param name: What kind of input this handles.
+        :param call: The handler.
+        :returns: The handler, timed.
+        '''
 
-            for x, button in enumerate(row.winfo_children()):
+        tracer: Optional[FrameTracer] = self.__tracer
+        if tracer is None:
+            return call
 
-                assert isinstance(button, tk.Button)
+        def traced(*args: P.args, **kwargs: P.kwargs) -> None:
+            tracer.input()
 
-                img: tk.PhotoImage = self.__get_image(self.__board.get(x, y))
-                button.configure(image=img,
-                                 command=StrategoGUI.ButtonCallbackWrapper(x,
-                                                                           y,
-                                                                           callback))
+            with tracer.span(name):
+                call(*args, **kwargs)
 
-        self.__misc_widgets['board'] = board
+            if tracer.pending:
+                self.__root.after_idle(tracer.repainted)
 
-        self.__root.update()
+        return traced
+
+    def __update_overlay(self) -> None:
+        '''
+        Shows the latest frame times, then does so again every
+        _OVERLAY_MS, if tracing.
+        '''
+
+        if self.__tracer is None:
+            return
+
+        if self.__overlay is not None:
+            self.__overlay.configure(text=self.__tracer.summary())
+
+        self.__root.after(self._OVERLAY_MS, self.__update_overlay)
 
     def __display_board(self,
                         callback: Callable[[int, int], None]) -> None:
@@ -278,37 +506,31 @@ class StrategoGUI:
         Packs the board onto the end of the current screen. This
         does NOT clear the screen!
 
-        :param callback: The function which button presses will
-            call.
+        :param callback: The function which clicking a square
+            will call.
         '''
 
-        board: tk.Frame = tk.Frame(self.__root)
+        view: BoardView = make_view(self._BOARD_VIEW,
+                                    self.__root,
+                                    self.__board.width,
+                                    self.__board.height,
+                                    self._BUTTON_SIZE)
+        view.on_click = self.__traced('click', callback)
 
         for y in range(self.__board.height):
 
-            row: tk.Frame = tk.Frame(board)
-
             for x in range(self.__board.width):
 
-                image: tk.PhotoImage = self.__get_image(self.__board.get(x, y))
-
-                button: tk.Button = \
-                    tk.Button(row,
-                              command=StrategoGUI.ButtonCallbackWrapper(x,
-                                                                        y,
-                                                                        callback),
-                              image=image,
-                              border=0,
-                              width=32,
-                              height=32)
+                view.show(x, y, self.__get_image(self.__board.get(x, y)))
 
-                button.pack(side='left')
+        view.widget.pack()
 
-            row.pack()
+        self.__view = view
+        self.__misc_widgets['board'] = view.widget
 
-        board.pack()
-
-        self.__misc_widgets['board'] = board
+        if self._ANIMATE and isinstance(view, CanvasBoard):
+            self.__animator = Animator(self.__root.after)
+            self.__shown_board = self.__board.encode()
 
     def __bind(self, sequence: str, event: Callable[[], None]) -> None:
         '''
@@ -318,8 +540,104 @@ class StrategoGUI:
         method.
         '''
 
-        self.__root.bind(sequence, lambda _: event())
-        self.__keybindings[sequence] = event
+        traced: Callable[[], None] = self.__traced('key', event)
+
+        self.__root.bind(sequence, lambda _: traced())
+        self.__keybindings[sequence] = traced
+
+    def __go(self, to: ScreenType, then: Optional[Callable[[], None]] = None) -> None:
+        '''
+        Moves to the given screen. Transitions made while one is
+        already being made are queued, and made once it returns,
+        so screens never call into one another, and any number
+        of games are played at the same stack depth.
+
+        :param to: The screen to move to.
+        :param then: Called once the screen is drawn, if given.
+        '''
+
+        self.__transitions.append((to, then))
+        self.transitions_queued = max(self.transitions_queued, len(self.__transitions))
+
+        if self.__dispatching:
+            return
+
+        self.__dispatching = True
+
+        try:
+            while self.__transitions:
+                screen, after = self.__transitions.popleft()
+
+                with self.__span('screen'):
+                    self.__screens[screen]()
+
+                if after is not None:
+                    after()
+
+        finally:
+            self.__transitions.clear()
+            self.__dispatching = False
+
+    def __await_network(self,
+                        call: Callable[[], T],
+                        on_done: Callable[[T], None]) -> None:
+        '''
+        Runs the given blocking networking call in the
+        background, polling for its result via the tk event loop
+        so that the window stays responsive. When the call
+        finishes, on_done is called with its result on the GUI
+        thread. If the call fails, moves to the error screen.
+
+        :param call: The blocking networking call.
+        :param on_done: The function to pass the result to.
+        '''
+
+        task: stratego.network.NetworkTask[T] = stratego.network.NetworkTask(call)
+        self.__task = task
+        task.start()
+
+        def poll() -> None:
+            '''
+            Checks on the task, rescheduling itself if need be.
+            '''
+
+            if task.cancelled:
+                return
+
+            if not task.done():
+                self.__root.after(self._POLL_MS, poll)
+                return
+
+            self.__task = None
+
+            try:
+                self.__traced('network', on_done)(task.result())
+            except (ValueError, OSError):
+                self.__go('ERROR')
+
+        poll()
+
+    def __cancel_network(self) -> None:
+        '''
+        Aborts the networking call running in the background, if
+        any, and returns to the home screen.
+        '''
+
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+            self.__networking.cancel()
+
+        self.__abandon_game()
+
+    def __abandon_game(self) -> None:
+        '''
+        Ends the current game for good, then returns home.
+        '''
+
+        self.__in_play = False
+        self.__networking.close_game()
+        self.__go('HOME')
 
     def quit(self) -> None:
         '''
@@ -334,6 +652,20 @@ class StrategoGUI:
         Button callback function for quitting the app.
         '''
 
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+            self.__networking.cancel()
+
+        # Lets the other player know that there is no rematch
+        self.__networking.close_game()
+
+        if self.__tracer is not None and self.__tracer.path is not None:
+            try:
+                print(f'Trace written to {self.__tracer.dump()}')
+            except OSError as e:
+                print(f'Failed to write trace: {e}')
+
         self.__root.destroy()
 
     def clear(self) -> None:
@@ -349,6 +681,11 @@ class StrategoGUI:
         keybindings.
         '''
 
+        # End animations while their canvas exists
+        if self.__animator is not None:
+            self.__animator.finish_all()
+            self.__animator = None
+
         # Destroy all children
         children: List[tk.Widget] = self.__root.winfo_children()
         for child in children:
@@ -356,6 +693,7 @@ class StrategoGUI:
 
         # Destroy all stored widgets
         self.__misc_widgets.clear()
+        self.__view = None
 
         # Unbind all keybindings registered herein
         for key in self.__keybindings:
@@ -370,6 +708,11 @@ class StrategoGUI:
         # Empty widget to maintain width
         tk.Label(self.__root, height=0, width=25).pack()
 
+        # Frame times, in the corner, over whatever is there
+        if self.__tracer is not None:
+            self.__overlay = tk.Label(self.__root, text=self.__tracer.summary(), font='Courier 10')
+            self.__overlay.place(relx=1.0, rely=1.0, anchor='se')
+
     def __home_screen(self) -> None:
         '''
         The host/connect screen of the app.
@@ -382,19 +725,17 @@ class StrategoGUI:
 
         tk.Button(self.__root,
                   text='Host Game',
-                  command=self.__host_game_screen).pack()
+                  command=lambda: self.__go('HOST_GAME')).pack()
         tk.Button(self.__root,
                   text='Join Game',
-                  command=self.__join_game_screen).pack()
+                  command=lambda: self.__go('JOIN_GAME')).pack()
 
-        tk.Button(self.__root, text='Info', command=self.__info_screen).pack()
+        tk.Button(self.__root, text='Info', command=lambda: self.__go('INFO')).pack()
         tk.Button(self.__root, text='Quit', command=self.__quit).pack()
 
         # Permanent keybindings
-        self.__bind('h', self.__host_game_screen)
-        self.__bind('j', self.__join_game_screen)
-
-        self.__root.mainloop()
+        self.__bind('h', lambda: self.__go('HOST_GAME'))
+        self.__bind('j', lambda: self.__go('JOIN_GAME'))
 
     def __info_screen(self) -> None:
         '''
@@ -416,7 +757,7 @@ class StrategoGUI:
 
         tk.Button(self.__root,
                   text='Home',
-                  command=self.__home_screen).pack()
+                  command=lambda: self.__go('HOME')).pack()
         tk.Button(self.__root,
                   text='Quit',
                   command=self.__quit).pack()
@@ -465,15 +806,21 @@ class StrategoGUI:
                           + f'Port: {port_str if port_str else "12345"}\n'
                           + f'Password: {password}').pack()
             tk.Label(self.__root, text='Waiting for other player...').pack()
-            self.__root.update()
+            tk.Button(self.__root,
+                      text='Cancel',
+                      command=self.__cancel_network).pack()
+            self.__bind('<Escape>', self.__cancel_network)
 
-            # Make API call and wait
-            self.__networking.host_wait_for_join()
+            def joined(_: None) -> None:
+                '''
+                When API call is done, advance to next screen
+                '''
 
-            # When API call is done, advance to next screen
-            self.__color = 'RED'
+                self.__color = 'RED'
+                self.__go('SETUP')
 
-            self.__setup_screen()
+            # Make API call and wait in the background
+            self.__await_network(self.__networking.host_wait_for_join, joined)
 
         tk.Button(self.__root,
                   text='Host This Game',
@@ -512,16 +859,34 @@ class StrategoGUI:
             ip_str: str = ip.get()
             port_str: str = port.get()
 
-            # Make API call and wait
-            result: int = self.__networking.join_game(ip_str if ip_str else '127.0.0.1',
-                                                      int(port_str) if port_str else 12345,
-                                                      password_str)
+            self.__join_address = (ip_str if ip_str else '127.0.0.1',
+                                   int(port_str) if port_str else 12345,
+                                   password_str)
 
-            if result == 0:
-                # When API call is done, advance to next screen
-                self.__color = 'BLUE'
+            def joined(result: int) -> None:
+                '''
+                When API call is done, advance to next screen
+                '''
 
-                self.__setup_screen()
+                if result == 0:
+                    self.__color = 'BLUE'
+                    self.__go('SETUP')
+                    return
+
+                self.__go('JOIN_GAME',
+                          lambda: tk.Label(self.__root, text='Failed to join.').pack())
+
+            # Display waiting text
+            self.__clear()
+            tk.Label(self.__root, text='Connecting...').pack()
+            tk.Button(self.__root,
+                      text='Cancel',
+                      command=self.__cancel_network).pack()
+            self.__bind('<Escape>', self.__cancel_network)
+
+            # Make API call and wait in the background
+            self.__await_network(lambda: self.__networking.join_game(*self.__join_address),
+                                 joined)
 
         tk.Button(self.__root,
                   text='Join This Game',
@@ -538,12 +903,6 @@ class StrategoGUI:
         # Fetch all pieces
         self.__left_to_place = self.__board.all_pieces(self.__color)
 
-        # Setup other color placeholder pieces
-        if self.__color == 'BLUE':
-            self.__board.fill((0, 0), (10, 4), p.Bomb('RED'))
-        else:
-            self.__board.fill((0, 6), (10, 10), p.Bomb('BLUE'))
-
     def __randomize_all(self) -> None:
         '''
         Randomizes all remaining pieces
@@ -570,39 +929,13 @@ class StrategoGUI:
     def __first_sync(self) -> None:
         '''
         Sync the two boards and begin play. This is to be called
-        when setup screen is done.
+        when setup screen is done. Each player sends only their
+        own setup, then places the other player's on arrival.
 
         This will only be called once, before the turn loop.
         Thus, this contains the setup for the widget system.
         '''
 
-        if self.__color == 'RED':
-
-            self.__clear()
-
-            # Creates self.__misc_widgets['turn_label']
-            self.__misc_widgets['turn_label'] = \
-                tk.Label(self.__root, text='Waiting...')
-            self.__misc_widgets['turn_label'].pack()
-
-            # Creates self.__misc_widgets['board']
-            self.__display_board(lambda _, __: None)
-
-            self.__root.update()
-
-            # Recv
-            their_board, _ = self.__networking.recv_game()
-            for y in range(0, 4):
-                for x in range(0, 10):
-                    their_board.set_piece(x, y, self.__board.get(x, y))
-            self.__board = their_board
-
-            # Send
-            self.__networking.send_game(self.__board, 'GOOD')
-
-            self.__your_turn_screen()
-            return
-
         self.__clear()
         self.__screen = 'THEIR_TURN'
 
@@ -614,20 +947,27 @@ class StrategoGUI:
         # Creates self.__misc_widgets['board']
         self.__display_board(lambda _, __: None)
 
-        self.__root.update()
+        def synced(placements: bytes) -> None:
+            '''
+            Places their pieces, then begins play. RED moves
+            first.
+            '''
+
+            other: Literal['RED', 'BLUE'] = 'BLUE' if self.__color == 'RED' else 'RED'
+            self.__board.place_setup(other, placements)
 
-        # Send
-        self.__networking.send_game(self.__board, 'GOOD')
+            self.__go('YOUR_TURN' if self.__color == 'RED' else 'THEIR_TURN')
 
-        # Recv
-        their_board, _ = self.__networking.recv_game()
-        for y in range(6, 10):
-            for x in range(0, 10):
-                their_board.set_piece(x, y, self.__board.get(x, y))
-        self.__board = their_board
+        def sent(_: None) -> None:
+            '''
+            Awaits their setup, now that ours is sent.
+            '''
+
+            self.__await_network(self.__networking.recv_setup, synced)
 
-        self.__their_turn_screen()
-        return
+        board: b.Board = self.__board
+        color: Literal['RED', 'BLUE'] = self.__color
+        self.__await_network(lambda: self.__networking.send_setup(board, color), sent)
 
     def __setup_screen(self) -> None:
         '''
@@ -661,7 +1001,7 @@ class StrategoGUI:
                 self.__left_to_place.insert(0, existing_piece)
 
                 self.__board.set_piece(x, y, None)
-                self.__setup_screen()
+                self.__go('SETUP')
 
                 return
 
@@ -672,7 +1012,7 @@ class StrategoGUI:
                 self.__first_sync()
                 return
 
-            self.__setup_screen()
+            self.__go('SETUP')
 
         self.__screen = 'SETUP'
 
@@ -724,11 +1064,15 @@ class StrategoGUI:
             :param y: The y-coord of the board button pressed.
             '''
 
+            assert self.__view is not None
+
             if self.__from_selection is None:
                 self.__from_selection = (x, y)
+                self.__view.highlight(self.__legal_moves().get((x, y), []))
                 return
 
             self.__to_selection = (x, y)
+            self.__view.highlight(())
 
             self.__check_move()
 
@@ -748,9 +1092,11 @@ class StrategoGUI:
             # Creates self.__misc_widgets['board']
             self.__display_board(board_movement_callback)
 
-            self.__root.update()
-
         self.__screen = 'YOUR_TURN'
+        self.__in_play = True
+
+        # Found now, so that the first click highlights at once
+        self.__legal_moves()
 
         assert 'turn_label' in self.__misc_widgets
         assert isinstance(self.__misc_widgets['turn_label'], tk.Label)
@@ -758,7 +1104,31 @@ class StrategoGUI:
         self.__misc_widgets['turn_label'].configure(text='Your turn.')
         self.__refresh_board(board_movement_callback)
 
+    def __legal_moves(self) -> b.MoveMap:
+        '''
+        Our legal moves, found again only once the board has
+        changed.
+
+        :returns: The squares each of our pieces can move to, by
+            the piece's square.
+        '''
+
+        key: Tuple[int, str] = (self.__board.version, self.__color)
+
+        if key != self.__moves_key:
+            self.__moves = self.__board.legal_moves(self.__color)
+            self.__moves_key = key
+            self.move_lists_built += 1
+
+        return self.__moves
+
     def __check_move(self) -> None:
+        '''
+        Makes the selected move, if it is valid. The move is
+        shown at once, rather than after it has been sent. It is
+        logged by the networker before any of it is sent, so if
+        sending fails, it is kept, and replayed on reconnecting.
+        '''
 
         assert self.__from_selection
         assert self.__to_selection
@@ -771,74 +1141,83 @@ class StrategoGUI:
                                       self.__to_selection)
 
         except b.InvalidMoveError:
-            # Invalid move
-            self.__your_turn_screen()
-
-            assert 'turn_label' in self.__misc_widgets
-            assert isinstance(self.__misc_widgets['turn_label'], tk.Label)
-            self.__misc_widgets['turn_label'].configure(text='Invalid move.')
-            self.__root.update()
-
+            self.__go('YOUR_TURN', self.__invalid_move)
             return
 
-        try:
+        # Show the move while it is sent
+        self.__show_their_turn('Sending...')
 
-            # Send to other player
-            self.__networking.send_game(self.__board, state)
+        def sent(_: None) -> None:
+            '''
+            Moves on, now that the move is with the other player.
+            '''
 
             # Check game state
-            if state == self.__color:
-                self.__win_screen()
+            self.__go('WIN' if state == self.__color else 'THEIR_TURN')
 
-            else:
-                self.__their_turn_screen()
+        board: b.Board = self.__board
+        self.__await_network(lambda: self.__networking.send_game(board, state), sent)
 
-        except ValueError:
-            self.__error_screen()
+    def __invalid_move(self) -> None:
+        '''
+        Tells our player that their move was invalid.
+        '''
 
-    def __their_turn_screen(self) -> None:
+        assert 'turn_label' in self.__misc_widgets
+        assert isinstance(self.__misc_widgets['turn_label'], tk.Label)
+        self.__misc_widgets['turn_label'].configure(text='Invalid move.')
+
+    def __show_their_turn(self, text: str) -> None:
         '''
-        Waiting screen while the other player moves.
+        Shows the board while the other player moves, without
+        awaiting anything.
+
+        :param text: What to tell the player.
         '''
 
-        try:
+        # Update screen
+        self.__screen = 'THEIR_TURN'
+        self.__in_play = True
 
-            # Update screen
-            self.__screen = 'THEIR_TURN'
+        if 'turn_label' not in self.__misc_widgets:
+            self.__clear()
 
-            if 'turn_label' not in self.__misc_widgets:
-                self.__clear()
+            # Creates self.__misc_widgets['turn_label']
+            self.__misc_widgets['turn_label'] = \
+                tk.Label(self.__root, text='Waiting...')
+            self.__misc_widgets['turn_label'].pack()
 
-                # Creates self.__misc_widgets['turn_label']
-                self.__misc_widgets['turn_label'] = \
-                    tk.Label(self.__root, text='Waiting...')
-                self.__misc_widgets['turn_label'].pack()
+            # Creates self.__misc_widgets['board']
+            self.__display_board(lambda _, __: None)
 
-                # Creates self.__misc_widgets['board']
-                self.__display_board(lambda _, __: None)
+        assert 'turn_label' in self.__misc_widgets
+        assert isinstance(self.__misc_widgets['turn_label'], tk.Label)
 
-                self.__root.update()
+        self.__misc_widgets['turn_label'].configure(text=text)
+        self.__refresh_board(lambda _, __: None)
 
-            assert 'turn_label' in self.__misc_widgets
-            assert isinstance(self.__misc_widgets['turn_label'], tk.Label)
+    def __their_turn_screen(self) -> None:
+        '''
+        Waiting screen while the other player moves. The window
+        stays responsive while their move is awaited.
+        '''
 
-            self.__misc_widgets['turn_label'].configure(text='Thier turn; Waiting.')
-            self.__refresh_board(lambda _, __: None)
+        self.__show_their_turn('Thier turn; Waiting.')
 
-            self.__root.update()
+        # Wait for move recv
+        self.__await_network(self.__networking.recv_game, self.__their_move_received)
 
-            # Wait for move recv
-            self.__board, state = self.__networking.recv_game()
+    def __their_move_received(self, result: Tuple[b.Board, str]) -> None:
+        '''
+        Called once the other player's move has arrived.
 
-            # Check game state
-            if state != 'GOOD':
-                self.__lose_screen()
+        :param result: The received board and game state.
+        '''
 
-            else:
-                self.__your_turn_screen()
+        self.__board, state = result
 
-        except ValueError:
-            self.__error_screen()
+        # Check game state
+        self.__go('YOUR_TURN' if state == 'GOOD' else 'LOSE')
 
     def __win_screen(self) -> None:
         '''
@@ -847,8 +1226,7 @@ class StrategoGUI:
 
         self.__clear()
         self.__screen = 'WIN'
-
-        self.__networking.close_game()
+        self.__in_play = False
 
         tk.Label(self.__root,
                  image=self.__get_image(p.Flag(self.__color))).pack()
@@ -857,7 +1235,10 @@ class StrategoGUI:
 
         tk.Button(self.__root,
                   text='Play Again',
-                  command=self.__home_screen).pack()
+                  command=self.__rematch).pack()
+        tk.Button(self.__root,
+                  text='Home',
+                  command=self.__abandon_game).pack()
         tk.Button(self.__root,
                   text='Quit',
                   command=self.__quit).pack()
@@ -869,8 +1250,7 @@ class StrategoGUI:
 
         self.__clear()
         self.__screen = 'LOSE'
-
-        self.__networking.close_game()
+        self.__in_play = False
 
         tk.Label(self.__root,
                  image=self.__get_image(p.Bomb(self.__color))).pack()
@@ -879,27 +1259,97 @@ class StrategoGUI:
 
         tk.Button(self.__root,
                   text='Play Again',
-                  command=self.__home_screen).pack()
+                  command=self.__rematch).pack()
+        tk.Button(self.__root,
+                  text='Home',
+                  command=self.__abandon_game).pack()
         tk.Button(self.__root,
                   text='Quit',
                   command=self.__quit).pack()
 
+    def __rematch(self) -> None:
+        '''
+        Plays again against the same player, over the same
+        connection. Once they agree, both boards are reset and
+        a new setup phase begins, with the same colors as
+        before. If they leave instead, returns home.
+        '''
+
+        self.__clear()
+        tk.Label(self.__root, text='Waiting for other player...').pack()
+        tk.Button(self.__root,
+                  text='Cancel',
+                  command=self.__cancel_network).pack()
+        self.__bind('<Escape>', self.__cancel_network)
+
+        def agreed(result: bool) -> None:
+            '''
+            Starts the new game, given that they agreed.
+            '''
+
+            if not result:
+                self.__abandon_game()
+                return
+
+            self.__board.reset()
+            self.__left_to_place = []
+            self.__go('SETUP')
+
+        self.__await_network(self.__networking.rematch, agreed)
+
     def __error_screen(self) -> None:
         '''
         Shown when an error occurs (IE when the other user drops
-        out unexpectedly).
+        out unexpectedly). If a game was being played, it may be
+        resumed from here.
         '''
 
         self.__clear()
         self.__screen = 'ERROR'
 
-        self.__networking.close_game()
+        # Keep the game, so that it can be resumed
+        self.__networking.disconnect()
 
         tk.Label(self.__root, text='Error: Connection terminated.').pack()
 
+        if self.__in_play:
+            tk.Button(self.__root,
+                      text='Reconnect',
+                      command=self.__reconnect).pack()
+
         tk.Button(self.__root,
                   text='Play Again',
-                  command=self.__home_screen).pack()
+                  command=self.__abandon_game).pack()
         tk.Button(self.__root,
                   text='Quit',
                   command=self.__quit).pack()
+
+    def __reconnect(self) -> None:
+        '''
+        Reconnects to the other player and resumes the game in
+        progress. The host waits for the joiner to come back,
+        while the joiner rejoins using the same address. Any
+        moves either player missed are replayed, after which we
+        await the other player's next move.
+        '''
+
+        self.__clear()
+        tk.Label(self.__root, text='Reconnecting...').pack()
+        tk.Button(self.__root,
+                  text='Cancel',
+                  command=self.__cancel_network).pack()
+        self.__bind('<Escape>', self.__cancel_network)
+
+        def resumed(result: Optional[int]) -> None:
+            '''
+            Resumes play, given that the reconnect worked.
+            '''
+
+            self.__go('ERROR' if result else 'THEIR_TURN')
+
+        if self.__color == 'RED':
+            self.__await_network(self.__networking.host_wait_for_join, resumed)
+
+        else:
+            self.__await_network(lambda: self.__networking.join_game(*self.__join_address),
+                                 resumed)
@@ -0,0 +1,267 @@
+'''
+Load testing harness for OOP Stratego. Starts a GameServer on
+loopback, then spawns many headless BLUE clients (one process
+each) which join it with the StrategoNetworker protocol and play
+random legal games. Reports move round-trip latency percentiles,
+throughput and error counts. Runs fully offline, over either TCP
+or Unix domain sockets. Pass --workers to serve from a
+stratego.cluster of that many processes instead.
+
+Usage: python -m stratego.loadtest --clients 50
+'''
+
+import argparse
+import multiprocessing
+import queue
+import threading
+import time
+from typing import List, Optional, Sequence, Union
+
+from stratego.bot import RandomBot
+from stratego.cluster import Cluster
+from stratego.metrics import percentile
+from stratego.network import StrategoNetworker
+from stratego.server import GameServer
+from stratego.transport import Transport, make_transport
+
+
+# What clients join an unsharded server with
+_PASSWORD: str = 'LOAD'
+
+
+class ClientResult:
+    '''
+    What a single load testing client reports back.
+    '''
+
+    def __init__(self) -> None:
+        self.round_trips: List[float] = []
+        self.moves: int = 0
+        self.error: Optional[str] = None
+
+
+class LoadReport:
+    '''
+    The aggregated results of a load test.
+    '''
+
+    def __init__(self,
+                 clients: int,
+                 seconds: float,
+                 moves: int,
+                 errors: int,
+                 round_trips: List[float]) -> None:
+        '''
+        :param clients: The number of simultaneous games.
+        :param seconds: The wall time of the whole test.
+        :param moves: The moves made by all clients.
+        :param errors: The number of clients which failed.
+        :param round_trips: Every move round trip, in seconds.
+        '''
+
+        self.clients: int = clients
+        self.seconds: float = seconds
+        self.moves: int = moves
+        self.errors: int = errors
+        self.round_trips: List[float] = round_trips
+
+    @property
+    def throughput(self) -> float:
+        '''
+        :returns: Moves per second, across all clients.
+        '''
+
+        return self.moves / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        '''
+        :returns: A human-readable report.
+        '''
+
+        lines: List[str] = [f'clients:    {self.clients}',
+                            f'duration:   {self.seconds:.2f} s',
+                            f'moves:      {self.moves}',
+                            f'throughput: {self.throughput:.1f} moves/s',
+                            f'errors:     {self.errors}']
+
+        for q in (50, 95, 99):
+            value: float = percentile(self.round_trips, q) * 1000
+            lines.append(f'p{q} rtt:    {value:.3f} ms')
+
+        return '\n'.join(lines)
+
+
+def run_client(ip: str,
+               port: int,
+               password: str,
+               seed: int,
+               max_turns: int,
+               results: 'multiprocessing.Queue[ClientResult]',
+               transport: str = 'tcp') -> None:
+    '''
+    The body of one client process: Joins, plays one game as
+    BLUE, then reports back via the results queue.
+    '''
+
+    out: ClientResult = ClientResult()
+    net: StrategoNetworker = StrategoNetworker.detached(make_transport(transport))
+
+    try:
+        if net.join_game(ip, port, password) != 0:
+            out.error = 'join failed'
+
+        else:
+            bot: RandomBot = RandomBot(net, 'BLUE', seed=seed, max_turns=max_turns)
+            bot.play()
+
+            out.round_trips = bot.round_trips
+            out.moves = bot.moves
+
+    except (ValueError, OSError) as e:
+        out.error = repr(e)
+
+    finally:
+        net.close_game()
+
+    results.put(out)
+
+
+def run_load_test(clients: int,
+                  max_turns: int = 200,
+                  timeout: float = 120.0,
+                  ip: str = '127.0.0.1',
+                  transport: str = 'tcp',
+                  workers: Optional[int] = None) -> LoadReport:
+    '''
+    Runs a whole load test: One server in this process, and the
+    given number of client processes, all started at once.
+
+    :param clients: The number of simultaneous games.
+    :param max_turns: The most moves each side makes per game.
+    :param timeout: Seconds after which stragglers are killed
+        and counted as errors.
+    :param ip: The loopback address to serve on.
+    :param transport: 'tcp' or 'unix'. The clients are separate
+        processes, so 'memory' cannot be used.
+    :param workers: If given, serves from a Cluster of this many
+        processes (over TCP) rather than from this process. Each
+        client then plays its own named game.
+    :returns: The aggregated results.
+    '''
+
+    server: Union[GameServer, Cluster] = _start_server(ip, max_turns, transport, workers)
+    port: int = server.address[1]
+
+    results: 'multiprocessing.Queue[ClientResult]' = multiprocessing.Queue()
+    processes: List[multiprocessing.Process] = [
+        multiprocessing.Process(target=run_client,
+                                args=(ip, port,
+                                      _PASSWORD if workers is None else f'{seed % 0x10000:04X}',
+                                      seed, max_turns, results, transport),
+                                daemon=True)
+        for seed in range(clients)]
+
+    start: float = time.perf_counter()
+
+    for process in processes:
+        process.start()
+
+    collected: List[ClientResult] = _collect(results, clients, start + timeout)
+    seconds: float = time.perf_counter() - start
+
+    for process in processes:
+        process.join(0.1)
+        if process.is_alive():
+            process.terminate()
+
+    server.shutdown(0.1)
+
+    round_trips: List[float] = [rtt for result in collected for rtt in result.round_trips]
+    errors: int = sum(1 for result in collected if result.error is not None)
+
+    return LoadReport(clients=clients,
+                      seconds=seconds,
+                      moves=sum(result.moves for result in collected),
+                      errors=errors + (clients - len(collected)),
+                      round_trips=round_trips)
+
+
+def _start_server(ip: str,
+                  max_turns: int,
+                  transport: str,
+                  workers: Optional[int]) -> Union[GameServer, Cluster]:
+    '''
+    Starts the server which run_load_test measures.
+
+    :returns: The running server.
+    '''
+
+    # Every client joins from loopback at once
+    if workers is not None:
+        cluster: Cluster = Cluster(ip, 0, workers, max_turns=max_turns, join_rate=None)
+        cluster.start()
+        return cluster
+
+    server_transport: Optional[Transport] = \
+        None if transport == 'tcp' else make_transport(transport)
+    server: GameServer = GameServer(ip, 0, _PASSWORD,
+                                    max_turns=max_turns,
+                                    transport=server_transport,
+                                    join_rate=None)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _collect(results: 'multiprocessing.Queue[ClientResult]',
+             count: int,
+             deadline: float) -> List[ClientResult]:
+    '''
+    Reads up to count results, giving up at the deadline.
+
+    :returns: The results which arrived in time.
+    '''
+
+    out: List[ClientResult] = []
+
+    while len(out) < count:
+        remaining: float = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+
+        try:
+            out.append(results.get(timeout=remaining))
+        except queue.Empty:
+            break
+
+    return out
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    '''
+    Command line entry point.
+    '''
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, nargs='+', default=[10],
+                        help='simultaneous games; several values run several tests')
+    parser.add_argument('--max-turns', type=int, default=200,
+                        help='moves per side before a game is halted')
+    parser.add_argument('--timeout', type=float, default=120.0,
+                        help='seconds before stragglers count as errors')
+    parser.add_argument('--transport', choices=('tcp', 'unix'), default='tcp',
+                        help='how clients connect to the server')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='serve from a cluster of this many processes (TCP only)')
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    for clients in args.clients:
+        report: LoadReport = run_load_test(clients, args.max_turns, args.timeout,
+                                           transport=args.transport,
+                                           workers=args.workers)
+        print(report.summary())
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,668 @@
+'''
+Matchmaking for OOP Stratego. A MatchServer queues players who
+connect with StrategoNetworker.join_any, pairs them by rating and
+latency, then relays each pair's game: The longer-waiting player
+hosts (as RED), and the other joins, over the same connections.
+
+Queued players are kept in order of rating. A player is matched
+as soon as they are queued if anyone is close enough in rating,
+so the queue only ever holds players with no acceptable opponent,
+and each insert or match looks only at nearby ratings. The
+acceptable gap widens the longer a player waits, until they are
+matched or give up. Since it can only reach someone once it spans
+the distance to their nearest neighbour, each player is retried
+only once it has, or once they expire.
+'''
+
+import bisect
+import heapq
+import itertools
+import math
+import random
+import socket
+import string
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from stratego.network import StrategoNetworker
+from stratego.ratelimit import RateLimiter, peer_key
+from stratego.transport import (Address, Connection, Listener, TCPTransport, Transport,
+                                recv_exact)
+
+
+# The state (8), sequence number (16) and size (16) fields
+_RECORD_HEADER_SIZE: int = len(StrategoNetworker.make_record('', 0, b''))
+
+# The largest record a queued player has any reason to send
+_MAX_CONTROL_SIZE: int = 64
+
+
+class Ticket:
+    '''
+    One queued player, and eventually their opponent.
+    '''
+
+    def __init__(self,
+                 rating: int,
+                 latency: float,
+                 enqueued_at: float,
+                 context: Any = None) -> None:
+        '''
+        :param rating: The player's rating.
+        :param latency: The player's round trip time to the
+            server, in seconds.
+        :param enqueued_at: When they were queued.
+        :param context: Whatever the caller needs to reach the
+            player, such as their connection.
+        '''
+
+        self.rating: int = rating
+        self.latency: float = latency
+        self.enqueued_at: float = enqueued_at
+        self.context: Any = context
+
+        self.opponent: Optional['Ticket'] = None
+        self.is_host: bool = False
+
+        self.__done: threading.Event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        '''
+        :returns: True once matched, expired or cancelled.
+        '''
+
+        return self.__done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        '''
+        Waits until this ticket is matched, expired or
+        cancelled.
+
+        :param timeout: The most seconds to wait.
+        :returns: True if it is done.
+        '''
+
+        return self.__done.wait(timeout)
+
+    def finish(self, opponent: Optional['Ticket'], is_host: bool = False) -> None:
+        '''
+        Takes this ticket off the queue, waking its waiter.
+
+        :param opponent: Who they will play, or None if they
+            will not play anyone.
+        :param is_host: Whether they host the game.
+        '''
+
+        self.opponent = opponent
+        self.is_host = is_host
+        self.__done.set()
+
+
+class Matchmaker:
+    '''
+    Pairs queued players whose ratings are close enough,
+    preferring low latency. Thread-safe.
+    '''
+
+    def __init__(self,
+                 initial_gap: float = 100.0,
+                 widen_rate: float = 25.0,
+                 max_gap: float = 1000.0,
+                 latency_weight: float = 1000.0,
+                 max_wait: float = 60.0,
+                 is_alive: Optional[Callable[[Ticket], bool]] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        '''
+        :param initial_gap: The largest rating difference a
+            newly queued player accepts.
+        :param widen_rate: How much the gap grows per second
+            waited.
+        :param max_gap: The most the gap grows to.
+        :param latency_weight: Rating points which a second of
+            combined latency is worth, when choosing between
+            acceptable opponents.
+        :param max_wait: Seconds after which a player is given
+            up on.
+        :param is_alive: Checks, without blocking, that a queued
+            player can still play. Those who cannot are dropped
+            rather than paired. By default, everyone can.
+        :param clock: The time source, in seconds.
+        '''
+
+        self.__initial_gap: float = initial_gap
+        self.__widen_rate: float = widen_rate
+        self.__max_gap: float = max_gap
+        self.__latency_weight: float = latency_weight
+        self.__max_wait: float = max_wait
+        self.__is_alive: Optional[Callable[[Ticket], bool]] = is_alive
+        self.__clock: Callable[[], float] = clock
+
+        self.__lock: threading.Lock = threading.Lock()
+
+        # Every queued (rating, id(ticket)), in order
+        self.__ratings: List[Tuple[int, int]] = []
+
+        # Every queued ticket, by id
+        self.__queue: Dict[int, Ticket] = {}
+
+        # When each queued ticket next needs retrying, by id, and
+        # as a heap of (when, push order, ticket). Heap entries
+        # which no longer match their ticket's time are stale
+        self.__due_at: Dict[int, float] = {}
+        self.__due: List[Tuple[float, int, Ticket]] = []
+        self.__pushes: Iterator[int] = itertools.count()
+
+        # Statistics
+        self.matches: int = 0
+        self.expired: int = 0
+        self.dropped: int = 0
+        self.retries: int = 0
+
+    def __len__(self) -> int:
+        '''
+        :returns: The number of players waiting.
+        '''
+
+        return len(self.__queue)
+
+    def gap(self, ticket: Ticket, now: float) -> float:
+        '''
+        :param ticket: A queued player.
+        :param now: The current time.
+        :returns: The largest rating difference they accept.
+        '''
+
+        widened: float = self.__initial_gap + self.__widen_rate * (now - ticket.enqueued_at)
+        return min(self.__max_gap, widened)
+
+    def enqueue(self, rating: int, latency: float = 0.0, context: Any = None) -> Ticket:
+        '''
+        Queues a player, matching them at once if possible.
+
+        :param rating: The player's rating.
+        :param latency: The player's round trip time, in
+            seconds.
+        :param context: Kept on their ticket, for whoever they
+            are matched with.
+        :returns: Their ticket, to wait on.
+        '''
+
+        with self.__lock:
+            now: float = self.__clock()
+            ticket: Ticket = Ticket(rating, latency, now, context)
+
+            if not self.__match(ticket, now):
+                self.__insert(ticket)
+
+            return ticket
+
+    def cancel(self, ticket: Ticket) -> None:
+        '''
+        Takes a player off the queue, if they are still on it.
+
+        :param ticket: Their ticket.
+        '''
+
+        with self.__lock:
+            if not ticket.done:
+                self.__remove(ticket)
+                ticket.finish(None)
+
+    def sweep(self) -> int:
+        '''
+        Retries those queued whose gaps have widened enough to
+        reach their nearest neighbour in rating, and gives up on
+        those who have waited too long. Everyone else is left
+        alone, so a sweep costs nothing while no one is due.
+        Call this periodically.
+
+        :returns: The number of matches made.
+        '''
+
+        made: int = 0
+
+        with self.__lock:
+            now: float = self.__clock()
+            due: List[Ticket] = []
+
+            while self.__due and self.__due[0][0] <= now:
+                when, _, ticket = heapq.heappop(self.__due)
+
+                if self.__due_at.get(id(ticket)) == when:
+                    due.append(ticket)
+
+            for ticket in due:
+                # Already matched with someone earlier this sweep
+                if ticket.done:
+                    continue
+
+                self.__remove(ticket)
+                self.retries += 1
+
+                if now - ticket.enqueued_at >= self.__max_wait:
+                    self.expired += 1
+                    ticket.finish(None)
+
+                elif self.__match(ticket, now):
+                    made += 1
+
+                else:
+                    self.__insert(ticket)
+
+        return made
+
+    def __match(self, ticket: Ticket, now: float) -> bool:
+        '''
+        Pairs the given (unqueued) ticket with the best queued
+        one within its gap, if any, dropping any found dead
+        instead. Call with the lock held.
+
+        :returns: True if it was matched.
+        '''
+
+        while True:
+            best: Optional[Ticket] = self.__best(ticket, self.gap(ticket, now))
+
+            if best is None:
+                return False
+
+            self.__remove(best)
+
+            if self.__is_alive is None or self.__is_alive(best):
+                break
+
+            self.dropped += 1
+            best.finish(None)
+
+        self.matches += 1
+
+        # Whoever waited longer hosts
+        best_hosts: bool = best.enqueued_at <= ticket.enqueued_at
+        best.finish(ticket, is_host=best_hosts)
+        ticket.finish(best, is_host=not best_hosts)
+
+        return True
+
+    def __best(self, ticket: Ticket, gap: float) -> Optional[Ticket]:
+        '''
+        Finds the cheapest queued opponent for a ticket. Call
+        with the lock held.
+
+        :param gap: The largest rating difference to accept.
+        :returns: The opponent, or None if none are close
+            enough.
+        '''
+
+        low: int = bisect.bisect_left(self.__ratings, (math.ceil(ticket.rating - gap), -1))
+        high: int = bisect.bisect_right(self.__ratings, (math.floor(ticket.rating + gap), math.inf))
+
+        best: Optional[Ticket] = None
+        best_cost: float = 0.0
+
+        for _, key in self.__ratings[low:high]:
+            other: Ticket = self.__queue[key]
+
+            cost: float = abs(other.rating - ticket.rating) \
+                + self.__latency_weight * (ticket.latency + other.latency)
+
+            if best is None or cost < best_cost:
+                best, best_cost = other, cost
+
+        return best
+
+    def __insert(self, ticket: Ticket) -> None:
+        '''
+        Queues a ticket, then works out when it and its new
+        neighbours are next due. Call with the lock held.
+        '''
+
+        entry: Tuple[int, int] = (ticket.rating, id(ticket))
+        bisect.insort(self.__ratings, entry)
+        self.__queue[id(ticket)] = ticket
+
+        index: int = bisect.bisect_left(self.__ratings, entry)
+        for neighbour in range(max(0, index - 1), min(len(self.__ratings), index + 2)):
+            self.__schedule(neighbour)
+
+    def __schedule(self, index: int) -> None:
+        '''
+        Works out when the ticket at the given index in
+        __ratings is next due: When its gap reaches its nearest
+        neighbour, or it expires, whichever is sooner. Call with
+        the lock held.
+        '''
+
+        ticket: Ticket = self.__queue[self.__ratings[index][1]]
+        when: float = ticket.enqueued_at + self.__max_wait
+
+        distances: List[int] = [abs(self.__ratings[i][0] - ticket.rating)
+                                for i in (index - 1, index + 1)
+                                if 0 <= i < len(self.__ratings)]
+
+        if distances and min(distances) <= self.__max_gap:
+            short: float = max(0.0, min(distances) - self.__initial_gap)
+
+            if short == 0.0:
+                when = ticket.enqueued_at
+            elif self.__widen_rate > 0:
+                when = min(when, ticket.enqueued_at + short / self.__widen_rate)
+
+        if self.__due_at.get(id(ticket)) != when:
+            self.__due_at[id(ticket)] = when
+            heapq.heappush(self.__due, (when, next(self.__pushes), ticket))
+
+    def __remove(self, ticket: Ticket) -> None:
+        '''
+        Unqueues a ticket, if queued. Call with the lock held.
+        '''
+
+        if self.__queue.pop(id(ticket), None) is None:
+            return
+
+        index: int = bisect.bisect_left(self.__ratings, (ticket.rating, id(ticket)))
+        del self.__ratings[index]
+
+        # Its entries in the heap are now stale. Its neighbours'
+        # are early at worst, which only costs a retry
+        del self.__due_at[id(ticket)]
+
+
+class _Seat:
+    '''
+    A queued player's connection, as seen by whoever they are
+    matched with.
+    '''
+
+    def __init__(self, conn: Connection) -> None:
+        '''
+        :param conn: Their connection.
+        '''
+
+        self.conn: Connection = conn
+
+        # Set once their own session has stopped writing to conn
+        self.released: threading.Event = threading.Event()
+
+
+class MatchServer:
+    '''
+    Queues everyone who connects with join_any, and relays the
+    games of those who are matched.
+    '''
+
+    _SWEEP_INTERVAL: float = 0.25
+    _HEARTBEAT_INTERVAL: float = 5.0
+
+    def __init__(self,
+                 ip: str,
+                 port: int,
+                 matchmaker: Optional[Matchmaker] = None,
+                 transport: Optional[Transport] = None,
+                 join_rate: Optional[float] = 5.0,
+                 join_burst: float = 20.0) -> None:
+        '''
+        Binds, but does not start serving on, the given address.
+
+        :param ip: The IPv4 address to serve on.
+        :param port: The port to listen on. 0 picks a free one.
+        :param matchmaker: How to pair players. Defaults to a
+            Matchmaker with default settings, which drops players
+            who have disconnected rather than pairing them.
+        :param transport: How to accept players. Defaults to
+            TCP.
+        :param join_rate: Connections allowed per second from
+            each address, or None for no limit.
+        :param join_burst: Connections allowed at once from
+            each address.
+        '''
+
+        self.__matchmaker: Matchmaker = \
+            matchmaker if matchmaker is not None else Matchmaker(is_alive=_is_connected)
+        self.__transport: Transport = \
+            transport if transport is not None else TCPTransport(reuse_address=True)
+
+        self.__socket: Listener
+        self.__address: Address
+        self.__socket, self.__address = self.__transport.listen((ip, port), backlog=128)
+
+        self.__limiter: Optional[RateLimiter] = \
+            None if join_rate is None else RateLimiter(join_rate, join_burst)
+
+        self.__is_running: bool = False
+
+        # Statistics
+        self.relays: int = 0
+        self.errors: int = 0
+        self.rate_limited: int = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        '''
+        :returns: The (ip, port) actually being listened on.
+        '''
+
+        return self.__address
+
+    @property
+    def matchmaker(self) -> Matchmaker:
+        '''
+        :returns: The matchmaker pairing this server's players.
+        '''
+
+        return self.__matchmaker
+
+    def serve_forever(self) -> None:
+        '''
+        Accepts players until shutdown() is called.
+        '''
+
+        self.__is_running = True
+        threading.Thread(target=self.__sweep_loop, daemon=True).start()
+
+        while self.__is_running:
+            try:
+                conn, peer = self.__socket.accept()
+            except OSError:
+                break
+
+            if self.__limiter is not None and not self.__limiter.allow(peer_key(peer)):
+                self.rate_limited += 1
+                conn.close()
+                continue
+
+            threading.Thread(target=self.__session, args=(conn,), daemon=True).start()
+
+    def shutdown(self) -> None:
+        '''
+        Stops accepting players. Games in progress continue.
+        '''
+
+        self.__is_running = False
+
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.__socket.close()
+
+    def __sweep_loop(self) -> None:
+        '''
+        Periodically retries everyone queued.
+        '''
+
+        while self.__is_running:
+            self.__matchmaker.sweep()
+            time.sleep(type(self)._SWEEP_INTERVAL)
+
+    def __session(self, conn: Connection) -> None:
+        '''
+        Queues one player. If they are matched as the host,
+        tells both players their roles, then relays between
+        them. The other player's session just hands over.
+
+        :param conn: The accepted connection.
+        '''
+
+        seat: _Seat = _Seat(conn)
+
+        try:
+            ticket: Optional[Ticket] = self.__queue(seat)
+        except (ValueError, OSError):
+            self.errors += 1
+            ticket = None
+
+        seat.released.set()
+
+        if ticket is None or ticket.opponent is None:
+            conn.close()
+            return
+
+        if ticket.is_host:
+            self.__relay(seat, ticket.opponent.context)
+
+    def __queue(self, seat: _Seat) -> Optional[Ticket]:
+        '''
+        Reads the player's rating, measures their latency, then
+        waits for them to be matched, sending heartbeats all the
+        while. Tells them if they were given up on.
+
+        :param seat: Their connection.
+        :returns: Their finished ticket.
+        :raises ValueError: If they did not ask to be queued.
+        '''
+
+        conn: Connection = seat.conn
+
+        state, payload = _recv_control(conn)
+        if state != 'QUEUE':
+            raise ValueError(f'Expected QUEUE, but received {state}')
+
+        rating: int = int(payload.decode('UTF-8'))
+
+        started: float = time.perf_counter()
+        conn.sendall(StrategoNetworker.make_record('PING', 0, b''))
+        if _recv_control(conn)[0] != 'PONG':
+            raise ValueError('Expected PONG')
+
+        ticket: Ticket = self.__matchmaker.enqueue(rating, time.perf_counter() - started, seat)
+
+        while not ticket.wait(type(self)._HEARTBEAT_INTERVAL):
+            try:
+                conn.sendall(StrategoNetworker.make_record('BEAT', 0, b''))
+            except OSError:
+                self.__matchmaker.cancel(ticket)
+
+        if ticket.opponent is None:
+            try:
+                conn.sendall(StrategoNetworker.make_record('HALT', 0, b''))
+            except OSError:
+                pass
+
+        return ticket
+
+    def __relay(self, host: _Seat, joiner: _Seat) -> None:
+        '''
+        Tells the host and joiner their roles and a password,
+        then relays between them until either leaves.
+        '''
+
+        password: bytes = ''.join(random.choice(string.digits)
+                                  for _ in range(StrategoNetworker.PASSWORD_SIZE)).encode('UTF-8')
+
+        # Wait for the joiner's session to stop heartbeating
+        joiner.released.wait()
+
+        try:
+            host.conn.sendall(StrategoNetworker.make_record('HOST', 0, password))
+            joiner.conn.sendall(StrategoNetworker.make_record('JOIN', 0, password))
+        except OSError:
+            self.errors += 1
+            _close(host.conn, joiner.conn)
+            return
+
+        self.relays += 1
+
+        threading.Thread(target=_pipe, args=(joiner.conn, host.conn), daemon=True).start()
+        _pipe(host.conn, joiner.conn)
+
+
+def _recv_control(conn: Connection) -> Tuple[str, bytes]:
+    '''
+    Receives one record, as StrategoNetworker sends them.
+
+    :returns: The (state, payload).
+    :raises ValueError: If it is malformed, or over
+        _MAX_CONTROL_SIZE bytes.
+    '''
+
+    header: bytes = recv_exact(conn, _RECORD_HEADER_SIZE)
+    state: str = header[:8].decode('UTF-8').strip(' ')
+    size: int = int(header[24:].decode('UTF-8').strip(' '))
+
+    if not 0 <= size <= _MAX_CONTROL_SIZE:
+        raise ValueError(f'Refusing a record of {size} bytes')
+
+    return (state, recv_exact(conn, size))
+
+
+def _is_connected(ticket: Ticket) -> bool:
+    '''
+    Checks, without blocking, that a queued player is still
+    connected. They send nothing while queued, so anything to
+    read means they have left, or broken the protocol.
+
+    :param ticket: Their ticket, whose context is their _Seat.
+    '''
+
+    conn: Connection = ticket.context.conn
+    conn.settimeout(0.0)
+
+    try:
+        conn.recv(1)
+    except (BlockingIOError, TimeoutError):
+        return True
+    except OSError:
+        pass
+    finally:
+        conn.settimeout(None)
+
+    return False
+
+
+def _pipe(source: Connection, sink: Connection) -> None:
+    '''
+    Copies bytes from source to sink until either closes, then
+    closes both, so that the other direction ends too.
+    '''
+
+    try:
+        while True:
+            data: bytes = source.recv(4096)
+            if not data:
+                break
+            sink.sendall(data)
+
+    except OSError:
+        pass
+
+    _close(source, sink)
+
+
+def _close(*conns: Connection) -> None:
+    '''
+    Shuts down and closes every given connection, ignoring those
+    which already are.
+    '''
+
+    for conn in conns:
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        try:
+            conn.close()
+        except OSError:
+            pass
@@ -0,0 +1,573 @@
+'''
+Instrumentation for OOP Stratego. Counters and histograms are
+kept in a Metrics registry, which may be dumped as JSON or as
+Prometheus text, and served over HTTP from a local endpoint.
+
+Every StrategoNetworker records into DEFAULT unless given its own
+registry, so a server's games are aggregated. To serve the GUI's
+metrics, set STRATEGO_METRICS_PORT before running main.py, then
+visit http://127.0.0.1:<port>/metrics (or /metrics.json).
+
+A FrameTracer times what the GUI does, from each input to the
+repaint it causes, and can dump a trace viewable in Perfetto or
+chrome://tracing.
+'''
+
+import bisect
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+# Bucket upper bounds, in seconds, for timings from microseconds
+# (encoding a board) to seconds (waiting for a human)
+TIME_BUCKETS: Tuple[float, ...] = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005,
+                                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+# Bucket upper bounds, in bytes, for message sizes
+SIZE_BUCKETS: Tuple[float, ...] = (16, 64, 128, 256, 512, 1024, 4096, 16384)
+
+
+class Counter:
+    '''
+    A number which only goes up, such as bytes sent.
+    '''
+
+    def __init__(self, name: str, description: str) -> None:
+        '''
+        :param name: The Prometheus metric name.
+        :param description: What is being counted.
+        '''
+
+        self.name: str = name
+        self.description: str = description
+
+        self.__lock: threading.Lock = threading.Lock()
+        self.__value: float = 0
+
+    @property
+    def value(self) -> float:
+        '''
+        :returns: The current count.
+        '''
+
+        return self.__value
+
+    def inc(self, amount: float = 1) -> None:
+        '''
+        Increases the count.
+
+        :param amount: How much to increase it by.
+        '''
+
+        with self.__lock:
+            self.__value += amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''
+        :returns: A JSON-serializable snapshot.
+        '''
+
+        return {'type': 'counter', 'help': self.description, 'value': self.__value}
+
+    def to_prometheus(self) -> List[str]:
+        '''
+        :returns: The lines of Prometheus text for this counter.
+        '''
+
+        return [f'# HELP {self.name} {self.description}',
+                f'# TYPE {self.name} counter',
+                f'{self.name} {self.__value}']
+
+
+class Histogram:
+    '''
+    Counts observations (such as latencies) into buckets, so that
+    their distribution may be seen.
+    '''
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float]) -> None:
+        '''
+        :param name: The Prometheus metric name.
+        :param description: What is being observed.
+        :param buckets: The ascending upper bound of each bucket.
+            A final, unbounded bucket is added.
+        '''
+
+        self.name: str = name
+        self.description: str = description
+        self.buckets: Tuple[float, ...] = tuple(buckets)
+
+        self.__lock: threading.Lock = threading.Lock()
+        self.__counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.__sum: float = 0.0
+        self.__count: int = 0
+
+    @property
+    def count(self) -> int:
+        '''
+        :returns: The number of observations.
+        '''
+
+        return self.__count
+
+    @property
+    def sum(self) -> float:
+        '''
+        :returns: The total of all observations.
+        '''
+
+        return self.__sum
+
+    def observe(self, value: float) -> None:
+        '''
+        Records an observation.
+
+        :param value: The value observed.
+        '''
+
+        index: int = bisect.bisect_left(self.buckets, value)
+
+        with self.__lock:
+            self.__counts[index] += 1
+            self.__sum += value
+            self.__count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        '''
+        :returns: (upper bound, observations at or below it) for
+            every bucket, ending with infinity.
+        '''
+
+        with self.__lock:
+            counts: List[int] = list(self.__counts)
+
+        out: List[Tuple[float, int]] = []
+        total: int = 0
+
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            total += count
+            out.append((bound, total))
+
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''
+        :returns: A JSON-serializable snapshot.
+        '''
+
+        return {'type': 'histogram',
+                'help': self.description,
+                'count': self.__count,
+                'sum': self.__sum,
+                'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                            for bound, count in self.cumulative()}}
+
+    def to_prometheus(self) -> List[str]:
+        '''
+        :returns: The lines of Prometheus text for this histogram.
+        '''
+
+        lines: List[str] = [f'# HELP {self.name} {self.description}',
+                            f'# TYPE {self.name} histogram']
+
+        for bound, count in self.cumulative():
+            le: str = '+Inf' if bound == float('inf') else str(bound)
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {count}')
+
+        lines.append(f'{self.name}_sum {self.__sum}')
+        lines.append(f'{self.name}_count {self.__count}')
+
+        return lines
+
+
+Metric = Union[Counter, Histogram]
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    '''
+    Nearest-rank percentile.
+
+    :param values: The samples.
+    :param q: The percentile, in [0, 100].
+    :returns: The q'th percentile, or 0.0 if there are no
+        samples.
+    '''
+
+    if not values:
+        return 0.0
+
+    ordered: List[float] = sorted(values)
+    rank: int = max(1, math.ceil(q / 100 * len(ordered)))
+
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Metrics:
+    '''
+    A registry of named counters and histograms.
+    '''
+
+    def __init__(self) -> None:
+        self.__lock: threading.Lock = threading.Lock()
+        self.__metrics: Dict[str, Metric] = {}
+
+    def counter(self, name: str, description: str) -> Counter:
+        '''
+        Gets the counter of the given name, creating it if need
+        be.
+
+        :param name: The Prometheus metric name.
+        :param description: What is being counted.
+        :returns: The counter.
+        '''
+
+        with self.__lock:
+            if name not in self.__metrics:
+                self.__metrics[name] = Counter(name, description)
+
+            out: Metric = self.__metrics[name]
+
+        assert isinstance(out, Counter), f'{name} is not a counter'
+        return out
+
+    def histogram(self,
+                  name: str,
+                  description: str,
+                  buckets: Sequence[float] = TIME_BUCKETS) -> Histogram:
+        '''
+        Gets the histogram of the given name, creating it if need
+        be.
+
+        :param name: The Prometheus metric name.
+        :param description: What is being observed.
+        :param buckets: The bucket upper bounds, if created.
+        :returns: The histogram.
+        '''
+
+        with self.__lock:
+            if name not in self.__metrics:
+                self.__metrics[name] = Histogram(name, description, buckets)
+
+            out: Metric = self.__metrics[name]
+
+        assert isinstance(out, Histogram), f'{name} is not a histogram'
+        return out
+
+    def to_json(self) -> str:
+        '''
+        :returns: Every metric, as a JSON object keyed by name.
+        '''
+
+        with self.__lock:
+            metrics: List[Metric] = list(self.__metrics.values())
+
+        return json.dumps({metric.name: metric.to_dict() for metric in metrics}, indent=2)
+
+    def to_prometheus(self) -> str:
+        '''
+        :returns: Every metric, in the Prometheus text format.
+        '''
+
+        with self.__lock:
+            metrics: List[Metric] = list(self.__metrics.values())
+
+        return ''.join(line + '\n' for metric in metrics for line in metric.to_prometheus())
+
+
+# The registry used when none is given
+DEFAULT: Metrics = Metrics()
+
+
+class MetricsServer:
+    '''
+    Serves a registry over HTTP on a background thread: /metrics
+    as Prometheus text, and /metrics.json as JSON.
+    '''
+
+    def __init__(self,
+                 metrics: Optional[Metrics] = None,
+                 ip: str = '127.0.0.1',
+                 port: int = 0) -> None:
+        '''
+        Binds, but does not start serving on, the given address.
+
+        :param metrics: The registry to serve. Defaults to
+            DEFAULT.
+        :param ip: The IPv4 address to serve on.
+        :param port: The port to serve on. 0 picks a free one.
+        '''
+
+        registry: Metrics = metrics if metrics is not None else DEFAULT
+
+        class Handler(BaseHTTPRequestHandler):
+            '''
+            Answers requests for the registry.
+            '''
+
+            def do_GET(self) -> None:
+                '''
+                Serves the registry in the requested format.
+                '''
+
+                if self.path == '/metrics':
+                    body: bytes = registry.to_prometheus().encode('UTF-8')
+                    kind: str = 'text/plain; version=0.0.4'
+
+                elif self.path == '/metrics.json':
+                    body = registry.to_json().encode('UTF-8')
+                    kind = 'application/json'
+
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', kind)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_: Any) -> None:
+                '''
+                Keeps scrapes out of the terminal.
+                '''
+
+        self.__server: ThreadingHTTPServer = ThreadingHTTPServer((ip, port), Handler)
+        self.__server.daemon_threads = True
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        '''
+        :returns: The (ip, port) actually being served on.
+        '''
+
+        ip, port = self.__server.server_address[:2]
+        return (str(ip), int(port))
+
+    def start(self) -> None:
+        '''
+        Starts serving on a background thread.
+        '''
+
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+
+    def shutdown(self) -> None:
+        '''
+        Stops serving.
+        '''
+
+        self.__server.shutdown()
+        self.__server.server_close()
+
+
+class NetworkMetrics:
+    '''
+    The metrics recorded by a StrategoNetworker.
+    '''
+
+    def __init__(self, metrics: Metrics) -> None:
+        '''
+        Gets or creates every networking metric in the given
+        registry.
+
+        :param metrics: The registry to record into.
+        '''
+
+        self.bytes_sent: Counter = metrics.counter(
+            'stratego_bytes_sent_total', 'Bytes sent, including handshakes')
+        self.bytes_received: Counter = metrics.counter(
+            'stratego_bytes_received_total', 'Bytes received, including handshakes')
+
+        self.record_sent_size: Histogram = metrics.histogram(
+            'stratego_record_sent_bytes', 'Size of each record sent', SIZE_BUCKETS)
+        self.record_received_size: Histogram = metrics.histogram(
+            'stratego_record_received_bytes', 'Size of each record received', SIZE_BUCKETS)
+
+        self.encode_time: Histogram = metrics.histogram(
+            'stratego_encode_seconds', 'Time spent encoding each board')
+        self.decode_time: Histogram = metrics.histogram(
+            'stratego_decode_seconds', 'Time spent decoding each board')
+
+        self.compress_time: Histogram = metrics.histogram(
+            'stratego_compress_seconds', 'Time spent compressing each board')
+        self.decompress_time: Histogram = metrics.histogram(
+            'stratego_decompress_seconds', 'Time spent decompressing each board')
+        self.payload_bytes_saved: Counter = metrics.counter(
+            'stratego_payload_bytes_saved_total', 'Bytes saved by compressing boards')
+
+        self.recv_wait: Histogram = metrics.histogram(
+            'stratego_recv_wait_seconds',
+            'Time blocked receiving each record, including waiting for the other player')
+        self.recv_stall: Histogram = metrics.histogram(
+            'stratego_recv_stall_seconds',
+            'Time from the start of each record arriving until all of it has')
+
+        self.rtt: Histogram = metrics.histogram(
+            'stratego_rtt_seconds', 'Round trip time, measured by ping records')
+
+        self.heartbeats_sent: Counter = metrics.counter(
+            'stratego_heartbeats_sent_total', 'Heartbeats sent while otherwise quiet')
+        self.idle_timeouts: Counter = metrics.counter(
+            'stratego_idle_timeouts_total', 'Connections given up on for being silent')
+
+        self.joins_refused: Counter = metrics.counter(
+            'stratego_joins_refused_total', 'Join attempts refused for exceeding the rate limit')
+        self.frames_rejected: Counter = metrics.counter(
+            'stratego_frames_rejected_total', 'Records refused for exceeding the max frame size')
+
+
+class FrameTracer:
+    '''
+    Spans of time, by name, such as handling a click or
+    repainting. An input (a click, a key, a networking result)
+    opens a frame, which the next repaint closes, so frames
+    measure how long input takes to show. Only the most recent
+    spans are kept. Thread-safe.
+    '''
+
+    _CAPACITY: int = 10000
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 metrics: Optional[Metrics] = DEFAULT,
+                 clock: Callable[[], float] = time.perf_counter,
+                 capacity: Optional[int] = None) -> None:
+        '''
+        :param path: Where dump writes by default, if anywhere.
+        :param metrics: Where to also record each span's
+            duration, as a histogram per name, if anywhere.
+        :param clock: The time source, in seconds.
+        :param capacity: The most spans kept. Defaults to
+            _CAPACITY.
+        '''
+
+        self.path: Optional[str] = path
+
+        self.__metrics: Optional[Metrics] = metrics
+        self.__clock: Callable[[], float] = clock
+        self.__lock: threading.Lock = threading.Lock()
+
+        # (name, start, duration), oldest first
+        self.__spans: Deque[Tuple[str, float, float]] = \
+            deque(maxlen=capacity if capacity is not None else type(self)._CAPACITY)
+
+        # When the input awaiting a repaint arrived, if any
+        self.__input: Optional[float] = None
+
+    @property
+    def pending(self) -> bool:
+        '''
+        :returns: Whether an input has yet to be repainted.
+        '''
+
+        return self.__input is not None
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        '''
+        Times the body of a with statement.
+
+        :param name: What is being timed.
+        '''
+
+        start: float = self.__clock()
+
+        try:
+            yield
+
+        finally:
+            self.record(name, start, self.__clock() - start)
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        '''
+        Records a span which has already been timed.
+
+        :param name: What was timed.
+        :param start: When it started, by the clock.
+        :param duration: How long it took, in seconds.
+        '''
+
+        with self.__lock:
+            self.__spans.append((name, start, duration))
+
+        if self.__metrics is not None:
+            self.__metrics.histogram(f'stratego_gui_{name}_seconds',
+                                     f'Time taken by each GUI {name}').observe(duration)
+
+    def input(self) -> None:
+        '''
+        Opens a frame, unless one is already open.
+        '''
+
+        with self.__lock:
+            if self.__input is None:
+                self.__input = self.__clock()
+
+    def repainted(self) -> None:
+        '''
+        Closes the open frame, if any, as shown.
+        '''
+
+        with self.__lock:
+            start: Optional[float] = self.__input
+            self.__input = None
+
+        if start is not None:
+            self.record('frame', start, self.__clock() - start)
+
+    def durations(self, name: str) -> List[float]:
+        '''
+        :param name: What was timed.
+        :returns: The durations of the kept spans of that name,
+            in seconds, oldest first.
+        '''
+
+        with self.__lock:
+            return [duration for n, _, duration in self.__spans if n == name]
+
+    def summary(self, name: str = 'frame') -> str:
+        '''
+        :param name: What was timed.
+        :returns: The median and 95th percentile durations, as
+            text.
+        '''
+
+        durations: List[float] = self.durations(name)
+
+        return (f'{name} p50 {percentile(durations, 50) * 1000:.1f} ms, '
+                f'p95 {percentile(durations, 95) * 1000:.1f} ms (n={len(durations)})')
+
+    def dump(self, path: Optional[str] = None) -> str:
+        '''
+        Writes the kept spans in the Trace Event Format, which
+        Perfetto and chrome://tracing open. Frames get a track of
+        their own, since they overlap the other spans.
+
+        :param path: Where to write. Defaults to self.path.
+        :returns: Where it was written.
+        :raises ValueError: If there is nowhere to write.
+        :raises OSError: If it cannot be written.
+        '''
+
+        path = path if path is not None else self.path
+        if path is None:
+            raise ValueError('No trace file given')
+
+        with self.__lock:
+            spans: List[Tuple[str, float, float]] = list(self.__spans)
+
+        events: List[Dict[str, Any]] = [
+            {'name': name, 'ph': 'X', 'pid': 0, 'tid': 1 if name == 'frame' else 0,
+             'ts': start * 1e6, 'dur': duration * 1e6}
+            for name, start, duration in spans]
+
+        with open(path, 'w', encoding='UTF-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+        return path
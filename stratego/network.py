@@ -4,11 +4,133 @@ from GUI to GUI via JSON. This could take the form of a
 singleton API handler wrapper class.
 '''
 
-from typing import Tuple, Optional
-import pickle
+from collections import deque
+from typing import Callable, Deque, Generic, List, Literal, Sequence, Tuple, Optional, TypeVar
+import queue
 import socket
 import random
+import secrets
+import struct
+import threading
+import time
 from stratego.board import Board
+from stratego.codec import CODEC_NAMES, Codec, make_codec, negotiate
+from stratego.metrics import DEFAULT, Metrics, NetworkMetrics
+from stratego.ratelimit import RateLimiter, peer_key
+from stratego.transport import (Address, Connection, Listener, TCPTransport, Transport,
+                                recv_exact)
+
+
+T = TypeVar('T')
+
+# Called with the (state, encoded board) of every record sent or
+# received
+Observer = Callable[[str, bytes], None]
+
+
+class NetworkTask(Generic[T]):
+    '''
+    Runs a single blocking networking call on a background
+    thread, so that the caller's event loop (IE the GUI) is
+    never frozen while waiting on the other player. The result
+    of the call, or the exception it raised, is delivered via a
+    thread-safe queue which the caller polls.
+    '''
+
+    def __init__(self, call: Callable[[], T]) -> None:
+        '''
+        Prepares, but does NOT start, the task.
+
+        :param call: The blocking call to run.
+        '''
+
+        self.__call: Callable[[], T] = call
+        self.__results: 'queue.Queue[Tuple[Optional[T], Optional[Exception]]]' = \
+            queue.Queue(maxsize=1)
+        self.__outcome: Optional[Tuple[Optional[T], Optional[Exception]]] = None
+        self.__cancelled: bool = False
+        self.__thread: threading.Thread = threading.Thread(target=self.__run,
+                                                           daemon=True)
+
+    def __run(self) -> None:
+        '''
+        The body of the background thread.
+        '''
+
+        try:
+            self.__results.put((self.__call(), None))
+        except Exception as e:
+            self.__results.put((None, e))
+
+    def start(self) -> None:
+        '''
+        Starts running the call in the background.
+        '''
+
+        self.__thread.start()
+
+    def done(self) -> bool:
+        '''
+        Polls the task. This never blocks.
+
+        :returns: True if the call has finished and its result
+            may be fetched.
+        '''
+
+        if self.__outcome is None:
+            try:
+                self.__outcome = self.__results.get_nowait()
+            except queue.Empty:
+                return False
+
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        '''
+        Blocks until the call has finished. This is for callers
+        with no event loop to poll from.
+
+        :param timeout: The most seconds to wait.
+        :returns: True if the call has finished.
+        '''
+
+        self.__thread.join(timeout)
+        return self.done()
+
+    def result(self) -> T:
+        '''
+        Returns the result of a finished call, re-raising any
+        exception which it raised.
+
+        :returns: The return value of the call.
+        '''
+
+        assert self.done(), 'Cannot fetch the result of an unfinished task'
+        assert self.__outcome is not None
+
+        value, error = self.__outcome
+
+        if error is not None:
+            raise error
+
+        return value  # type: ignore[return-value]
+
+    def cancel(self) -> None:
+        '''
+        Marks this task as cancelled. The call itself cannot be
+        interrupted from here; Use StrategoNetworker.cancel to
+        unblock it.
+        '''
+
+        self.__cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        '''
+        :returns: Whether or not this task has been cancelled.
+        '''
+
+        return self.__cancelled
 
 
 class StrategoNetworker:
@@ -19,7 +141,25 @@ class StrategoNetworker:
 
     __SIZE_STR_MAX_SIZE: int = 16
     __STATE_STR_MAX_SIZE: int = 8
-    __PASSWORD_SIZE: int = 4
+    __SEQ_STR_MAX_SIZE: int = 16
+    __IP_STR_MAX_SIZE: int = 16
+    __PORT_STR_MAX_SIZE: int = 8
+    PASSWORD_SIZE: int = 4
+    __CODEC_STR_MAX_SIZE: int = 16
+    __TOKEN_STR_MAX_SIZE: int = 16
+    __RECORD_HEADER_SIZE: int = __STATE_STR_MAX_SIZE + __SEQ_STR_MAX_SIZE + __SIZE_STR_MAX_SIZE
+    # Sequence numbers, state, resume token, then the sizes of
+    # the latest, last sent and last received boards
+    __SESSION_FORMAT: str = '!QQ8s16sHHH'
+    _LOG_SIZE: int = 64
+    _PING_EVERY: int = 4
+    _HEARTBEAT_INTERVAL: Optional[float] = 5.0
+    _IDLE_TIMEOUT: Optional[float] = 30.0
+    _CODECS: Tuple[str, ...] = CODEC_NAMES
+    _MAX_FRAME_SIZE: int = 1 << 16
+    _JOIN_RATE: float = 1.0
+    _JOIN_BURST: float = 5.0
+    _MAX_REDIRECTS: int = 3
     __INSTANCE: Optional['StrategoNetworker'] = None
 
     @staticmethod
@@ -61,20 +201,304 @@ class StrategoNetworker:
             del cls.__INSTANCE
             cls.__INSTANCE = None
 
-    def __init__(self) -> None:
+    def __init__(self,
+                 transport: Optional[Transport] = None,
+                 metrics: Optional[Metrics] = None) -> None:
         '''
         Create infrastructure, but do NOT open socket yet.
+
+        :param transport: How to connect. Defaults to TCP.
+        :param metrics: Where to record metrics. Defaults to
+            stratego.metrics.DEFAULT.
         '''
 
         assert type(self).__INSTANCE is None, 'Cannot re-instantiate singleton'
 
+        self.__setup(transport, metrics)
+
+    @classmethod
+    def detached(cls,
+                 transport: Optional[Transport] = None,
+                 metrics: Optional[Metrics] = None) -> 'StrategoNetworker':
+        '''
+        Creates a networker which is NOT the singleton instance.
+        This is for servers, which hold one connection per game
+        in a single process.
+
+        :param transport: How to connect. Defaults to TCP.
+        :param metrics: Where to record metrics. Defaults to
+            stratego.metrics.DEFAULT.
+        :returns: A new, unconnected networker.
+        '''
+
+        out: 'StrategoNetworker' = cls.__new__(cls)
+        out.__setup(transport, metrics)
+
+        return out
+
+    def __setup(self, transport: Optional[Transport], metrics: Optional[Metrics]) -> None:
+        '''
+        Create infrastructure, but do NOT open socket yet.
+        '''
+
+        self.__transport: Transport = transport if transport is not None else TCPTransport()
+        self.__metrics: Metrics = metrics if metrics is not None else DEFAULT
+        self.__stats: NetworkMetrics = NetworkMetrics(self.__metrics)
+
         self.__is_connected: bool = False
+        self.__is_cancelled: bool = False
 
-        self.__host_socket: Optional[socket.socket] = None
-        self.__client_socket: Optional[socket.socket] = None
+        self.__host_socket: Optional[Listener] = None
+        self.__client_socket: Optional[Connection] = None
+        self.__host_address: Optional[Address] = None
+        self.__redirected_to: Optional[Address] = None
 
         self.__password: str = ''
 
+        self.__observers: List[Observer] = []
+
+        # Liveness: We send a heartbeat whenever we have been
+        # quiet this long, and give up on the other player if
+        # they have been quiet for the idle timeout
+        self.__heartbeat_interval: Optional[float] = type(self)._HEARTBEAT_INTERVAL
+        self.__idle_timeout: Optional[float] = type(self)._IDLE_TIMEOUT
+        self.__heartbeat_stop: Optional[threading.Event] = None
+
+        # Heartbeats are sent from their own thread, so whole
+        # records are written under this lock
+        self.__send_lock: threading.RLock = threading.RLock()
+        self.__last_send: float = 0.0
+
+        # Board payloads are compressed by whichever codec was
+        # agreed when connecting
+        self.__codecs: Tuple[str, ...] = type(self)._CODECS
+        self.__codec: Codec = make_codec('raw')
+
+        # Join attempts are limited per address, so a flood of
+        # wrong passwords cannot keep the host busy
+        self.__join_limiter: RateLimiter = RateLimiter(type(self)._JOIN_RATE,
+                                                       type(self)._JOIN_BURST)
+
+        self.__reset_session()
+
+    def __reset_session(self) -> None:
+        '''
+        Forgets all sequence numbers and logged records, so that
+        the next connection starts a brand new game instead of
+        resuming this one.
+        '''
+
+        # The secret a joiner must know to resume this game,
+        # chosen by the host when they first join
+        self.__token: str = ''
+
+        # Every board record we send is numbered, starting at 1
+        self.__sent_seq: int = 0
+        self.__received_seq: int = 0
+
+        # The most recent records we sent, as (seq, record), for
+        # replaying to a reconnecting player
+        self.__log: Deque[Tuple[int, bytes]] = deque(maxlen=type(self)._LOG_SIZE)
+
+        # The most recent (state, encoded board) either sent or
+        # received, for when a player is too far behind to replay
+        self.__latest: Optional[Tuple[str, bytes]] = None
+
+        # The last encoded board in each direction, which the
+        # next one is compressed against
+        self.__last_sent_payload: Optional[bytes] = None
+        self.__last_received_payload: Optional[bytes] = None
+
+    @property
+    def last_sent_seq(self) -> int:
+        '''
+        :returns: The sequence number of the last record sent
+            this game, or 0 if none.
+        '''
+
+        return self.__sent_seq
+
+    @property
+    def last_received_seq(self) -> int:
+        '''
+        :returns: The sequence number of the last record
+            received this game, or 0 if none.
+        '''
+
+        return self.__received_seq
+
+    @property
+    def latest(self) -> Optional[Tuple[Board, str]]:
+        '''
+        :returns: The most recent board and state either sent
+            or received this game, or None if there was none.
+        '''
+
+        if self.__latest is None:
+            return None
+
+        state, payload = self.__latest
+        return (Board.decode(payload), state)
+
+    def export_session(self) -> bytes:
+        '''
+        Packs this game's session, so that it can be parked
+        while no one is connected, and resumed, possibly by
+        another networker, with restore_session. The log is
+        left out, so a player who missed records is sent a
+        snapshot on resuming.
+
+        :returns: The sequence numbers and resume token, then
+            the latest board and the last one in each direction.
+        :raises ValueError: If no board was sent or received.
+        '''
+
+        if self.__latest is None:
+            raise ValueError('There is no game to export')
+
+        state, latest = self.__latest
+        payloads: Tuple[bytes, ...] = (latest,
+                                       self.__last_sent_payload or b'',
+                                       self.__last_received_payload or b'')
+
+        return struct.pack(type(self).__SESSION_FORMAT,
+                           self.__sent_seq,
+                           self.__received_seq,
+                           state.encode('UTF-8'),
+                           self.__token.encode('UTF-8'),
+                           *(len(payload) for payload in payloads)) + b''.join(payloads)
+
+    def restore_session(self, data: bytes) -> None:
+        '''
+        Replaces this networker's session with one packed by
+        export_session. Call after host_game, but before the
+        other player connects, and the game resumes when they
+        do, so long as they know its resume token.
+
+        :param data: The packed session.
+        :raises ValueError: If the data is malformed.
+        '''
+
+        header: int = struct.calcsize(type(self).__SESSION_FORMAT)
+        if len(data) < header:
+            raise ValueError('Truncated session')
+
+        sent_seq, received_seq, state, token, *sizes = \
+            struct.unpack(type(self).__SESSION_FORMAT, data[:header])
+
+        if header + sum(sizes) != len(data):
+            raise ValueError('Malformed session')
+
+        payloads: List[bytes] = []
+        offset: int = header
+        for size in sizes:
+            payloads.append(data[offset:offset + size])
+            offset += size
+
+        self.__reset_session()
+
+        self.__sent_seq = sent_seq
+        self.__received_seq = received_seq
+        self.__token = token.rstrip(b'\0').decode('UTF-8')
+        self.__latest = (state.rstrip(b'\0').decode('UTF-8'), payloads[0])
+        self.__last_sent_payload = payloads[1] or None
+        self.__last_received_payload = payloads[2] or None
+
+    def set_timeouts(self,
+                     heartbeat_interval: Optional[float],
+                     idle_timeout: Optional[float]) -> None:
+        '''
+        Configures liveness checking for future connections.
+        While connected, a heartbeat is sent whenever nothing
+        else has been for heartbeat_interval seconds, even while
+        a human is thinking. Receiving (or waiting for a joiner,
+        if given a timeout) raises TimeoutError once the other
+        player has been silent for idle_timeout seconds, so dead
+        games are released instead of hanging forever.
+
+        :param heartbeat_interval: Seconds between heartbeats,
+            or None for none.
+        :param idle_timeout: Seconds of silence before giving
+            up, or None to wait forever.
+        '''
+
+        if heartbeat_interval is not None and idle_timeout is not None:
+            assert heartbeat_interval < idle_timeout, 'Heartbeats must beat the idle timeout'
+
+        self.__heartbeat_interval = heartbeat_interval
+        self.__idle_timeout = idle_timeout
+
+    def set_codecs(self, names: Sequence[str]) -> None:
+        '''
+        Configures which codecs future connections may use for
+        board payloads. A joiner offers these, and a host picks
+        the first one offered which it also allows, falling back
+        to 'raw'.
+
+        :param names: Names from stratego.codec.CODEC_NAMES,
+            most preferred first.
+        :raises ValueError: If a name is unknown, or the names
+            are too long to offer.
+        '''
+
+        for name in names:
+            make_codec(name)
+
+        if len(','.join(names).encode()) > type(self).__CODEC_STR_MAX_SIZE:
+            raise ValueError(f'Codecs {names} do not fit in '
+                             f'{type(self).__CODEC_STR_MAX_SIZE} bytes')
+
+        self.__codecs = tuple(names)
+
+    @property
+    def codec(self) -> str:
+        '''
+        :returns: The name of the codec agreed for the current
+            (or last) connection.
+        '''
+
+        return self.__codec.name
+
+    @property
+    def metrics(self) -> Metrics:
+        '''
+        :returns: The registry this records metrics into.
+        '''
+
+        return self.__metrics
+
+    @property
+    def host_address(self) -> Optional[Address]:
+        '''
+        :returns: The (ip, port) which host_game is listening
+            on, or None if not hosting. This differs from the
+            requested address if port 0 was requested.
+        '''
+
+        return self.__host_address
+
+    def add_observer(self, observer: Observer) -> None:
+        '''
+        Registers a callback to be told about every move, for
+        example a stratego.spectate.SpectatorHub's publish. It is
+        handed the already-encoded board, so observing costs no
+        extra serialization.
+
+        :param observer: Called with the (state, encoded board)
+            of every new record sent or received.
+        '''
+
+        self.__observers.append(observer)
+
+    def remove_observer(self, observer: Observer) -> None:
+        '''
+        Unregisters a callback added with add_observer.
+
+        :param observer: The callback to remove.
+        '''
+
+        self.__observers.remove(observer)
+
     def host_game(self, ip: str, port: int) -> str:
         '''
         Opens a game on the given IPv4 and port.
@@ -85,77 +509,258 @@ class StrategoNetworker:
         :returns: The join password (randomly generated).
         '''
 
-        self.__host_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.__host_socket.bind((ip, port))
+        self.__is_cancelled = False
+        self.__reset_session()
+
+        # Listen now, so that early joiners are queued
+        self.__host_socket, self.__host_address = self.__transport.listen((ip, port))
 
         legal_chars: str = '0123456789ABCDEF'
         self.__password = ''
 
-        for _ in range(type(self).__PASSWORD_SIZE):
+        for _ in range(type(self).PASSWORD_SIZE):
             self.__password += random.choice(legal_chars)
 
         return self.__password
 
-    def host_wait_for_join(self) -> None:
+    def host_wait_for_join(self, timeout: Optional[float] = None) -> None:
         '''
         Waits until another player joins. When they join, asks
-        for a password. If they get it wrong, goes back to
-        waiting.
+        for a password. If they get it wrong, or send a
+        malformed handshake, goes back to waiting. Addresses which try to join more than
+        _JOIN_BURST times at once (or _JOIN_RATE per second
+        after) are hung up on unasked. Returns early if
+        cancelled from another thread.
+        If a game is in progress (IE after disconnect()), this
+        waits for the other player to reconnect and resumes it.
+
+        :param timeout: The most seconds to wait, or None to
+            wait forever.
+        :raises TimeoutError: If no one joined in time.
         '''
 
         assert self.__host_socket is not None
 
-        while not self.__is_connected:
-            try:
-                self.__host_socket.listen(1)
-                self.__client_socket, _ = self.__host_socket.accept()
+        # Held locally, since cancel() may reset the member
+        host_socket: Listener = self.__host_socket
+        deadline: Optional[float] = None if timeout is None else time.monotonic() + timeout
+
+        while not self.__is_connected and not self.__is_cancelled:
+            remaining: Optional[float] = None
 
-                self.__is_connected = True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError('No one joined in time')
 
-                s: int = type(self).__PASSWORD_SIZE
-                b: bytes = self.__client_socket.recv(s)
+            host_socket.settimeout(remaining)
 
-                password: str = b.decode('UTF-8')
+            try:
+                conn, peer = host_socket.accept()
 
-                if password != self.__password:
-                    self.__send_game_state('HALT')
+                if not self.__join_limiter.allow(peer_key(peer)):
+                    self.__stats.joins_refused.inc()
+                    conn.close()
+                    continue
 
-                    print('Failed password attempt.')
-                    self.__is_connected = False
+                self.host_accept(conn)
 
-                else:
-                    self.__send_game_state('GOOD')
+            except TimeoutError:
+                continue
 
             except OSError as e:
                 print(f'Caught OSError {e}')
 
+            except ValueError as e:
+                # A malformed handshake only ends that joiner's
+                # attempt, not our wait
+                print(f'Caught ValueError {e}')
+
+    def host_accept(self, conn: Connection, password: Optional[str] = None) -> bool:
+        '''
+        Performs the host's side of the join handshake on an
+        already-accepted connection: Asks for the password, then
+        reports whether it was correct. This allows a server to
+        accept on a single socket and hand each connection to
+        its own networker. Then exchanges sequence numbers with
+        the joiner, replaying any records it missed. Once a game
+        has begun, only a joiner who knows its resume token,
+        given to whoever joined first, may resume it.
+
+        :param conn: The newly accepted connection.
+        :param password: The password to expect. Defaults to
+            the one generated by host_game.
+        :returns: True if the other player is now connected.
+        :raises ValueError: If the handshake was malformed, or
+            the joiner did not know the resume token.
+        '''
+
+        self.__client_socket = conn
+        self.__is_connected = True
+
+        try:
+            if self.__idle_timeout is not None:
+                conn.settimeout(self.__idle_timeout)
+
+            s: int = type(self).PASSWORD_SIZE
+            b: bytes = self.__receive(s)
+
+            received: str = b.decode('UTF-8')
+            expected: str = self.__password if password is None else password
+
+            if received != expected:
+                self.__send_game_state('HALT')
+
+                print('Failed password attempt.')
+                self.__drop_connection()
+                return False
+
+            self.__send_game_state('GOOD')
+
+            peer_seq: int = int(self.__recv_field(type(self).__SEQ_STR_MAX_SIZE))
+            offered: List[str] = self.__recv_field(type(self).__CODEC_STR_MAX_SIZE).split(',')
+            chosen: str = negotiate(offered, self.__codecs)
+            token: str = self.__recv_field(type(self).__TOKEN_STR_MAX_SIZE)
+
+            if not self.__token:
+                self.__token = secrets.token_hex(type(self).__TOKEN_STR_MAX_SIZE // 2)
+            elif not secrets.compare_digest(token, self.__token):
+                raise ValueError('The joiner does not know the resume token')
+
+            self.__send_bytes(self.__pad(str(self.__received_seq), type(self).__SEQ_STR_MAX_SIZE)
+                              + self.__pad(chosen, type(self).__CODEC_STR_MAX_SIZE)
+                              + self.__pad(self.__token, type(self).__TOKEN_STR_MAX_SIZE))
+            self.__use_codec(chosen)
+            self.__replay(peer_seq)
+
+        except (ValueError, OSError):
+            # Including joiners who connect, then say nothing
+            self.__drop_connection()
+            raise
+
+        self.__start_heartbeat()
+        return True
+
     def join_game(self, ip: str, port: int, password: str) -> int:
         '''
-        Attempts to join the game at the given IPv4 and port.
+        Attempts to join the game at the given IPv4 and port. If
+        a game is in progress (IE after disconnect()), resumes
+        it: Records missed by either player are replayed.
 
         :param ip: The IPv4 address to attempt to connect to.
         :param port: The port to attempt to connect to.
         :param password: The join password from the host.
         :returns: 0 on success, 1 on socket failure, 2 on
             password failure.
+        :raises ConnectionError: If the host hung up during the
+            handshake, as it does on resuming a game whose
+            resume token this networker was not given.
         '''
 
         self.__is_connected = False
+        self.__is_cancelled = False
 
-        # Connect to server
-        try:
-            self.__client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.__client_socket.connect((ip, port))
-        except socket.error as e:
-            print(f'Caught socket error {e}')
-            return 1
+        address: Address = (ip, port)
+
+        # Sharded servers (see stratego.cluster) may send us to
+        # the worker which holds our game
+        for _ in range(type(self)._MAX_REDIRECTS + 1):
+            try:
+                self.__client_socket = self.__transport.connect(address)
+            except socket.error as e:
+                print(f'Caught socket error {e}')
+                return 1
+
+            if self.__idle_timeout is not None:
+                self.__client_socket.settimeout(self.__idle_timeout)
+
+            self.__is_connected = True
+            result: int = self.__join_handshake(password)
+
+            if result != 3:
+                return result
+
+            assert self.__redirected_to is not None
+            address = self.__redirected_to
+
+        print('Caught too many redirects')
+        return 1
 
-        # Send password
+    def join_any(self, ip: str, port: int, rating: int = 1500) -> Literal['RED', 'BLUE']:
+        '''
+        Joins the matchmaking queue at the given IPv4 and port
+        (see stratego.matchmaking), instead of a particular
+        game. Hangs until matched with another player, then
+        plays them over the same connection: Whoever waited
+        longer hosts, as RED.
+
+        :param ip: The IPv4 address of the match server.
+        :param port: The port of the match server.
+        :param rating: This player's rating.
+        :returns: The color this player plays as.
+        :raises TimeoutError: If no opponent was found in time.
+        :raises ValueError: If the server misbehaved, or the
+            join was refused.
+        '''
+
+        self.__is_cancelled = False
+        self.__reset_session()
+
+        self.__client_socket = self.__transport.connect((ip, port))
         self.__is_connected = True
-        self.__client_socket.send(bytes(password, 'UTF-8'))
+
+        if self.__idle_timeout is not None:
+            self.__client_socket.settimeout(self.__idle_timeout)
+
+        self.__send_record('QUEUE', 0, str(rating).encode('UTF-8'))
+
+        while True:
+            state, _, payload = self.__recv_record()
+
+            if self.__handle_control(state, payload):
+                continue
+
+            if state == 'HOST':
+                if not self.host_accept(self.__client_socket, payload.decode('UTF-8')):
+                    raise ValueError('The matched player sent the wrong password')
+                return 'RED'
+
+            if state == 'JOIN':
+                if self.__join_handshake(payload.decode('UTF-8')) != 0:
+                    raise ValueError('The matched player refused the password')
+                return 'BLUE'
+
+            self.__drop_connection()
+
+            if state == 'HALT':
+                raise TimeoutError('No opponent was found in time')
+
+            raise ValueError(f'Expected a match, but received {state}')
+
+    def __join_handshake(self, password: str) -> int:
+        '''
+        Performs the joiner's side of the join handshake over
+        the existing connection: Sends the password, then
+        exchanges sequence numbers and the resume token with the
+        host, replaying any records it missed.
+
+        :param password: The join password from the host.
+        :returns: 0 on success, 2 on password failure, 3 if
+            sent elsewhere (to __redirected_to).
+        '''
+
+        assert self.__client_socket is not None
+
+        self.__send_bytes(bytes(password, 'UTF-8'))
 
         state: str = self.__recv_game_state()
 
+        if state == 'MOVED':
+            self.__redirected_to = (self.__recv_field(type(self).__IP_STR_MAX_SIZE),
+                                    int(self.__recv_field(type(self).__PORT_STR_MAX_SIZE)))
+            self.__drop_connection()
+            return 3
+
         if state != 'GOOD':
             self.__client_socket.close()
             self.__client_socket = None
@@ -164,112 +769,599 @@ class StrategoNetworker:
 
         self.__is_connected = True
 
+        self.__send_bytes(self.__pad(str(self.__received_seq), type(self).__SEQ_STR_MAX_SIZE)
+                          + self.__pad(','.join(self.__codecs), type(self).__CODEC_STR_MAX_SIZE)
+                          + self.__pad(self.__token, type(self).__TOKEN_STR_MAX_SIZE))
+
+        peer_seq: int = int(self.__recv_field(type(self).__SEQ_STR_MAX_SIZE))
+        self.__use_codec(self.__recv_field(type(self).__CODEC_STR_MAX_SIZE))
+        self.__token = self.__recv_field(type(self).__TOKEN_STR_MAX_SIZE)
+        self.__replay(peer_seq)
+
+        self.__start_heartbeat()
+        return 0
+
+    def watch_game(self, ip: str, port: int) -> int:
+        '''
+        Connects to a stratego.spectate.SpectatorHub to watch a
+        game. No password is needed. Afterwards, recv_game
+        returns each move as it is played, and raises
+        ConnectionError once the game is over. Nothing may be
+        sent.
+
+        :param ip: The IPv4 address of the hub.
+        :param port: The port of the hub.
+        :returns: 0 on success, 1 on socket failure.
+        '''
+
+        self.__reset_session()
+        self.__is_connected = False
+        self.__is_cancelled = False
+
+        # Hubs relay boards uncompressed, whatever we last played
+        self.__use_codec('raw')
+
+        try:
+            self.__client_socket = self.__transport.connect((ip, port))
+        except socket.error as e:
+            print(f'Caught socket error {e}')
+            return 1
+
+        self.__is_connected = True
+
         return 0
 
+    def rematch(self) -> bool:
+        '''
+        Offers the other player a rematch over the existing
+        connection, then waits for them to either offer one too
+        or leave. Since both players offer at once, agreeing
+        takes a single round trip: There is no new password
+        handshake.
+
+        :returns: True if both players want a rematch, in which
+            case a new game has begun. False if they left, or
+            the connection was lost.
+        '''
+
+        try:
+            self.__send_record('AGAIN', 0, b'')
+        except ConnectionError:
+            # They may have left already, which their answer says
+            pass
+
+        state: str = ''
+        seq: int = -1
+        payload: bytes = b''
+
+        try:
+            # Only control records may be answers, and not pings
+            while seq != 0 or self.__handle_control(state, payload):
+                state, seq, payload = self.__recv_record()
+
+        except ConnectionError:
+            return False
+
+        if state != 'AGAIN':
+            return False
+
+        # Still the same two players
+        token: str = self.__token
+        self.__reset_session()
+        self.__token = token
+
+        return True
+
     def close_game(self) -> None:
         '''
-        Closes the connection.
+        Closes the connection, telling the other player that we
+        have left. The game cannot be resumed afterwards.
         '''
 
+        self.__stop_heartbeat()
+
         try:
-            if self.__client_socket is not None:
-                self.__send_game_state('HALT')
-                self.__client_socket.close()
+            if self.__client_socket is not None and self.__is_connected:
+                self.__send_record('HALT', 0, b'')
         except socket.error:
             pass
 
+        self.__drop_connection()
+        self.__reset_session()
+
+    def disconnect(self) -> None:
+        '''
+        Drops a (probably broken) connection WITHOUT ending the
+        game, so that it may be resumed by calling join_game or
+        host_wait_for_join again.
+        '''
+
+        self.__drop_connection()
+
+    def cancel(self) -> None:
+        '''
+        Aborts any blocking operation (waiting for a player to
+        join, or for their move) which is in progress on another
+        thread, by shutting down the underlying sockets. The
+        aborted call will return early or raise OSError.
+        '''
+
+        self.__is_cancelled = True
+        self.__stop_heartbeat()
+
+        for sock in (self.__host_socket, self.__client_socket):
+            if sock is None:
+                continue
+
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+        self.__host_socket = None
+        self.__client_socket = None
+        self.__is_connected = False
+
     def send_game(self, board: Board, state: str) -> None:
         '''
-        Send the board and state.
+        Sends the board and state to the other player, and tells
+        observers. Once this is called, the move is part of the
+        game: If the connection drops, even partway through, it
+        is resent on resuming.
+
+        :param board: The board after our move.
+        :param state: The game state after our move.
         '''
 
-        self.__send_board(board)
-        self.__send_game_state(state)
+        started: float = time.perf_counter()
+        payload: bytes = board.encode()
+        self.__stats.encode_time.observe(time.perf_counter() - started)
+
+        # Before sending, so that a move lost with the connection
+        # is still in any snapshot
+        self.__latest = (state, payload)
+        self.__send_numbered(state, payload)
+
+        self.__notify(state, payload)
 
     def recv_game(self) -> Tuple[Board, str]:
         '''
-        Read the board and state from the socket.
+        Read the board and state from the socket. Records which
+        were already received (IE replayed on resume) are
+        skipped.
+
+        :returns: The board and game state.
         '''
 
-        out_board: Board = self.__recv_board()
-        out_state: str = self.__recv_game_state()
+        state, payload = self.__recv_numbered()
+
+        if state == 'SETUP':
+            raise ValueError('Expected a board, but received a setup')
 
-        return (out_board, out_state)
+        self.__latest = (state, payload)
+
+        started: float = time.perf_counter()
+        board: Board = Board.decode(payload)
+        self.__stats.decode_time.observe(time.perf_counter() - started)
+
+        self.__notify(state, payload)
+
+        return (board, state)
+
+    def send_setup(self, board: Board, color: Literal['RED', 'BLUE']) -> None:
+        '''
+        Sends only our 40 placements, as a numbered SETUP record,
+        rather than the whole board. Setups are not passed to
+        observers, since they are not whole boards.
+
+        :param board: The board holding our setup.
+        :param color: Our color.
+        '''
+
+        self.__send_numbered('SETUP', board.encode_setup(color))
+
+    def recv_setup(self) -> bytes:
+        '''
+        Receives the other player's setup.
+
+        :returns: Their placements, for Board.place_setup.
+        :raises ValueError: If a board arrived instead.
+        '''
+
+        state, payload = self.__recv_numbered()
+
+        if state != 'SETUP':
+            raise ValueError(f'Expected a setup, but received {state}')
+
+        return payload
+
+    @classmethod
+    def make_record(cls, state: str, seq: int, payload: bytes) -> bytes:
+        '''
+        Builds a record: The state, the sequence number (0 for
+        unnumbered control records), and the payload size as
+        fixed-width fields, followed by the payload itself.
+
+        :param state: The game state.
+        :param seq: The sequence number.
+        :param payload: The encoded board, if any.
+        :returns: The whole record, ready to be sent.
+        '''
+
+        return (cls.__pad(state, cls.__STATE_STR_MAX_SIZE)
+                + cls.__pad(str(seq), cls.__SEQ_STR_MAX_SIZE)
+                + cls.__pad(str(len(payload)), cls.__SIZE_STR_MAX_SIZE)
+                + payload)
 
     # Helper functions
 
-    def __send_board(self, to_send: Board) -> None:
+    @classmethod
+    def redirect(cls, conn: Connection, address: Address) -> None:
         '''
-        Serializes and sends the given board over the existing
-        connection.
+        Answers a join attempt, whose password has already been
+        read, by sending the joiner to another address. Their
+        join_game then retries there. This lets sharded servers
+        hand players to the worker which holds their game.
 
-        :param to_send: The board to send.
+        :param conn: The joiner's connection.
+        :param address: The (ip, port) to send them to.
         '''
 
-        assert self.__is_connected, 'Cannot send before connecting'
-        assert self.__client_socket, 'Cannot send before connecting'
+        conn.sendall(cls.__pad('MOVED', cls.__STATE_STR_MAX_SIZE)
+                     + cls.__pad(address[0], cls.__IP_STR_MAX_SIZE)
+                     + cls.__pad(str(address[1]), cls.__PORT_STR_MAX_SIZE))
 
-        serialized: bytes = pickle.dumps(to_send)
+    def __send_numbered(self, state: str, payload: bytes) -> None:
+        '''
+        Compresses the payload against the last one sent, numbers
+        it, and logs the record before writing any of it. Every
+        _PING_EVERY'th record (unless terminal) is preceded by a
+        ping, in the same write.
+        '''
 
-        # Get size in bytes
-        size: int = len(serialized)
+        started: float = time.perf_counter()
+        compressed: bytes = self.__codec.compress(payload, self.__last_sent_payload)
+        self.__stats.compress_time.observe(time.perf_counter() - started)
+        self.__stats.payload_bytes_saved.inc(len(payload) - len(compressed))
 
-        # Prepare str of length type(self).__SIZE_STR_MAX_SIZE of size
-        # padded on RIGHT side w/ SPACES
-        size_str: str = str(size)
-        size_str += (' ' * (type(self).__SIZE_STR_MAX_SIZE - len(size_str)))
+        self.__sent_seq += 1
+        record: bytes = self.make_record(state, self.__sent_seq, compressed)
 
-        # Send size
-        self.__client_socket.send(bytes(size_str, 'UTF-8'))
+        self.__log.append((self.__sent_seq, record))
+        self.__last_sent_payload = payload
+        self.__stats.record_sent_size.observe(len(record))
 
-        # Send board
-        self.__client_socket.send(serialized)
+        every: int = type(self)._PING_EVERY
+        if every and self.__sent_seq % every == 0 and not self.is_terminal_state(state):
+            ping: bytes = struct.pack('!d', time.perf_counter())
+            self.__send_bytes(self.make_record('PING', 0, ping) + record)
 
-    def __recv_board(self) -> Board:
+        else:
+            self.__send_bytes(record)
+
+    def __recv_numbered(self) -> Tuple[str, bytes]:
         '''
-        Receives and returns a board from the existing
-        connection. Hangs until it receives the board.
+        Receives the next numbered record, answering control
+        records on the way, and skipping records which were
+        already received (IE replayed on resume).
 
-        :returns: The received board.
+        :returns: The state and decompressed payload.
+        :raises ConnectionError: If the other player left.
         '''
 
-        assert self.__is_connected, 'Cannot recv before connecting'
-        assert self.__client_socket, 'Cannot recv before connecting'
+        while True:
+            state, seq, payload = self.__recv_record()
 
-        size_str: str = self.__client_socket.recv(type(self).__SIZE_STR_MAX_SIZE).decode('UTF-8')
+            if seq == 0 and self.__handle_control(state, payload):
+                continue
 
-        serialized: bytes = self.__client_socket.recv(int(size_str))
+            if seq == 0 and state == 'HALT':
+                raise ConnectionError('The other player left the game')
 
-        out: Board = pickle.loads(serialized)
+            if seq <= self.__received_seq:
+                continue
 
-        return out
+            # Only the record after the last one has it as its
+            # dictionary. Snapshots never do, even if they happen
+            # to follow it, and carry their real state ahead of
+            # the board
+            follows: bool = seq == self.__received_seq + 1
 
-    def __send_game_state(self, state: str) -> None:
+            if state == 'SNAP':
+                size: int = type(self).__STATE_STR_MAX_SIZE
+                state = payload[:size].decode('UTF-8').rstrip()
+                payload = payload[size:]
+                follows = False
+
+            started: float = time.perf_counter()
+            payload = self.__codec.decompress(payload,
+                                              self.__last_received_payload if follows else None)
+            self.__stats.decompress_time.observe(time.perf_counter() - started)
+
+            self.__received_seq = seq
+            self.__last_received_payload = payload
+
+            return (state, payload)
+
+    def __handle_control(self, state: str, payload: bytes) -> bool:
         '''
-        Sends the given game state.
+        Answers pings, measures the round trip time from the
+        answers to our own, and skips heartbeats.
 
-        :param state: The current game state.
+        :returns: True if the record was a ping, an answer or a
+            heartbeat.
+        :raises ValueError: If an answer is malformed.
+        '''
+
+        if state == 'BEAT':
+            return True
+
+        if state == 'PING':
+            self.__send_record('PONG', 0, payload)
+            return True
+
+        if state == 'PONG':
+            if len(payload) != struct.calcsize('!d'):
+                raise ValueError(f'Expected an 8 byte time, but received {len(payload)} bytes')
+
+            sent_at: float = struct.unpack('!d', payload)[0]
+            self.__stats.rtt.observe(time.perf_counter() - sent_at)
+            return True
+
+        return False
+
+    def __start_heartbeat(self) -> None:
+        '''
+        Starts sending heartbeats over the new connection, if
+        configured to.
+        '''
+
+        self.__stop_heartbeat()
+
+        if self.__heartbeat_interval is None:
+            return
+
+        self.__heartbeat_stop = threading.Event()
+        self.__last_send = time.monotonic()
+
+        threading.Thread(target=self.__heartbeat,
+                         args=(self.__heartbeat_stop, self.__heartbeat_interval),
+                         daemon=True).start()
+
+    def __stop_heartbeat(self) -> None:
+        '''
+        Stops sending heartbeats, if we were.
+        '''
+
+        if self.__heartbeat_stop is not None:
+            self.__heartbeat_stop.set()
+            self.__heartbeat_stop = None
+
+    def __heartbeat(self, stop: threading.Event, interval: float) -> None:
+        '''
+        The body of the heartbeat thread. Sends a heartbeat
+        whenever nothing else has been sent for the interval.
+
+        :param stop: Set when the connection ends.
+        :param interval: Seconds between heartbeats.
+        '''
+
+        while not stop.wait(max(0.0, self.__last_send + interval - time.monotonic())):
+            if time.monotonic() - self.__last_send < interval:
+                continue
+
+            try:
+                with self.__send_lock:
+                    # The connection may have ended while we waited
+                    if stop.is_set() or not self.__is_connected:
+                        break
+
+                    self.__send_record('BEAT', 0, b'')
+
+            except OSError:
+                break
+
+            self.__stats.heartbeats_sent.inc()
+
+    def __drop_connection(self) -> None:
+        '''
+        Stops heartbeats and closes the connection, if any.
+        '''
+
+        self.__stop_heartbeat()
+
+        with self.__send_lock:
+            try:
+                if self.__client_socket is not None:
+                    self.__client_socket.close()
+            except socket.error:
+                pass
+
+            self.__client_socket = None
+            self.__is_connected = False
+
+    def __notify(self, state: str, payload: bytes) -> None:
+        '''
+        Tells every observer about a new record.
+        '''
+
+        for observer in self.__observers:
+            observer(state, payload)
+
+    def __replay(self, peer_seq: int) -> None:
+        '''
+        Resends every logged record which the other player has
+        not received. If they are further behind than the log
+        reaches, sends a single snapshot of the latest board
+        instead.
+
+        :param peer_seq: The last of our records they received.
+        '''
+
+        if peer_seq >= self.__sent_seq:
+            return
+
+        if self.__log and self.__log[0][0] <= peer_seq + 1:
+            for seq, record in self.__log:
+                if seq > peer_seq:
+                    self.__send_bytes(record)
+            return
+
+        assert self.__latest is not None
+
+        state, payload = self.__latest
+        compressed: bytes = self.__codec.compress(payload, None)
+
+        # Marked, since it may be numbered as the record after
+        # their last, which they would otherwise decompress
+        # against that
+        self.__send_bytes(self.make_record('SNAP', self.__sent_seq,
+                                           self.__pad(state, type(self).__STATE_STR_MAX_SIZE)
+                                           + compressed))
+
+        # They now have the snapshot, not our last record, to
+        # compress the next one against
+        self.__last_sent_payload = payload
+
+    def __use_codec(self, name: str) -> None:
+        '''
+        Switches to the codec agreed for a new connection.
+        Logged records were compressed with the old one, so if
+        it changed, they are forgotten and a player who needs
+        them is sent a snapshot instead.
+
+        :param name: The agreed codec.
+        :raises ValueError: If there is no such codec.
+        '''
+
+        codec: Codec = make_codec(name)
+
+        if codec is not self.__codec:
+            self.__log.clear()
+            self.__codec = codec
+
+    @classmethod
+    def __pad(cls, value: str, size: int) -> bytes:
+        '''
+        Encodes the given string, padded on the RIGHT side with
+        SPACES to the given size.
+        '''
+
+        return bytes(value + (' ' * (size - len(value))), 'UTF-8')
+
+    def __send_record(self, state: str, seq: int, payload: bytes) -> None:
+        '''
+        Builds and sends a record over the existing connection.
+        '''
+
+        self.__send_bytes(self.make_record(state, seq, payload))
+
+    def __recv_record(self) -> Tuple[str, int, bytes]:
+        '''
+        Receives a record from the existing connection. Hangs
+        until the whole record has arrived.
+
+        :returns: The (state, sequence number, payload).
+        :raises ValueError: If the record claims to be over
+            _MAX_FRAME_SIZE bytes.
+        '''
+
+        started: float = time.perf_counter()
+        state: str = self.__recv_field(type(self).__STATE_STR_MAX_SIZE)
+
+        # Any time after the first field arrives is a stall
+        arrived: float = time.perf_counter()
+        seq: int = int(self.__recv_field(type(self).__SEQ_STR_MAX_SIZE))
+        size: int = int(self.__recv_field(type(self).__SIZE_STR_MAX_SIZE))
+
+        # The size is the other player's word, so is not trusted
+        if not 0 <= size <= type(self)._MAX_FRAME_SIZE:
+            self.__stats.frames_rejected.inc()
+            raise ValueError(f'Refusing a record of {size} bytes')
+
+        payload: bytes = self.__receive(size)
+
+        finished: float = time.perf_counter()
+        self.__stats.recv_wait.observe(finished - started)
+        self.__stats.recv_stall.observe(finished - arrived)
+        self.__stats.record_received_size.observe(size + type(self).__RECORD_HEADER_SIZE)
+
+        return (state, seq, payload)
+
+    def __send_bytes(self, data: bytes) -> None:
+        '''
+        Sends the given bytes in full, as one write, over the
+        existing connection.
         '''
 
         assert self.__is_connected, 'Cannot send before connecting'
         assert self.__client_socket, 'Cannot send before connecting'
 
-        to_send: str = state
-        to_send += (' ' * (type(self).__STATE_STR_MAX_SIZE - len(to_send)))
+        # Never interleaved with a heartbeat
+        with self.__send_lock:
+            self.__client_socket.sendall(data)
+            self.__last_send = time.monotonic()
 
-        self.__client_socket.send(bytes(to_send, 'UTF-8'))
+        self.__stats.bytes_sent.inc(len(data))
 
-    def __recv_game_state(self) -> str:
+    def __receive(self, size: int) -> bytes:
         '''
-        Receives the game state.
+        Receives exactly the given number of bytes over the
+        existing connection, counting them, and any idle
+        timeout.
 
-        :returns: The received game sate.
+        :returns: The received bytes.
+        :raises ConnectionError: If the other player closed the
+            connection first.
         '''
 
         assert self.__is_connected, 'Cannot recv before connecting'
         assert self.__client_socket, 'Cannot recv before connecting'
 
-        b: bytes = self.__client_socket.recv(type(self).__STATE_STR_MAX_SIZE)
-        state: str = b.decode('UTF-8').strip(' ')
+        try:
+            out: bytes = recv_exact(self.__client_socket, size)
+        except TimeoutError:
+            self.__stats.idle_timeouts.inc()
+            raise
+
+        self.__stats.bytes_received.inc(size)
+        return out
+
+    def __send_field(self, value: str, size: int) -> None:
+        '''
+        Sends the given string as a fixed-width field.
+        '''
+
+        self.__send_bytes(type(self).__pad(value, size))
+
+    def __recv_field(self, size: int) -> str:
+        '''
+        Receives a fixed-width field.
+
+        :returns: The field, without padding.
+        '''
+
+        return self.__receive(size).decode('UTF-8').strip(' ')
+
+    def __send_game_state(self, state: str) -> None:
+        '''
+        Sends the given game state.
+
+        :param state: The current game state.
+        '''
+
+        self.__send_field(state, type(self).__STATE_STR_MAX_SIZE)
+
+    def __recv_game_state(self) -> str:
+        '''
+        Receives the game state.
+
+        :returns: The received game sate.
+        '''
 
-        return state
+        return self.__recv_field(type(self).__STATE_STR_MAX_SIZE)
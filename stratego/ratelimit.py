@@ -0,0 +1,124 @@
+'''
+Rate limiting for OOP Stratego hosts. Each peer address gets a
+token bucket, so one client flooding a host with join attempts
+is refused without slowing anyone else's games.
+'''
+
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class TokenBucket:
+    '''
+    Allows bursts of up to burst events, refilling at rate
+    events per second.
+    '''
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        '''
+        Starts full.
+
+        :param rate: Tokens added per second.
+        :param burst: The most tokens held.
+        :param now: The current time, in seconds.
+        '''
+
+        self.rate: float = rate
+        self.burst: float = burst
+
+        self.__tokens: float = burst
+        self.__updated: float = now
+
+    def take(self, now: float, cost: float = 1.0) -> bool:
+        '''
+        Takes tokens, if there are enough.
+
+        :param now: The current time, in seconds.
+        :param cost: How many tokens to take.
+        :returns: True if they were taken.
+        '''
+
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+        if self.__tokens < cost:
+            return False
+
+        self.__tokens -= cost
+        return True
+
+
+class RateLimiter:
+    '''
+    A token bucket per key (such as a peer's IP). Only the most
+    recently seen keys are remembered, so that a flood of
+    addresses cannot exhaust memory. Thread-safe.
+    '''
+
+    def __init__(self,
+                 rate: float,
+                 burst: float,
+                 max_keys: int = 4096,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        '''
+        :param rate: Events allowed per second, per key.
+        :param burst: Events allowed at once, per key.
+        :param max_keys: The most keys remembered.
+        :param clock: The time source, in seconds.
+        '''
+
+        self.__rate: float = rate
+        self.__burst: float = burst
+        self.__max_keys: int = max_keys
+        self.__clock: Callable[[], float] = clock
+
+        self.__lock: threading.Lock = threading.Lock()
+        self.__buckets: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+
+        # Statistics
+        self.refused: int = 0
+
+    def allow(self, key: Hashable) -> bool:
+        '''
+        Records an event for the given key.
+
+        :param key: Who the event is from.
+        :returns: True if it is within the limit.
+        '''
+
+        with self.__lock:
+            now: float = self.__clock()
+            bucket: TokenBucket
+
+            if key in self.__buckets:
+                bucket = self.__buckets[key]
+                self.__buckets.move_to_end(key)
+
+            else:
+                bucket = TokenBucket(self.__rate, self.__burst, now)
+                self.__buckets[key] = bucket
+
+                if len(self.__buckets) > self.__max_keys:
+                    self.__buckets.popitem(last=False)
+
+            if bucket.take(now):
+                return True
+
+            self.refused += 1
+            return False
+
+
+def peer_key(peer: Any) -> Hashable:
+    '''
+    :param peer: The peer address returned by accept().
+    :returns: What to rate limit the peer by: Their IP, for
+        TCP. Unix and in-memory peers are all local, so share
+        one key.
+    '''
+
+    if isinstance(peer, tuple) and peer:
+        return str(peer[0])
+
+    return 'local'
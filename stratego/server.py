@@ -0,0 +1,396 @@
+'''
+A headless, multi-game Stratego host. Every player which joins
+gets their own game against a RandomBot, all served from a
+single listening socket. This is what the load testing harness
+in stratego.loadtest measures. Games whose player goes silent
+time out, and finished games are reaped, so a long-running
+server does not accumulate dead sessions. Joins are rate limited
+per address, and little is buffered for players who stop
+reading, so one misbehaving client cannot slow the other games.
+Given a SessionStore, games whose player leaves are parked there
+instead of ended, and resumed when they join again.
+'''
+
+import socket
+import struct
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+from stratego.board import Board
+from stratego.bot import RandomBot
+from stratego.network import StrategoNetworker
+from stratego.ratelimit import RateLimiter, peer_key
+from stratego.sessions import SessionStore
+from stratego.transport import (Address, Connection, Listener, PrefixedConnection, TCPTransport,
+                                Transport, recv_exact)
+
+
+# Given a join password, where to send the joiner instead, if
+# anywhere
+Router = Callable[[str], Optional[Address]]
+
+
+class GameServer:
+    '''
+    Accepts any number of simultaneous joiners on one port,
+    playing RED against each of them on its own thread. Each
+    game uses the same protocol as a StrategoGUI host.
+    '''
+
+    _SEND_BUFFER: int = 1 << 14
+    # Parked games are the bot's move count, then the session
+    __MOVES_FORMAT: str = '!I'
+
+    def __init__(self,
+                 ip: str,
+                 port: int,
+                 password: Optional[str],
+                 max_turns: int = 500,
+                 transport: Optional[Transport] = None,
+                 heartbeat_interval: Optional[float] = 5.0,
+                 idle_timeout: Optional[float] = 30.0,
+                 join_rate: Optional[float] = 5.0,
+                 join_burst: float = 20.0,
+                 router: Optional[Router] = None,
+                 sessions: Optional[SessionStore] = None) -> None:
+        '''
+        Binds, but does not start serving on, the given address.
+
+        :param ip: The IPv4 address to host on.
+        :param port: The port to listen on. 0 picks a free one.
+        :param password: The password every joiner must send,
+            or None to accept any, each naming its own game.
+        :param max_turns: Passed on to each RandomBot.
+        :param transport: How to accept joiners. Defaults to
+            TCP, with a send buffer of _SEND_BUFFER bytes.
+        :param heartbeat_interval: Passed on to each game's
+            StrategoNetworker.set_timeouts.
+        :param idle_timeout: Passed on to each game's
+            StrategoNetworker.set_timeouts. This also bounds
+            how long sending to a player who is not reading
+            blocks.
+        :param join_rate: Joins allowed per second from each
+            address, or None for no limit.
+        :param join_burst: Joins allowed at once from each
+            address.
+        :param router: Decides, from a joiner's password, which
+            server their game belongs on. Joiners whose game
+            belongs elsewhere are redirected there.
+        :param sessions: Where to park named games whose player
+            leaves mid-game, to resume when they join again with
+            the same password and the game's resume token. Only
+            used if password is None.
+        '''
+
+        self.__password: Optional[str] = password
+        self.__router: Optional[Router] = router
+        self.__store: Optional[SessionStore] = sessions
+        self.__max_turns: int = max_turns
+        self.__heartbeat_interval: Optional[float] = heartbeat_interval
+        self.__idle_timeout: Optional[float] = idle_timeout
+
+        if transport is None:
+            transport = TCPTransport(reuse_address=True, send_buffer=type(self)._SEND_BUFFER)
+
+        self.__limiter: Optional[RateLimiter] = \
+            None if join_rate is None else RateLimiter(join_rate, join_burst)
+
+        self.__transport: Transport = transport
+
+        self.__socket: Listener
+        self.__address: Address
+        self.__socket, self.__address = transport.listen((ip, port), backlog=128)
+
+        self.__is_running: bool = False
+        self.__sessions: List[threading.Thread] = []
+
+        # The names of games being played, each by one joiner
+        self.__playing: Set[str] = set()
+
+        # Statistics
+        self.__lock: threading.Lock = threading.Lock()
+        self.games_started: int = 0
+        self.games_finished: int = 0
+        self.timeouts: int = 0
+        self.errors: int = 0
+        self.rate_limited: int = 0
+        self.redirects: int = 0
+        self.parked: int = 0
+        self.resumed: int = 0
+        self.collisions: int = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        '''
+        :returns: The (ip, port) actually being listened on.
+        '''
+
+        return self.__address
+
+    @property
+    def transport(self) -> Transport:
+        '''
+        :returns: The transport joiners must connect with.
+        '''
+
+        return self.__transport
+
+    @property
+    def active_games(self) -> int:
+        '''
+        :returns: The number of games still being played.
+        '''
+
+        return sum(1 for session in self.__sessions if session.is_alive())
+
+    def serve_forever(self) -> None:
+        '''
+        Accepts joiners until shutdown() is called, starting a
+        game for each of them.
+        '''
+
+        self.__is_running = True
+
+        while self.__is_running:
+            try:
+                conn, peer = self.__socket.accept()
+            except OSError:
+                break
+
+            # Hang up on floods before they cost a thread
+            if self.__limiter is not None and not self.__limiter.allow(peer_key(peer)):
+                self.rate_limited += 1
+                conn.close()
+                continue
+
+            session: threading.Thread = threading.Thread(target=self.__session,
+                                                         args=(conn,),
+                                                         daemon=True)
+
+            # Spill games parked for a while, even if no more are
+            if self.__store is not None:
+                self.__store.spill_idle()
+
+            # Forget finished games, so they are not held forever
+            self.__sessions = [old for old in self.__sessions if old.is_alive()]
+            self.__sessions.append(session)
+            session.start()
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        '''
+        Stops accepting joiners, then waits for running games.
+
+        :param timeout: The most seconds to wait for each game.
+        '''
+
+        self.__is_running = False
+
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.__socket.close()
+
+        for session in self.__sessions:
+            session.join(timeout)
+
+    def __session(self, conn: Connection) -> None:
+        '''
+        Plays one whole game against the given connection, or
+        resumes their parked one.
+
+        :param conn: The accepted connection.
+        '''
+
+        net: StrategoNetworker = StrategoNetworker.detached(self.__transport)
+        net.set_timeouts(self.__heartbeat_interval, self.__idle_timeout)
+
+        bot: RandomBot = RandomBot(net, 'RED', max_turns=self.__max_turns)
+        name: Optional[str] = None
+
+        # The parked game being resumed, kept until the handshake
+        # succeeds, whether it has, and whether the game was
+        # parked again when the connection was lost
+        parked: Optional[bytes] = None
+        accepted: bool = False
+        kept: bool = False
+
+        try:
+            routed: Optional[Tuple[Connection, str]] = self.__route(conn)
+            if routed is None:
+                return
+
+            if self.__password is None:
+                name = routed[1]
+
+            parked = self.__unpark(name, net, bot)
+            resuming: bool = parked is not None
+
+            accepted = net.host_accept(*routed)
+            if not accepted:
+                return
+
+            self.__play(bot, resuming)
+
+        except OSError as e:
+            with self.__lock:
+                if isinstance(e, TimeoutError):
+                    self.timeouts += 1
+                else:
+                    self.errors += 1
+
+            kept = accepted and self.__park(name, net, bot)
+
+        except ValueError:
+            with self.__lock:
+                self.errors += 1
+
+        finally:
+            # A failed handshake resumed nothing, so the game is
+            # parked again as it was
+            if parked is not None and not accepted and name is not None:
+                assert self.__store is not None
+                self.__store.put(name, parked)
+
+            # Telling a parked player that the game is over would
+            # be a lie
+            if kept:
+                net.disconnect()
+            else:
+                net.close_game()
+
+            if name is not None:
+                with self.__lock:
+                    self.__playing.discard(name)
+
+    def __play(self, bot: RandomBot, resuming: bool) -> None:
+        '''
+        Plays the game out, once the joiner is connected.
+
+        :param bot: Who plays the joiner.
+        :param resuming: Whether the game was parked.
+        '''
+
+        with self.__lock:
+            if resuming:
+                self.resumed += 1
+            else:
+                self.games_started += 1
+
+        if resuming:
+            bot.resume()
+        else:
+            bot.play()
+
+        with self.__lock:
+            self.games_finished += 1
+
+    def __unpark(self,
+                 name: Optional[str],
+                 net: StrategoNetworker,
+                 bot: RandomBot) -> Optional[bytes]:
+        '''
+        Restores the named game, if it was parked. It is taken
+        from the store, so that no one else resumes it too.
+
+        :returns: The parked game, if it is to be resumed.
+        '''
+
+        if name is None or self.__store is None:
+            return None
+
+        parked: Optional[bytes] = self.__store.take(name)
+        if parked is None:
+            return None
+
+        size: int = struct.calcsize(type(self).__MOVES_FORMAT)
+        bot.moves, = struct.unpack(type(self).__MOVES_FORMAT, parked[:size])
+        net.restore_session(parked[size:])
+
+        return parked
+
+    def __park(self, name: Optional[str], net: StrategoNetworker, bot: RandomBot) -> bool:
+        '''
+        Parks the named game, if it is still in progress, so
+        that its player can resume it.
+
+        :returns: True if it was parked.
+        '''
+
+        if name is None or self.__store is None:
+            return False
+
+        latest: Optional[Tuple[Board, str]] = net.latest
+        if latest is None or StrategoNetworker.is_terminal_state(latest[1]):
+            return False
+
+        self.__store.put(name,
+                         struct.pack(type(self).__MOVES_FORMAT, bot.moves) + net.export_session())
+
+        with self.__lock:
+            self.parked += 1
+
+        return True
+
+    def __route(self, conn: Connection) -> Optional[Tuple[Connection, str]]:
+        '''
+        Reads the joiner's password ahead of the handshake, if
+        it is needed to pick their game, and redirects them if
+        that game belongs on another server.
+
+        :param conn: The accepted connection.
+        :returns: The connection to hand to host_accept, and the
+            password to expect, or None if redirected, or if the
+            game they named is already in play.
+        '''
+
+        if self.__password is not None and self.__router is None:
+            return (conn, self.__password)
+
+        try:
+            if self.__idle_timeout is not None:
+                conn.settimeout(self.__idle_timeout)
+
+            code: bytes = recv_exact(conn, StrategoNetworker.PASSWORD_SIZE)
+            password: str = code.decode('UTF-8')
+
+        except (ValueError, OSError):
+            conn.close()
+            raise
+
+        owner: Optional[Address] = None if self.__router is None else self.__router(password)
+
+        if owner is not None:
+            StrategoNetworker.redirect(conn, owner)
+            conn.close()
+
+            with self.__lock:
+                self.redirects += 1
+
+            return None
+
+        # A game is played by one joiner at a time, so that
+        # neither parks over the other's
+        if self.__password is None and not self.__claim(password):
+            conn.close()
+            return None
+
+        # host_accept reads the password again
+        return (PrefixedConnection(conn, code),
+                password if self.__password is None else self.__password)
+
+    def __claim(self, name: str) -> bool:
+        '''
+        Marks the named game as in play, unless it already is.
+        It is released once its session ends.
+
+        :returns: False if it was already in play.
+        '''
+
+        with self.__lock:
+            if name in self.__playing:
+                self.collisions += 1
+                return False
+
+            self.__playing.add(name)
+            return True
@@ -0,0 +1,234 @@
+'''
+Storage for parked games. A server hosting many long games keeps
+only those in play in memory: Once a game's player leaves, its
+packed session is parked here, under the game's name, until
+they return. Recently parked games stay in memory, least
+recently used first to go; ones left idle for longer than
+idle_time, or beyond max_hot, are spilled to a compressed file
+each, and reloaded transparently when asked for. Memory thus
+scales with the games in play, not every open one.
+'''
+
+from collections import OrderedDict
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Optional, Set, Tuple
+import zlib
+
+
+class SessionStore:
+    '''
+    Parked sessions by name, in memory or spilled to disk.
+    Thread-safe.
+    '''
+
+    _SUFFIX: str = '.session'
+
+    def __init__(self,
+                 directory: Optional[str] = None,
+                 idle_time: float = 60.0,
+                 max_hot: int = 1024,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        '''
+        :param directory: Where spilled sessions are written.
+            Defaults to a new temporary directory, removed by
+            close.
+        :param idle_time: Seconds after which an untouched
+            session is spilled.
+        :param max_hot: The most sessions held in memory.
+        :param clock: The time source, in seconds.
+        '''
+
+        # Only a directory made here is removed by close
+        self.__temporary: Optional[tempfile.TemporaryDirectory[str]] = None
+
+        if directory is None:
+            self.__temporary = tempfile.TemporaryDirectory(prefix='stratego-sessions-')
+            directory = self.__temporary.name
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.__directory: str = directory
+        self.__idle_time: float = idle_time
+        self.__max_hot: int = max_hot
+        self.__clock: Callable[[], float] = clock
+
+        self.__lock: threading.Lock = threading.Lock()
+
+        # Name: (when last touched, session), least recent first
+        self.__hot: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+
+        # The names of those on disk
+        self.__spilled: Set[str] = set()
+
+        # Statistics
+        self.spills: int = 0
+        self.reloads: int = 0
+
+    @property
+    def directory(self) -> str:
+        '''
+        :returns: Where spilled sessions are written.
+        '''
+
+        return self.__directory
+
+    @property
+    def hot(self) -> int:
+        '''
+        :returns: The number of sessions held in memory.
+        '''
+
+        return len(self.__hot)
+
+    def __len__(self) -> int:
+        '''
+        :returns: The number of sessions, in memory or spilled.
+        '''
+
+        return len(self.__hot) + len(self.__spilled)
+
+    def __contains__(self, name: object) -> bool:
+        '''
+        :returns: Whether a session is parked under the name.
+        '''
+
+        if not isinstance(name, str):
+            return False
+
+        return name in self.__hot or name in self.__spilled
+
+    def put(self, name: str, session: bytes) -> None:
+        '''
+        Parks a session, replacing any already under the name,
+        then spills whatever is due.
+
+        :param name: The game's name.
+        :param session: The packed session.
+        '''
+
+        with self.__lock:
+            now: float = self.__clock()
+
+            self.__remove_spilled(name)
+            self.__hot[name] = (now, session)
+            self.__hot.move_to_end(name)
+
+            self.__spill(now)
+
+    def take(self, name: str) -> Optional[bytes]:
+        '''
+        Removes a session, reloading it if it was spilled.
+
+        :param name: The game's name.
+        :returns: The packed session, or None if none is parked.
+        :raises OSError: If the spilled session is unreadable.
+        :raises zlib.error: If it is corrupt.
+        '''
+
+        with self.__lock:
+            entry: Optional[Tuple[float, bytes]] = self.__hot.pop(name, None)
+            if entry is not None:
+                return entry[1]
+
+            if name not in self.__spilled:
+                return None
+
+            with open(self.__path(name), 'rb') as file:
+                compressed: bytes = file.read()
+
+            self.__remove_spilled(name)
+            self.reloads += 1
+
+            return zlib.decompress(compressed)
+
+    def discard(self, name: str) -> None:
+        '''
+        Forgets a session, if one is parked under the name.
+
+        :param name: The game's name.
+        '''
+
+        with self.__lock:
+            if self.__hot.pop(name, None) is None:
+                self.__remove_spilled(name)
+
+    def close(self) -> None:
+        '''
+        Forgets every session, deleting those spilled, and
+        removes the directory if it was made for this store.
+        The store may not be used afterwards.
+        '''
+
+        with self.__lock:
+            self.__hot.clear()
+
+            for name in list(self.__spilled):
+                self.__remove_spilled(name)
+
+            if self.__temporary is not None:
+                self.__temporary.cleanup()
+                self.__temporary = None
+
+    def spill_idle(self) -> int:
+        '''
+        Spills every session idle for longer than idle_time, or
+        beyond max_hot. put does so too, so this is only needed
+        while nothing is being parked.
+
+        :returns: The number spilled.
+        '''
+
+        with self.__lock:
+            return self.__spill(self.__clock())
+
+    def __spill(self, now: float) -> int:
+        '''
+        Writes out the least recently used sessions which are
+        due, oldest first. Called with the lock held.
+
+        :param now: The current time, in seconds.
+        :returns: The number spilled.
+        '''
+
+        spilled: int = 0
+
+        while self.__hot:
+            name, (touched, session) = next(iter(self.__hot.items()))
+
+            if len(self.__hot) <= self.__max_hot and now - touched < self.__idle_time:
+                break
+
+            # Written aside then renamed, so a crash never leaves
+            # half a session
+            path: str = self.__path(name)
+            with open(path + '.tmp', 'wb') as file:
+                file.write(zlib.compress(session))
+            os.replace(path + '.tmp', path)
+
+            del self.__hot[name]
+            self.__spilled.add(name)
+            spilled += 1
+
+        self.spills += spilled
+        return spilled
+
+    def __remove_spilled(self, name: str) -> None:
+        '''
+        Deletes the named session's file, if it was spilled.
+        Called with the lock held.
+        '''
+
+        if name in self.__spilled:
+            self.__spilled.remove(name)
+            os.remove(self.__path(name))
+
+    def __path(self, name: str) -> str:
+        '''
+        :returns: Where the named session is spilled to. Names
+            are hex encoded, so any may be used safely.
+        '''
+
+        return os.path.join(self.__directory, name.encode('UTF-8').hex() + type(self)._SUFFIX)
@@ -0,0 +1,289 @@
+'''
+Spectating for OOP Stratego. A SpectatorHub is attached to one
+player's StrategoNetworker and relays every move of their game
+to any number of spectators. Each move is encoded into a record
+exactly once, and those same bytes are queued for every
+spectator, so popular games cost one serialization per move no
+matter how many are watching.
+
+Spectators watch via StrategoNetworker.watch_game.
+'''
+
+from collections import deque
+import socket
+import threading
+from typing import Deque, List, Optional, Tuple
+
+from stratego.network import StrategoNetworker
+from stratego.transport import Connection, Listener, TCPTransport, Transport
+
+
+class Subscriber:
+    '''
+    One spectator's connection. Records are queued by the hub
+    and written out on this subscriber's own thread, so a slow
+    spectator never holds up the players or other spectators.
+    '''
+
+    def __init__(self, conn: Connection, max_pending: int) -> None:
+        '''
+        Prepares, but does NOT start, the writer thread.
+
+        :param conn: The connection to the spectator.
+        :param max_pending: The most records which may be queued
+            before the spectator is considered to have fallen
+            behind.
+        '''
+
+        self.__conn: Connection = conn
+        self.__max_pending: int = max_pending
+
+        self.__records: Deque[bytes] = deque()
+        self.__ready: threading.Condition = threading.Condition()
+        self.__is_closing: bool = False
+        self.__is_alive: bool = True
+
+        self.__thread: threading.Thread = threading.Thread(target=self.__run,
+                                                           daemon=True)
+
+        # Statistics
+        self.sent: int = 0
+        self.dropped: int = 0
+
+    @property
+    def is_alive(self) -> bool:
+        '''
+        :returns: False once the connection has failed or been
+            closed.
+        '''
+
+        return self.__is_alive
+
+    def start(self) -> None:
+        '''
+        Starts writing queued records.
+        '''
+
+        self.__thread.start()
+
+    def push(self, record: bytes) -> None:
+        '''
+        Queues a record. Never blocks on the network. If the
+        spectator has fallen behind, the records it has not yet
+        been sent are dropped: Every record holds the whole
+        board, so the newest one alone is a snapshot of the game.
+
+        :param record: The record to queue.
+        '''
+
+        with self.__ready:
+            if len(self.__records) >= self.__max_pending:
+                self.dropped += len(self.__records)
+                self.__records.clear()
+
+            self.__records.append(record)
+            self.__ready.notify()
+
+    def close(self) -> None:
+        '''
+        Closes the connection once every queued record has been
+        written.
+        '''
+
+        with self.__ready:
+            self.__is_closing = True
+            self.__ready.notify()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        '''
+        Waits for the writer thread to finish.
+
+        :param timeout: The most seconds to wait.
+        '''
+
+        self.__thread.join(timeout)
+
+    def __run(self) -> None:
+        '''
+        The body of the writer thread.
+        '''
+
+        while True:
+            with self.__ready:
+                while not self.__records and not self.__is_closing:
+                    self.__ready.wait()
+
+                if not self.__records:
+                    break
+
+                # Everything queued goes out in a single write
+                batch: List[bytes] = list(self.__records)
+                self.__records.clear()
+
+            try:
+                self.__conn.sendall(b''.join(batch))
+            except OSError:
+                break
+
+            self.sent += len(batch)
+
+        self.__is_alive = False
+
+        try:
+            self.__conn.close()
+        except OSError:
+            pass
+
+
+class SpectatorHub:
+    '''
+    Relays one game to any number of spectators. Pass publish
+    to StrategoNetworker.add_observer, then listen.
+    '''
+
+    def __init__(self,
+                 max_pending: int = 16,
+                 transport: Optional[Transport] = None) -> None:
+        '''
+        Creates a hub with no spectators, which is NOT yet
+        listening.
+
+        :param max_pending: The most records queued for any one
+            spectator before they are skipped ahead to the
+            latest board.
+        :param transport: How to accept spectators. Defaults to
+            TCP.
+        '''
+
+        self.__max_pending: int = max_pending
+        self.__transport: Transport = \
+            transport if transport is not None else TCPTransport(reuse_address=True)
+
+        self.__lock: threading.Lock = threading.Lock()
+        self.__subscribers: List[Subscriber] = []
+
+        # Spectators see one sequence, whichever player moved
+        self.__seq: int = 0
+        self.__latest: Optional[bytes] = None
+
+        self.__socket: Optional[Listener] = None
+
+        # Statistics
+        self.records_encoded: int = 0
+
+    @property
+    def spectators(self) -> int:
+        '''
+        :returns: The number of spectators still connected.
+        '''
+
+        with self.__lock:
+            return sum(1 for sub in self.__subscribers if sub.is_alive)
+
+    def listen(self, ip: str, port: int) -> Tuple[str, int]:
+        '''
+        Starts accepting spectators on a background thread.
+
+        :param ip: The IPv4 address to listen on.
+        :param port: The port to listen on. 0 picks a free one.
+        :returns: The (ip, port) actually being listened on.
+        '''
+
+        self.__socket, address = self.__transport.listen((ip, port), backlog=16)
+
+        threading.Thread(target=self.__accept_loop,
+                         args=(self.__socket,),
+                         daemon=True).start()
+
+        return address
+
+    def subscribe(self, conn: Connection) -> Subscriber:
+        '''
+        Adds a spectator. They are first sent the latest board,
+        if any, then every move after it.
+
+        :param conn: The connection to the spectator.
+        :returns: The new subscriber.
+        '''
+
+        sub: Subscriber = Subscriber(conn, self.__max_pending)
+
+        with self.__lock:
+            if self.__latest is not None:
+                sub.push(self.__latest)
+
+            self.__subscribers.append(sub)
+
+        sub.start()
+        return sub
+
+    def publish(self, state: str, payload: bytes) -> None:
+        '''
+        Relays a move to every spectator. Encodes the record
+        once, no matter how many are watching.
+
+        :param state: The game state.
+        :param payload: The encoded board.
+        '''
+
+        with self.__lock:
+            self.__seq += 1
+            record: bytes = StrategoNetworker.make_record(state, self.__seq, payload)
+            self.records_encoded += 1
+
+            self.__latest = record
+            self.__broadcast(record)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        '''
+        Stops accepting spectators, then tells the remaining
+        ones that the game is over and disconnects them.
+
+        :param timeout: The most seconds to wait for each
+            spectator's queue to be written.
+        '''
+
+        if self.__socket is not None:
+            try:
+                self.__socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.__socket.close()
+            self.__socket = None
+
+        with self.__lock:
+            self.__broadcast(StrategoNetworker.make_record('HALT', 0, b''))
+            subscribers: List[Subscriber] = self.__subscribers
+            self.__subscribers = []
+
+        for sub in subscribers:
+            sub.close()
+
+        for sub in subscribers:
+            sub.join(timeout)
+
+    def __broadcast(self, record: bytes) -> None:
+        '''
+        Queues the same record for every spectator, forgetting
+        those who have disconnected. Call with the lock held.
+        '''
+
+        self.__subscribers = [sub for sub in self.__subscribers if sub.is_alive]
+
+        for sub in self.__subscribers:
+            sub.push(record)
+
+    def __accept_loop(self, listener: Listener) -> None:
+        '''
+        Subscribes everyone who connects, until closed.
+
+        :param listener: The listening socket.
+        '''
+
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                break
+
+            self.subscribe(conn)
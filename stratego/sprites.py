@@ -0,0 +1,338 @@
+'''
+Scales the GUI's sprites. Scaling pixel by pixel through Tk costs
+several Tcl calls per pixel, so instead: Whole-number ratios use
+Tk's own zoom and subsample, and sprites loaded from files are
+resampled by Pillow, then handed to Tk as PNG data, in one call.
+Scaled sprites are kept in a SpriteCache on disk, so later
+launches only read them, and can be packed into one atlas off the
+Tk thread, leaving only slicing it to be done there.
+
+Usage: python -m stratego.sprites --prewarm
+'''
+
+import argparse
+import base64
+import glob
+import hashlib
+import io
+from math import gcd
+import os
+import tempfile
+import tkinter as tk
+from typing import Dict, Literal, Optional, Sequence, Tuple, get_args
+
+from PIL import Image
+
+# How to resample: Nearest keeps pixel art crisp, while the others
+# smooth, at more cost
+Quality = Literal['nearest', 'bilinear', 'lanczos']
+
+_RESAMPLING: Dict[Quality, Image.Resampling] = {
+    'nearest': Image.Resampling.NEAREST,
+    'bilinear': Image.Resampling.BILINEAR,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+
+# The most a ratio may zoom by before subsampling, since the
+# intermediate image is that much larger
+_MAX_ZOOM: int = 8
+
+# Every sprite the GUI ships, and the sizes it shows them at (see
+# StrategoGUI._BUTTON_SIZE)
+SPRITE_GLOB: str = os.path.join(os.path.dirname(__file__), 'images', '*.png')
+SHIPPED_SIZES: Tuple[int, ...] = (32,)
+
+
+def scale_photo(img: tk.PhotoImage, w: int, h: int) -> Optional[tk.PhotoImage]:
+    '''
+    Scales with Tk's zoom and subsample, which only handle
+    ratios of small whole numbers, as with nearest neighbour.
+
+    :param img: The image to scale.
+    :param w: The desired width.
+    :param h: The desired height.
+    :returns: The scaled image, or None if the ratio is not one
+        that can be scaled this way.
+    '''
+
+    old_w: int = img.width()
+    old_h: int = img.height()
+
+    if not (old_w and old_h and w and h):
+        return None
+
+    # Reduced ratios: Zoom by the numerator, then subsample by the
+    # denominator
+    w_gcd: int = gcd(w, old_w)
+    h_gcd: int = gcd(h, old_h)
+    zoom_x, sub_x = w // w_gcd, old_w // w_gcd
+    zoom_y, sub_y = h // h_gcd, old_h // h_gcd
+
+    if max(zoom_x, zoom_y) > _MAX_ZOOM:
+        return None
+
+    out: tk.PhotoImage = img
+    if zoom_x > 1 or zoom_y > 1:
+        out = out.zoom(zoom_x, zoom_y)
+    if sub_x > 1 or sub_y > 1:
+        out = out.subsample(sub_x, sub_y)
+
+    return img.copy() if out is img else out
+
+
+def scale_png(path: str, w: int, h: int, quality: Quality = 'nearest') -> bytes:
+    '''
+    Resamples an image file with Pillow. This needs no display.
+
+    :param path: The image file.
+    :param w: The desired width.
+    :param h: The desired height.
+    :param quality: How to resample.
+    :returns: The scaled image, as PNG data.
+    '''
+
+    with Image.open(path) as source:
+        scaled: Image.Image = source.convert('RGBA').resize((w, h), _RESAMPLING[quality])
+
+    buffer: io.BytesIO = io.BytesIO()
+    scaled.save(buffer, format='PNG')
+
+    return buffer.getvalue()
+
+
+class SpriteCache:
+    '''
+    Scaled sprites on disk, as PNG files keyed by the source's
+    path and modification time, and the size and quality, so an
+    edited source is scaled afresh. Failing to write is not an
+    error, since the cache only saves time.
+    '''
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        '''
+        :param directory: Where to keep scaled sprites. Defaults
+            to stratego/sprites under $XDG_CACHE_HOME, or
+            ~/.cache.
+        '''
+
+        if directory is None:
+            base: str = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+            directory = os.path.join(base, 'stratego', 'sprites')
+
+        self.__directory: str = directory
+
+        # Statistics
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def directory(self) -> str:
+        '''
+        :returns: Where scaled sprites are kept.
+        '''
+
+        return self.__directory
+
+    def get(self, path: str, w: int, h: int, quality: Quality = 'nearest') -> bytes:
+        '''
+        Reads a scaled sprite, scaling and storing it first if it
+        is not cached.
+
+        :param path: The image file.
+        :param w: The desired width.
+        :param h: The desired height.
+        :param quality: How to resample.
+        :returns: The scaled image, as PNG data.
+        :raises OSError: If the source cannot be read.
+        '''
+
+        cached: str = self.__path(path, w, h, quality)
+
+        try:
+            with open(cached, 'rb') as file:
+                data: bytes = file.read()
+
+            self.hits += 1
+            return data
+
+        except OSError:
+            pass
+
+        self.misses += 1
+        data = scale_png(path, w, h, quality)
+
+        # Written aside then renamed, so that a reader never sees
+        # half a sprite, even with several writing at once
+        try:
+            os.makedirs(self.__directory, exist_ok=True)
+
+            handle, temporary = tempfile.mkstemp(dir=self.__directory, suffix='.tmp')
+
+            try:
+                with os.fdopen(handle, 'wb') as file:
+                    file.write(data)
+                os.replace(temporary, cached)
+
+            except OSError:
+                os.unlink(temporary)
+                raise
+
+        except OSError:
+            pass
+
+        return data
+
+    def prewarm(self,
+                sizes: Sequence[int] = SHIPPED_SIZES,
+                qualities: Sequence[Quality] = ('nearest',),
+                pattern: str = SPRITE_GLOB) -> int:
+        '''
+        Scales every sprite to every size, unless already cached.
+
+        :param sizes: The widths (and heights) to scale to.
+        :param qualities: The qualities to scale at.
+        :param pattern: Which sprites, as a glob.
+        :returns: The number of sprites scaled.
+        '''
+
+        misses: int = self.misses
+
+        for path in sorted(glob.glob(pattern)):
+            for size in sizes:
+                for quality in qualities:
+                    self.get(path, size, size, quality)
+
+        return self.misses - misses
+
+    def __path(self, path: str, w: int, h: int, quality: Quality) -> str:
+        '''
+        :returns: Where the scaled sprite is cached.
+        '''
+
+        key: str = f'{os.path.abspath(path)}|{os.stat(path).st_mtime_ns}|{w}x{h}|{quality}'
+        digest: str = hashlib.sha1(key.encode('UTF-8')).hexdigest()
+
+        return os.path.join(self.__directory, f'{digest}.png')
+
+
+def load_sprite(path: str,
+                w: int,
+                h: int,
+                quality: Quality = 'nearest',
+                cache: Optional[SpriteCache] = None) -> tk.PhotoImage:
+    '''
+    Loads an image file, scaled to the given size.
+
+    :param path: The image file.
+    :param w: The desired width.
+    :param h: The desired height.
+    :param quality: How to resample. Nearest neighbour is
+        exact for whole-number ratios, so uses Tk's zoom if it
+        can.
+    :param cache: Where to read the scaled sprite from, if
+        anywhere. Then no scaling is done once it is cached.
+    :returns: The scaled image.
+    '''
+
+    if cache is not None:
+        return _photo(cache.get(path, w, h, quality))
+
+    if quality == 'nearest':
+        scaled: Optional[tk.PhotoImage] = scale_photo(tk.PhotoImage(file=path), w, h)
+        if scaled is not None:
+            return scaled
+
+    return _photo(scale_png(path, w, h, quality))
+
+
+def build_atlas(paths: Sequence[str],
+                size: int,
+                quality: Quality = 'nearest',
+                cache: Optional[SpriteCache] = None) -> bytes:
+    '''
+    Scales every sprite, and packs them left to right into one
+    image. This needs no display, so may run on any thread.
+
+    :param paths: The image files.
+    :param size: The width and height to scale each to.
+    :param quality: How to resample.
+    :param cache: Where to read scaled sprites from, if
+        anywhere.
+    :returns: The atlas, as PNG data.
+    :raises OSError: If a sprite cannot be read.
+    '''
+
+    atlas: Image.Image = Image.new('RGBA', (size * len(paths), size))
+
+    for i, path in enumerate(paths):
+        png: bytes = scale_png(path, size, size, quality) if cache is None else \
+            cache.get(path, size, size, quality)
+
+        with Image.open(io.BytesIO(png)) as sprite:
+            atlas.paste(sprite.convert('RGBA'), (i * size, 0))
+
+    buffer: io.BytesIO = io.BytesIO()
+    atlas.save(buffer, format='PNG')
+
+    return buffer.getvalue()
+
+
+def slice_atlas(png: bytes, paths: Sequence[str], size: int) -> Dict[str, tk.PhotoImage]:
+    '''
+    Cuts an atlas from build_atlas back into sprites. Tk is not
+    thread-safe, so call this on its thread.
+
+    :param png: The atlas.
+    :param paths: The image files it was built from, in order.
+    :param size: The width and height of each sprite.
+    :returns: Each sprite, by its file.
+    '''
+
+    atlas: tk.PhotoImage = _photo(png)
+    sprites: Dict[str, tk.PhotoImage] = {}
+
+    for i, path in enumerate(paths):
+        sprite: tk.PhotoImage = tk.PhotoImage(width=size, height=size)
+        sprite.tk.call(sprite.name, 'copy', atlas.name,
+                       '-from', i * size, 0, (i + 1) * size, size)
+        sprites[path] = sprite
+
+    return sprites
+
+
+def _photo(png: bytes) -> tk.PhotoImage:
+    '''
+    :returns: The PNG data, as an image.
+    '''
+
+    # Tk accepts PNG data as base64 on every version
+    return tk.PhotoImage(data=base64.b64encode(png), format='png')
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    '''
+    Command line entry point.
+    '''
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prewarm', action='store_true',
+                        help='scale every shipped sprite into the cache')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SHIPPED_SIZES),
+                        help='sizes to scale to')
+    parser.add_argument('--quality', choices=get_args(Quality), nargs='+', default=['nearest'],
+                        help='qualities to scale at')
+    parser.add_argument('--directory', help='cache directory')
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    cache: SpriteCache = SpriteCache(args.directory)
+
+    if args.prewarm:
+        scaled: int = cache.prewarm(args.sizes, args.quality)
+        print(f'Scaled {scaled} sprites into {cache.directory} ({cache.hits} already cached)')
+
+    else:
+        parser.print_usage()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,712 @@
+'''
+Transports for OOP Stratego. A transport is how a
+StrategoNetworker opens its connections: TCP between machines,
+Unix domain sockets between processes on one machine, or an
+in-memory pipe between threads of one process. Local matches and
+tests can thus skip the TCP stack entirely.
+
+Every transport is addressed by (ip, port), as TCP is, so that
+they may be swapped without changing any callers.
+'''
+
+import abc
+from collections import deque
+import os
+import queue
+import socket
+import tempfile
+import threading
+from typing import Any, Callable, Deque, Dict, Optional, Protocol, Tuple
+
+
+Address = Tuple[str, int]
+
+# The names make_transport accepts
+TRANSPORT_NAMES: Tuple[str, ...] = ('tcp', 'unix', 'memory')
+
+
+class Connection(Protocol):
+    '''
+    One end of a connection. Sockets already satisfy this.
+    '''
+
+    def sendall(self, data: bytes) -> None:
+        '''
+        Sends all of the given bytes.
+        '''
+
+    def recv(self, size: int) -> bytes:
+        '''
+        Receives up to size bytes, or b'' if the other end has
+        closed.
+        '''
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        '''
+        Makes later calls raise TimeoutError after waiting this
+        many seconds, or never if None.
+        '''
+
+    def shutdown(self, how: int) -> None:
+        '''
+        Unblocks any call waiting on this connection.
+        '''
+
+    def close(self) -> None:
+        '''
+        Closes this connection.
+        '''
+
+
+class Listener(Protocol):
+    '''
+    Accepts connections. Sockets already satisfy this.
+    '''
+
+    def accept(self) -> Tuple[Connection, Any]:
+        '''
+        Waits for a connection.
+        '''
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        '''
+        Makes later accepts raise TimeoutError after waiting
+        this many seconds, or never if None.
+        '''
+
+    def shutdown(self, how: int) -> None:
+        '''
+        Unblocks any call waiting on this listener.
+        '''
+
+    def close(self) -> None:
+        '''
+        Stops accepting connections.
+        '''
+
+
+class Transport(abc.ABC):
+    '''
+    Opens connections. Subclasses decide how.
+    '''
+
+    @abc.abstractmethod
+    def listen(self, address: Address, backlog: int = 1) -> Tuple[Listener, Address]:
+        '''
+        Starts listening at the given address.
+
+        :param address: The (ip, port) to listen at. A port of
+            0 picks a free one.
+        :param backlog: The most connections to queue.
+        :returns: The listener, and the (ip, port) actually
+            being listened at.
+        '''
+
+    @abc.abstractmethod
+    def connect(self, address: Address) -> Connection:
+        '''
+        Connects to a listener.
+
+        :param address: The (ip, port) to connect to.
+        :returns: The new connection.
+        '''
+
+
+class TCPTransport(Transport):
+    '''
+    IPv4 TCP sockets. This is the default, and the only
+    transport which works between machines.
+    '''
+
+    def __init__(self,
+                 reuse_address: bool = False,
+                 send_buffer: Optional[int] = None,
+                 reuse_port: bool = False) -> None:
+        '''
+        :param reuse_address: Whether to set SO_REUSEADDR on
+            listeners, so that servers may restart immediately.
+        :param send_buffer: If given, the SO_SNDBUF of every
+            connection, in bytes. A smaller buffer bounds how
+            much is queued for a peer who is not reading, so
+            sending to them blocks (and times out) sooner.
+        :param reuse_port: Whether to set SO_REUSEPORT on
+            listeners, so that several processes may listen on
+            one port, the kernel spreading connections among
+            them. Not available on every platform.
+        '''
+
+        self.__reuse_address: bool = reuse_address
+        self.__send_buffer: Optional[int] = send_buffer
+        self.__reuse_port: bool = reuse_port
+
+    def listen(self, address: Address, backlog: int = 1) -> Tuple[Listener, Address]:
+        '''
+        Binds and listens on a new TCP socket.
+        '''
+
+        sock: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        if self.__reuse_address:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        if self.__reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        # Accepted connections inherit these
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        if self.__send_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.__send_buffer)
+
+        sock.bind(address)
+        sock.listen(backlog)
+
+        if address[1] == 0:
+            ip, port = sock.getsockname()[:2]
+            address = (ip, port)
+
+        return (sock, address)
+
+    def connect(self, address: Address) -> Connection:
+        '''
+        Connects a new TCP socket.
+        '''
+
+        sock: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        if self.__send_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.__send_buffer)
+
+        sock.connect(address)
+
+        return sock
+
+
+class UnixTransport(Transport):
+    '''
+    Unix domain sockets, for processes on the same machine. Each
+    (ip, port) maps to a socket file in a directory.
+    '''
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        '''
+        :param directory: Where to put socket files. Defaults to
+            the system's temporary directory.
+        :raises OSError: If this platform has no Unix domain
+            sockets.
+        '''
+
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError('Unix domain sockets are not supported here')
+
+        self.__directory: str = directory if directory is not None else tempfile.gettempdir()
+
+    def path(self, address: Address) -> str:
+        '''
+        :param address: An (ip, port).
+        :returns: The socket file for that address.
+        '''
+
+        ip, port = address
+        return os.path.join(self.__directory, f'stratego-{ip}-{port}.sock')
+
+    def listen(self, address: Address, backlog: int = 1) -> Tuple[Listener, Address]:
+        '''
+        Binds and listens on a new socket file. A port of 0 picks
+        the first port with no socket file. A socket file left
+        over by a process which died is replaced.
+        '''
+
+        if address[1] == 0:
+            port: int = 1
+            while os.path.exists(self.path((address[0], port))):
+                port += 1
+            address = (address[0], port)
+
+        path: str = self.path(address)
+        sock: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.bind(path)
+
+        except OSError:
+            if self.__is_live(path):
+                sock.close()
+                raise
+
+            os.unlink(path)
+            sock.bind(path)
+
+        sock.listen(backlog)
+
+        return (UnixListener(sock, path), address)
+
+    def connect(self, address: Address) -> Connection:
+        '''
+        Connects a new socket to a socket file.
+        '''
+
+        sock: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path(address))
+
+        return sock
+
+    @staticmethod
+    def __is_live(path: str) -> bool:
+        '''
+        :returns: Whether anything is listening at the given
+            socket file, as opposed to it being left over.
+        '''
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except OSError:
+                return False
+
+        return True
+
+
+class UnixListener:
+    '''
+    A listening Unix domain socket which removes its socket file
+    when closed.
+    '''
+
+    def __init__(self, sock: socket.socket, path: str) -> None:
+        '''
+        :param sock: The bound, listening socket.
+        :param path: Its socket file.
+        '''
+
+        self.__sock: socket.socket = sock
+        self.__path: Optional[str] = path
+
+    def accept(self) -> Tuple[Connection, Any]:
+        '''
+        Waits for a connection.
+        '''
+
+        return self.__sock.accept()
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        '''
+        Makes later accepts raise TimeoutError after waiting
+        this many seconds, or never if None.
+        '''
+
+        self.__sock.settimeout(timeout)
+
+    def shutdown(self, how: int) -> None:
+        '''
+        Unblocks any call waiting on this listener.
+        '''
+
+        self.__sock.shutdown(how)
+
+    def close(self) -> None:
+        '''
+        Stops accepting connections and removes the socket file.
+        '''
+
+        self.__sock.close()
+
+        if self.__path is not None:
+            try:
+                os.unlink(self.__path)
+            except OSError:
+                pass
+
+            self.__path = None
+
+
+class MemoryPipe:
+    '''
+    A one-way, in-memory stream of bytes between threads. Writes
+    are handed over whole via a queue, so a reader is woken
+    without any locking in Python. Like a socket's send buffer,
+    only so much may be waiting to be read before writes block.
+    '''
+
+    def __init__(self, capacity: int = 1 << 20) -> None:
+        '''
+        :param capacity: Bytes which may be waiting to be read
+            before writes block.
+        '''
+
+        # Each write, in order. None marks the end of the stream
+        self.__chunks: 'queue.SimpleQueue[Optional[bytes]]' = queue.SimpleQueue()
+
+        # What is left of a chunk which was partially read
+        self.__leftover: bytes = b''
+
+        self.__is_closed: bool = False
+
+        # Bytes written, but not yet taken by the reader
+        self.__capacity: int = capacity
+        self.__buffered: int = 0
+        self.__space: threading.Condition = threading.Condition()
+
+    def write(self, data: bytes, timeout: Optional[float] = None) -> None:
+        '''
+        Appends to the stream. Blocks while capacity bytes are
+        waiting to be read.
+
+        :param timeout: The most seconds to block, or None to
+            block forever.
+        :raises BrokenPipeError: If the stream is closed.
+        :raises TimeoutError: If the reader did not catch up in
+            time.
+        '''
+
+        with self.__space:
+            if not self.__space.wait_for(
+                    lambda: self.__buffered < self.__capacity or self.__is_closed, timeout):
+                raise TimeoutError('Timed out writing memory pipe')
+
+            if self.__is_closed:
+                raise BrokenPipeError('Memory pipe is closed')
+
+            self.__buffered += len(data)
+
+        self.__chunks.put(bytes(data))
+
+    def read(self, size: int, timeout: Optional[float] = None) -> bytes:
+        '''
+        Waits for, then removes, up to size bytes. Only one
+        thread may read.
+
+        :param timeout: The most seconds to wait, or None to
+            wait forever.
+        :returns: The bytes, or b'' once closed and empty.
+        :raises TimeoutError: If nothing arrived in time.
+        '''
+
+        if not self.__leftover:
+            try:
+                chunk: Optional[bytes] = self.__chunks.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError('Timed out reading memory pipe') from None
+
+            if chunk is None:
+                # Let any later reads see the end too
+                self.__chunks.put(None)
+                return b''
+
+            with self.__space:
+                self.__buffered -= len(chunk)
+                self.__space.notify_all()
+
+            self.__leftover = chunk
+
+        out: bytes = self.__leftover[:size]
+        self.__leftover = self.__leftover[size:]
+
+        return out
+
+    def close(self) -> None:
+        '''
+        Ends the stream, waking any waiting reader. Anything
+        already written may still be read.
+        '''
+
+        if not self.__is_closed:
+            self.__is_closed = True
+            self.__chunks.put(None)
+
+            # Wake any blocked writer, to fail
+            with self.__space:
+                self.__space.notify_all()
+
+
+class MemoryConnection:
+    '''
+    One end of an in-memory connection: A pair of pipes.
+    '''
+
+    def __init__(self, inbound: MemoryPipe, outbound: MemoryPipe) -> None:
+        '''
+        :param inbound: The pipe to receive from.
+        :param outbound: The pipe to send into.
+        '''
+
+        self.__inbound: MemoryPipe = inbound
+        self.__outbound: MemoryPipe = outbound
+        self.__timeout: Optional[float] = None
+
+    def sendall(self, data: bytes) -> None:
+        '''
+        Sends all of the given bytes, waiting for the other end
+        to catch up if it has fallen too far behind.
+        '''
+
+        self.__outbound.write(data, self.__timeout)
+
+    def recv(self, size: int) -> bytes:
+        '''
+        Receives up to size bytes, or b'' if closed.
+        '''
+
+        return self.__inbound.read(size, self.__timeout)
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        '''
+        Makes later sends and receives raise TimeoutError after
+        waiting this many seconds, or never if None.
+        '''
+
+        self.__timeout = timeout
+
+    def shutdown(self, _how: int) -> None:
+        '''
+        Closes both directions.
+        '''
+
+        self.close()
+
+    def close(self) -> None:
+        '''
+        Closes both directions.
+        '''
+
+        self.__inbound.close()
+        self.__outbound.close()
+
+
+class MemoryListener:
+    '''
+    Accepts in-memory connections.
+    '''
+
+    def __init__(self, on_close: Callable[[], None]) -> None:
+        '''
+        :param on_close: Called when closed.
+        '''
+
+        self.__on_close: Callable[[], None] = on_close
+        self.__pending: Deque[MemoryConnection] = deque()
+        self.__ready: threading.Condition = threading.Condition()
+        self.__is_closed: bool = False
+        self.__timeout: Optional[float] = None
+
+    def push(self, conn: MemoryConnection) -> None:
+        '''
+        Queues a connection to be accepted.
+
+        :raises ConnectionRefusedError: If closed.
+        '''
+
+        with self.__ready:
+            if self.__is_closed:
+                raise ConnectionRefusedError('Memory listener is closed')
+
+            self.__pending.append(conn)
+            self.__ready.notify()
+
+    def accept(self) -> Tuple[Connection, Any]:
+        '''
+        Waits for a connection.
+
+        :raises OSError: If closed while waiting.
+        :raises TimeoutError: If no one connected in time.
+        '''
+
+        with self.__ready:
+            if not self.__ready.wait_for(lambda: self.__pending or self.__is_closed,
+                                         self.__timeout):
+                raise TimeoutError('Timed out accepting memory connection')
+
+            if self.__is_closed:
+                raise OSError('Memory listener is closed')
+
+            return (self.__pending.popleft(), None)
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        '''
+        Makes later accepts raise TimeoutError after waiting
+        this many seconds, or never if None.
+        '''
+
+        self.__timeout = timeout
+
+    def shutdown(self, _how: int) -> None:
+        '''
+        Stops accepting connections.
+        '''
+
+        self.close()
+
+    def close(self) -> None:
+        '''
+        Stops accepting connections, waking any waiting accept.
+        '''
+
+        with self.__ready:
+            if self.__is_closed:
+                return
+
+            self.__is_closed = True
+            self.__ready.notify_all()
+
+        self.__on_close()
+
+
+class MemoryTransport(Transport):
+    '''
+    In-memory connections between threads of one process, for
+    local matches and tests. Both players must share the same
+    MemoryTransport.
+    '''
+
+    def __init__(self) -> None:
+        self.__lock: threading.Lock = threading.Lock()
+        self.__listeners: Dict[Address, MemoryListener] = {}
+
+    def listen(self, address: Address, backlog: int = 1) -> Tuple[Listener, Address]:
+        '''
+        Registers a new listener at the given address. A port of
+        0 picks the first free one.
+
+        :raises OSError: If the address is already in use.
+        '''
+
+        with self.__lock:
+            if address[1] == 0:
+                port: int = 1
+                while (address[0], port) in self.__listeners:
+                    port += 1
+                address = (address[0], port)
+
+            if address in self.__listeners:
+                raise OSError(f'Address {address} is already in use')
+
+            bound: Address = address
+            listener: MemoryListener = MemoryListener(lambda: self.__forget(bound))
+            self.__listeners[address] = listener
+
+        return (listener, address)
+
+    def connect(self, address: Address) -> Connection:
+        '''
+        Connects to a registered listener.
+
+        :raises ConnectionRefusedError: If nothing is listening.
+        '''
+
+        with self.__lock:
+            listener: Optional[MemoryListener] = self.__listeners.get(address)
+
+        if listener is None:
+            raise ConnectionRefusedError(f'Nothing is listening at {address}')
+
+        to_host: MemoryPipe = MemoryPipe()
+        to_joiner: MemoryPipe = MemoryPipe()
+
+        listener.push(MemoryConnection(to_host, to_joiner))
+        return MemoryConnection(to_joiner, to_host)
+
+    def __forget(self, address: Address) -> None:
+        '''
+        Unregisters a closed listener.
+        '''
+
+        with self.__lock:
+            self.__listeners.pop(address, None)
+
+
+class PrefixedConnection:
+    '''
+    A connection whose first bytes were already received, by
+    someone deciding what to do with it, and are received again.
+    '''
+
+    def __init__(self, conn: Connection, prefix: bytes) -> None:
+        '''
+        :param conn: The underlying connection.
+        :param prefix: The bytes already received from it.
+        '''
+
+        self.__conn: Connection = conn
+        self.__prefix: bytes = prefix
+
+    def sendall(self, data: bytes) -> None:
+        '''
+        Sends all of the given bytes.
+        '''
+
+        self.__conn.sendall(data)
+
+    def recv(self, size: int) -> bytes:
+        '''
+        Receives up to size bytes, the prefix first.
+        '''
+
+        if not self.__prefix:
+            return self.__conn.recv(size)
+
+        out: bytes = self.__prefix[:size]
+        self.__prefix = self.__prefix[size:]
+
+        return out
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        '''
+        Sets the underlying connection's timeout.
+        '''
+
+        self.__conn.settimeout(timeout)
+
+    def shutdown(self, how: int) -> None:
+        '''
+        Shuts down the underlying connection.
+        '''
+
+        self.__conn.shutdown(how)
+
+    def close(self) -> None:
+        '''
+        Closes the underlying connection.
+        '''
+
+        self.__conn.close()
+
+
+def recv_exact(conn: Connection, size: int) -> bytes:
+    '''
+    :param conn: The connection to receive from.
+    :param size: How many bytes to receive.
+    :returns: Exactly size bytes, even if they arrive in several
+        pieces.
+    :raises ConnectionError: If the connection closed first.
+    '''
+
+    out: bytes = b''
+
+    while len(out) < size:
+        chunk: bytes = conn.recv(size - len(out))
+        if not chunk:
+            raise ConnectionError('Connection closed')
+        out += chunk
+
+    return out
+
+
+def make_transport(name: str) -> Transport:
+    '''
+    Creates a transport by name, for command line options.
+
+    :param name: One of TRANSPORT_NAMES.
+    :returns: A new transport.
+    '''
+
+    if name == 'tcp':
+        return TCPTransport()
+
+    if name == 'unix':
+        return UnixTransport()
+
+    if name == 'memory':
+        return MemoryTransport()
+
+    raise ValueError(f'Unknown transport {name!r}')
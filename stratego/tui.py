@@ -0,0 +1,506 @@
+'''
+A terminal front end for OOP Stratego, drawn with curses. It plays
+the same game as StrategoGUI (hosting or joining, setup, then
+turns) over a StrategoNetworker, but needs no display and loads no
+images, so starts at once and runs over SSH.
+
+Squares are named by column letter and row number, as in c3, and a
+move is typed as its origin then its destination: c3 c4.
+
+Usage: python -m stratego.tui
+'''
+
+import argparse
+import curses
+import random
+from typing import Callable, Dict, List, Literal, Optional, Sequence, Tuple, TypeVar
+
+import stratego.board as b
+from stratego.bot import random_setup
+from stratego.network import NetworkTask, StrategoNetworker
+import stratego.pieces as p
+
+T = TypeVar('T')
+
+Screen = Literal['HOME', 'HOST_GAME', 'JOIN_GAME', 'SETUP',
+                 'YOUR_TURN', 'THEIR_TURN', 'WIN', 'LOSE', 'ERROR']
+
+_COLUMNS: str = 'abcdefghij'
+
+# Curses color pairs, by player color
+_PAIRS: Dict[str, int] = {'RED': 1, 'BLUE': 2}
+
+_ENTER_KEYS: Tuple[int, ...] = (10, 13, curses.KEY_ENTER)
+_BACKSPACE_KEYS: Tuple[int, ...] = (8, 127, curses.KEY_BACKSPACE)
+
+
+def glyph(square: b.Square, color: Literal['RED', 'BLUE']) -> str:
+    '''
+    :param square: What is on the square.
+    :param color: Whose view this is. The other color's pieces
+        are hidden.
+    :returns: The character showing the square.
+    '''
+
+    if isinstance(square, b.LakeSquare):
+        return '~'
+
+    if isinstance(square, p.Piece):
+        return repr(square) if square.color == color else '?'
+
+    return '.'
+
+
+def render(board: b.Board, color: Literal['RED', 'BLUE']) -> List[str]:
+    '''
+    Draws the board as text, with column letters above and row
+    numbers alongside.
+
+    :param board: The board to draw.
+    :param color: Whose view this is.
+    :returns: The lines of text.
+    '''
+
+    lines: List[str] = ['   ' + ' '.join(_COLUMNS[:board.width])]
+
+    for y in range(board.height):
+        lines.append(f'{y:>2} ' + ' '.join(glyph(board.get(x, y), color)
+                                           for x in range(board.width)))
+
+    return lines
+
+
+def parse_square(text: str) -> Tuple[int, int]:
+    '''
+    :param text: A square, as in c3.
+    :returns: Its (x, y).
+    :raises ValueError: If this names no square.
+    '''
+
+    text = text.strip().lower()
+
+    if len(text) < 2 or text[0] not in _COLUMNS or not text[1:].isdigit():
+        raise ValueError(f'Not a square: {text!r}')
+
+    return (_COLUMNS.index(text[0]), int(text[1:]))
+
+
+def parse_move(text: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    '''
+    :param text: A move, as in c3 c4.
+    :returns: Its (from, to).
+    :raises ValueError: If this is not two squares.
+    '''
+
+    words: List[str] = text.split()
+
+    if len(words) != 2:
+        raise ValueError(f'Not a move: {text!r}')
+
+    return (parse_square(words[0]), parse_square(words[1]))
+
+
+class _Cancelled(Exception):
+    '''
+    Raised when the player gives up waiting on the network.
+    '''
+
+
+class StrategoTUI:
+    '''
+    A Stratego game played in a curses window. Like the GUI, it
+    moves between screens, but each screen runs until it knows
+    the next, which run() then moves to.
+    '''
+
+    _POLL_MS: int = 50
+
+    def __init__(self,
+                 window: 'curses.window',
+                 networking: Optional[StrategoNetworker] = None,
+                 colors: bool = False,
+                 rng: Optional[random.Random] = None) -> None:
+        '''
+        :param window: The window to draw in and read keys from.
+        :param networking: How to reach the other player.
+            Defaults to a new networker.
+        :param colors: Whether to color pieces by player. Needs
+            the color pairs that main sets up.
+        :param rng: Where random setups come from.
+        '''
+
+        self.__window: 'curses.window' = window
+        self.__networking: StrategoNetworker = networking if networking is not None else \
+            StrategoNetworker.detached()
+        self.__colors: bool = colors
+        self.__rng: random.Random = rng if rng is not None else random.Random()
+
+        self.__board: b.Board = b.Board.detached()
+        self.__color: Literal['RED', 'BLUE'] = 'RED'
+        self.__screen: Optional[Screen] = None
+
+        # Shown under the next thing drawn, once
+        self.__message: str = ''
+
+        self.__screens: Dict[Screen, Callable[[], Optional[Screen]]] = {
+            'HOME': self.__home_screen,
+            'HOST_GAME': self.__host_game_screen,
+            'JOIN_GAME': self.__join_game_screen,
+            'SETUP': self.__setup_screen,
+            'YOUR_TURN': self.__your_turn_screen,
+            'THEIR_TURN': self.__their_turn_screen,
+            'WIN': lambda: self.__game_over_screen('You win!'),
+            'LOSE': lambda: self.__game_over_screen('You lose...'),
+            'ERROR': self.__error_screen
+        }
+
+    @property
+    def screen(self) -> Optional[Screen]:
+        '''
+        :returns: The screen being shown, if any.
+        '''
+
+        return self.__screen
+
+    @property
+    def color(self) -> Literal['RED', 'BLUE']:
+        '''
+        :returns: The color of the player.
+        '''
+
+        return self.__color
+
+    @property
+    def board(self) -> b.Board:
+        '''
+        :returns: The board.
+        '''
+
+        return self.__board
+
+    def run(self, screen: Screen = 'HOME') -> None:
+        '''
+        Plays until the player quits. A networking error moves
+        to the error screen, and giving up on the network goes
+        home.
+
+        :param screen: The screen to start on.
+        '''
+
+        to: Optional[Screen] = screen
+
+        while to is not None:
+            self.__screen = to
+
+            try:
+                to = self.__screens[to]()
+
+            except _Cancelled:
+                self.__networking.close_game()
+                to = 'HOME'
+
+            except (ValueError, OSError):
+                to = 'ERROR'
+
+        self.__screen = None
+        self.__networking.close_game()
+
+    def __home_screen(self) -> Optional[Screen]:
+        '''
+        Offers to host, join or quit.
+        '''
+
+        self.__draw(['Stratego', '', 'h: Host game', 'j: Join game', 'q: Quit'])
+
+        keys: Dict[str, Optional[Screen]] = {'h': 'HOST_GAME', 'j': 'JOIN_GAME', 'q': None}
+        return keys[self.__read_key(tuple(keys))]
+
+    def __host_game_screen(self) -> Optional[Screen]:
+        '''
+        Hosts a game, then waits for the other player to join.
+        '''
+
+        self.__draw(['Host game'])
+        ip: str = self.__read_line('IP: ') or '127.0.0.1'
+        port: int = int(self.__read_line('Port: ') or '12345')
+
+        # Move up a port at a time until one is free, as the GUI
+        # does
+        while True:
+            try:
+                password: str = self.__networking.host_game(ip, port)
+                break
+            except OSError:
+                port += 1
+
+        self.__draw([f'IP: {ip}', f'Port: {port}', f'Password: {password}', '',
+                     'Waiting for other player... (q: Cancel)'])
+        self.__await(self.__networking.host_wait_for_join)
+
+        self.__color = 'RED'
+        return 'SETUP'
+
+    def __join_game_screen(self) -> Optional[Screen]:
+        '''
+        Joins a hosted game.
+        '''
+
+        self.__draw(['Join game'])
+        ip: str = self.__read_line('IP: ') or '127.0.0.1'
+        port: int = int(self.__read_line('Port: ') or '12345')
+        password: str = self.__read_line('Password: ')
+
+        self.__draw(['Connecting... (q: Cancel)'])
+
+        if self.__await(lambda: self.__networking.join_game(ip, port, password)) != 0:
+            self.__message = 'Failed to join.'
+            return 'HOME'
+
+        self.__color = 'BLUE'
+        return 'SETUP'
+
+    def __setup_screen(self) -> Optional[Screen]:
+        '''
+        Deals a random setup, which the player may deal again
+        until happy, then swaps setups with the other player.
+        '''
+
+        other: Literal['RED', 'BLUE'] = 'BLUE' if self.__color == 'RED' else 'RED'
+
+        self.__board.reset()
+        random_setup(self.__board, self.__color, self.__rng)
+
+        while True:
+            self.__draw(self.__board_lines('Your setup. r: Deal again, Enter: Play'))
+
+            if self.__read_key(('r', '\n')) == '\n':
+                break
+
+            self.__board.reset()
+            random_setup(self.__board, self.__color, self.__rng)
+
+        self.__draw(self.__board_lines('Waiting for their setup... (q: Cancel)'))
+
+        self.__networking.send_setup(self.__board, self.__color)
+        self.__board.place_setup(other, self.__await(self.__networking.recv_setup))
+
+        return 'YOUR_TURN' if self.__color == 'RED' else 'THEIR_TURN'
+
+    def __your_turn_screen(self) -> Optional[Screen]:
+        '''
+        Reads our move until it is a legal one, then sends it.
+        '''
+
+        moves: b.MoveMap = self.__board.legal_moves(self.__color)
+
+        while True:
+            self.__draw(self.__board_lines('Your turn. Move as in c3 c4, or q to leave.'))
+            text: str = self.__read_line('Move: ')
+
+            if text.strip().lower() == 'q':
+                raise _Cancelled()
+
+            try:
+                origin, destination = parse_move(text)
+            except ValueError:
+                self.__message = 'Type a move as in c3 c4.'
+                continue
+
+            if destination in moves.get(origin, []):
+                break
+
+            self.__message = 'Invalid move.'
+
+        state = self.__board.move(self.__color, origin, destination)
+
+        self.__draw(self.__board_lines('Sending...'))
+        board: b.Board = self.__board
+        self.__await(lambda: self.__networking.send_game(board, state))
+
+        return 'WIN' if state == self.__color else 'THEIR_TURN'
+
+    def __their_turn_screen(self) -> Optional[Screen]:
+        '''
+        Waits for the other player's move.
+        '''
+
+        self.__draw(self.__board_lines('Their turn; Waiting. (q: Leave)'))
+        self.__board, state = self.__await(self.__networking.recv_game)
+
+        return 'YOUR_TURN' if state == 'GOOD' else 'LOSE'
+
+    def __game_over_screen(self, text: str) -> Optional[Screen]:
+        '''
+        Offers a rematch over the same connection.
+
+        :param text: Who won.
+        '''
+
+        self.__draw(self.__board_lines(text) + ['', 'a: Play again, h: Home, q: Quit'])
+        key: str = self.__read_key(('a', 'h', 'q'))
+
+        if key == 'a':
+            self.__draw(['Waiting for other player... (q: Cancel)'])
+
+            if self.__await(self.__networking.rematch):
+                return 'SETUP'
+
+            self.__message = 'They left.'
+
+        self.__networking.close_game()
+        return None if key == 'q' else 'HOME'
+
+    def __error_screen(self) -> Optional[Screen]:
+        '''
+        Shown when the connection is lost.
+        '''
+
+        self.__networking.close_game()
+
+        self.__draw(['Error: Connection terminated.', '', 'Press any key.'])
+        self.__read_key(None)
+
+        return 'HOME'
+
+    def __board_lines(self, status: str) -> List[str]:
+        '''
+        :returns: The status above the board, from our view.
+        '''
+
+        return [f'{self.__color}: {status}', ''] + render(self.__board, self.__color)
+
+    def __draw(self, lines: List[str]) -> None:
+        '''
+        Replaces the window's text, coloring pieces if able.
+        Any message is shown below, then forgotten.
+
+        :param lines: The text.
+        '''
+
+        self.__window.erase()
+
+        for y, line in enumerate(lines + ['', self.__message]):
+            self.__window.addstr(y, 0, line)
+
+        self.__message = ''
+
+        if self.__colors:
+            self.__color_pieces(lines)
+
+        self.__window.refresh()
+
+    def __color_pieces(self, lines: List[str]) -> None:
+        '''
+        Colors each piece on the drawn board by its player.
+        '''
+
+        top: int = len(lines) - self.__board.height
+
+        for y in range(self.__board.height):
+            for x in range(self.__board.width):
+                square: b.Square = self.__board.get(x, y)
+
+                if isinstance(square, p.Piece):
+                    self.__window.chgat(top + y, 3 + 2 * x, 1,
+                                        curses.color_pair(_PAIRS[square.color]))
+
+    def __read_key(self, allowed: Optional[Sequence[str]]) -> str:
+        '''
+        Waits for a key press.
+
+        :param allowed: The keys to accept, or None for any.
+            Enter is '\\n'.
+        :returns: The key pressed.
+        '''
+
+        self.__window.timeout(-1)
+
+        while True:
+            code: int = self.__window.getch()
+            key: str = '\n' if code in _ENTER_KEYS else chr(code) if 0 <= code < 256 else ''
+
+            if allowed is None or key in allowed:
+                return key
+
+    def __read_line(self, prompt: str) -> str:
+        '''
+        Reads a line of text, echoing it after the prompt, on
+        the last line drawn.
+
+        :param prompt: What to ask.
+        :returns: The text, without the Enter.
+        '''
+
+        y: int = self.__window.getyx()[0] + 1
+        text: str = ''
+        self.__window.timeout(-1)
+
+        while True:
+            self.__window.move(y, 0)
+            self.__window.clrtoeol()
+            self.__window.addstr(y, 0, prompt + text)
+            self.__window.refresh()
+
+            code: int = self.__window.getch()
+
+            if code in _ENTER_KEYS:
+                return text
+
+            if code in _BACKSPACE_KEYS:
+                text = text[:-1]
+            elif 32 <= code < 127:
+                text += chr(code)
+
+    def __await(self, call: Callable[[], T]) -> T:
+        '''
+        Runs a blocking networking call in the background,
+        while watching for q to give up on it.
+
+        :param call: The blocking call.
+        :returns: What it returned.
+        :raises _Cancelled: If q was pressed first, in which case
+            the call is aborted.
+        '''
+
+        task: NetworkTask[T] = NetworkTask(call)
+        task.start()
+
+        self.__window.timeout(self._POLL_MS)
+
+        try:
+            while not task.done():
+                if self.__window.getch() == ord('q'):
+                    task.cancel()
+                    self.__networking.cancel()
+                    raise _Cancelled()
+
+        finally:
+            self.__window.timeout(-1)
+
+        return task.result()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    '''
+    Command line entry point.
+    '''
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--no-color', action='store_true', help='draw in one color')
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    def play(window: 'curses.window') -> None:
+        colors: bool = curses.has_colors() and not args.no_color
+
+        if colors:
+            curses.use_default_colors()
+            curses.init_pair(_PAIRS['RED'], curses.COLOR_RED, -1)
+            curses.init_pair(_PAIRS['BLUE'], curses.COLOR_BLUE, -1)
+
+        StrategoTUI(window, colors=colors).run()
+
+    curses.wrapper(play)
+
+
+if __name__ == '__main__':
+    main()
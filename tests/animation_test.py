@@ -0,0 +1,154 @@
+'''
+Tests the board animations.
+'''
+
+from typing import Callable, List, Literal, Tuple
+import unittest
+from unittest import mock
+
+from stratego import animation as a
+from stratego import board as b
+from stratego import boardview as bv
+from stratego import pieces as p
+
+Square = Tuple[int, int]
+
+
+class Clock:
+    '''
+    A clock which only moves when told to, or by a fixed step
+    every time it is read.
+    '''
+
+    def __init__(self, step: float = 0.0) -> None:
+        self.now: float = 0.0
+        self.step: float = step
+
+    def __call__(self) -> float:
+        now: float = self.now
+        self.now += self.step
+
+        return now
+
+
+class TestAnimation(unittest.TestCase):
+    '''
+    Tests the stratego.animation module.
+    '''
+
+    def setUp(self) -> None:
+        '''
+        Makes a board view to animate on, and an animator whose
+        frames are run by hand.
+        '''
+
+        self.view = mock.MagicMock(spec=bv.CanvasBoard)
+        self.view.size = 32
+        self.view.canvas = mock.MagicMock()
+        self.view.item.side_effect = lambda x, y: 100 + 10 * y + x
+
+        self.frames: List[Callable[[], None]] = []
+        self.clock: Clock = Clock()
+        self.animator: a.Animator = a.Animator(lambda _, frame: self.frames.append(frame),
+                                               self.clock)
+
+    def run_frame(self, at: float) -> None:
+        '''
+        Runs the next scheduled frame at the given time.
+        '''
+
+        self.clock.now = at
+        self.frames.pop(0)()
+
+    def test_slide(self) -> None:
+        '''
+        Tests that a slide moves the piece from its origin by
+        the time elapsed, then puts it back on its square.
+        '''
+
+        self.animator.add(a.Slide(self.view, (0, 0), (0, 2)))
+        canvas: mock.MagicMock = self.view.canvas
+
+        canvas.tag_raise.assert_called_once_with(120)
+        canvas.coords.assert_called_with(120, 0, 0)
+        self.assertEqual(len(self.frames), 1)
+
+        self.run_frame(0.075)
+        canvas.coords.assert_called_with(120, 0.0, 48.0)
+        self.assertEqual(len(self.frames), 1)
+
+        self.run_frame(1.0)
+        canvas.coords.assert_called_with(120, 0, 64)
+        self.assertEqual(self.frames, [])
+        self.assertEqual(self.animator.running, 0)
+        self.assertEqual(self.animator.frames, 2)
+
+    def test_skip_when_behind(self) -> None:
+        '''
+        Tests that late frames are counted as skipped, and that
+        steps past a frame's budget are dropped.
+        '''
+
+        for _ in range(3):
+            self.animator.add(a.Capture(self.view, (1, 1), mock.MagicMock(), duration=1.0))
+
+        self.assertEqual(len(self.frames), 1)
+
+        self.run_frame(0.1)
+        self.run_frame(0.2)
+        self.assertEqual(self.animator.frames_skipped, 5)
+
+        # Each read of the clock now takes up the whole budget
+        self.clock.step = 1.0
+        self.run_frame(0.3)
+
+        self.assertEqual(self.animator.steps_dropped, 3)
+        self.assertEqual(self.animator.running, 3)
+
+        self.animator.finish_all()
+        self.assertEqual(self.animator.running, 0)
+        self.assertEqual(self.view.canvas.delete.call_count, 3)
+
+        # The frame already scheduled finds nothing to do
+        self.run_frame(0.4)
+        self.assertEqual(self.frames, [])
+
+    def test_animate_move(self) -> None:
+        '''
+        Tests finding what to animate from the boards before and
+        after a move.
+        '''
+
+        before: b.Board = b.Board.detached()
+        before.set_piece(0, 0, p.Troop('RED', 5))
+        before.set_piece(0, 1, p.Troop('BLUE', 4))
+        before.set_piece(2, 0, p.Troop('RED', 5))
+        before.set_piece(2, 1, p.Troop('BLUE', 5))
+
+        cases: List[Tuple[Literal['RED', 'BLUE'], Square, Square, List[type]]] = [
+            ('RED', (0, 0), (1, 0), [a.Slide]),
+            ('RED', (0, 0), (0, 1), [a.Reveal, a.Slide]),
+            ('BLUE', (0, 1), (0, 0), [a.Capture]),
+            ('RED', (2, 0), (2, 1), [a.Capture, a.Capture])
+        ]
+
+        for color, origin, destination, kinds in cases:
+            after: b.Board = b.Board.decode(before.encode())
+            after.move(color, origin, destination)
+
+            with mock.patch.object(self.animator, 'add') as add:
+                self.assertTrue(a.animate_move(self.animator, self.view, before, after,
+                                               lambda _: mock.MagicMock()))
+
+            added: List[a.Animation] = [call.args[0] for call in add.call_args_list]
+            self.assertEqual([type(animation) for animation in added], kinds)
+
+            # The winner slides in once the defender has been shown
+            if kinds == [a.Reveal, a.Slide]:
+                self.assertEqual(added[1].delay, added[0].duration)
+
+        after = b.Board.decode(before.encode())
+        after.set_piece(5, 5, p.Scout('RED'))
+
+        self.assertFalse(a.animate_move(self.animator, self.view, before, after,
+                                        lambda _: mock.MagicMock()))
@@ -241,3 +241,125 @@ class TestBoard(unittest.TestCase):
         # Ensure you cannot take your own flag
         with self.assertRaises(b.InvalidMoveError):
             board.move('RED', (0, 1), (0, 0))
+
+    def test_detached(self) -> None:
+        '''
+        Tests making boards which are not the singleton.
+        '''
+
+        board: b.Board = b.Board.get_instance()
+        other: b.Board = b.Board.detached()
+
+        self.assertIsNot(board, other)
+        self.assertIs(b.Board.get_instance(), board)
+
+        self.assertIsInstance(other.get(2, 4), b.LakeSquare)
+        self.assertIsInstance(other.get(7, 5), b.LakeSquare)
+        self.assertIsNone(other.get(0, 0))
+
+    def test_reset(self) -> None:
+        '''
+        Tests resetting a board for a new game.
+        '''
+
+        board: b.Board = b.Board.detached()
+        board.set_piece(0, 0, p.Scout('RED'))
+        board.clear()
+        board.set_piece(1, 1, p.Scout('BLUE'))
+
+        board.reset()
+
+        self.assertEqual(board.encode(), b.Board.detached().encode())
+
+    def test_setup(self) -> None:
+        '''
+        Tests sending only a setup, and placing it on another
+        board.
+        '''
+
+        pieces: List[p.Piece] = b.Board.all_pieces('BLUE')
+
+        theirs: b.Board = b.Board.detached()
+        theirs.fill((0, 6), (10, 10), lambda _, __: pieces.pop())
+        theirs.set_piece(0, 0, p.Scout('RED'))
+
+        data: bytes = theirs.encode_setup('BLUE')
+        self.assertEqual(len(data), 40)
+
+        ours: b.Board = b.Board.detached()
+        ours.set_piece(0, 0, p.Spy('RED'))
+        ours.set_piece(0, 9, p.Spy('RED'))
+        ours.place_setup('BLUE', data)
+
+        self.assertEqual(ours.encode()[40:], theirs.encode()[40:])
+        self.assertIsInstance(ours.get(0, 0), p.Spy)
+
+        # Anything but exactly their 40 pieces is refused
+        for bad in (data[:-1], b'\x00' + data[1:], theirs.encode_setup('RED')):
+            with self.assertRaises(ValueError):
+                ours.place_setup('BLUE', bad)
+
+    def test_legal_moves(self) -> None:
+        '''
+        Tests listing all legal moves, and that each of them is
+        accepted by move().
+        '''
+
+        board: b.Board = b.Board.detached()
+
+        board.set_piece(0, 0, p.Scout('RED'))
+        board.set_piece(0, 3, p.Troop('BLUE', 5))
+        board.set_piece(1, 0, p.Bomb('RED'))
+        board.set_piece(2, 3, p.Troop('RED', 5))
+        board.set_piece(9, 9, p.Flag('RED'))
+
+        moves = board.legal_moves('RED')
+
+        # Bombs and flags cannot move
+        self.assertNotIn((1, 0), moves)
+        self.assertNotIn((9, 9), moves)
+
+        # Scouts move until blocked, capturing the blocker
+        self.assertEqual(sorted(moves[(0, 0)]), [(0, 1), (0, 2), (0, 3)])
+
+        # Troops move one square, but not into lakes
+        self.assertEqual(sorted(moves[(2, 3)]), [(1, 3), (2, 2), (3, 3)])
+
+        self.assertEqual(list(board.legal_moves('BLUE')), [(0, 3)])
+
+        for origin, destinations in moves.items():
+            for destination in destinations:
+                trial: b.Board = b.Board.detached()
+                trial.fill((0, 0), (10, 10), board.get)
+                trial.move('RED', origin, destination)
+
+    def test_version(self) -> None:
+        '''
+        Tests that a board's version changes with it, and only
+        with it.
+        '''
+
+        board: b.Board = b.Board.detached()
+        other: b.Board = b.Board.detached()
+        self.assertNotEqual(board.version, other.version)
+
+        version: int = board.version
+        board.get(0, 0)
+        board.legal_moves('RED')
+        board.encode()
+        self.assertEqual(board.version, version)
+
+        board.set_piece(0, 0, p.Scout('RED'))
+        self.assertNotEqual(board.version, version)
+
+        version = board.version
+        board.move('RED', (0, 0), (0, 3))
+        self.assertNotEqual(board.version, version)
+
+        version = board.version
+        with self.assertRaises(b.InvalidMoveError):
+            board.move('RED', (0, 3), (1, 4))
+        self.assertEqual(board.version, version)
+
+        board.reset()
+        self.assertNotEqual(board.version, version)
@@ -0,0 +1,69 @@
+'''
+Tests the board renderers.
+'''
+
+import tkinter as tk
+from typing import List, Tuple
+import unittest
+
+from stratego import boardview as v
+
+
+class TestBoardView(unittest.TestCase):
+    '''
+    Tests stratego.boardview.
+    '''
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        '''
+        Connects to the virtual X display.
+        '''
+
+        cls.root = tk.Tk()
+
+    def test_views(self) -> None:
+        '''
+        Tests that each renderer redraws only changed squares,
+        highlights, and reports clicks on the board.
+        '''
+
+        images: List[tk.PhotoImage] = [tk.PhotoImage(width=8, height=8) for _ in range(2)]
+
+        for name in v.VIEW_NAMES:
+            view: v.BoardView = v.make_view(name, self.root, 12, 3, 8)
+            clicks: List[Tuple[int, int]] = []
+            view.on_click = lambda x, y: clicks.append((x, y))
+
+            self.assertTrue(view.show(11, 2, images[0]))
+            self.assertFalse(view.show(11, 2, images[0]))
+            self.assertTrue(view.show(11, 2, images[1]))
+
+            view.highlight([(0, 0), (1, 0)])
+            view.highlight([(1, 0), (2, 0)])
+            self.assertEqual(view.highlighted, {(1, 0), (2, 0)})
+            view.highlight([])
+            self.assertEqual(view.highlighted, set())
+
+            view.click(11, 2)
+            view.click(12, 2)
+            view.click(-1, 0)
+            self.assertEqual(clicks, [(11, 2)])
+
+            view.widget.destroy()
+
+        with self.assertRaises(ValueError):
+            v.make_view('pixels', self.root, 1, 1, 8)
+
+    def test_canvas(self) -> None:
+        '''
+        Tests that the canvas maps pixels to squares.
+        '''
+
+        view: v.CanvasBoard = v.CanvasBoard(self.root, 10, 10, 32)
+
+        self.assertEqual(view.square_at(0, 0), (0, 0))
+        self.assertEqual(view.square_at(31, 32), (0, 1))
+        self.assertEqual(view.square_at(319, 100), (9, 3))
+
+        view.widget.destroy()
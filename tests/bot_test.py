@@ -0,0 +1,142 @@
+'''
+Tests the headless Stratego players.
+'''
+
+import random
+import unittest
+from unittest import mock
+from typing import List, Tuple
+
+from stratego import board as b
+from stratego import bot
+from stratego import pieces as p
+from stratego import transport as t
+
+
+class FakeNet:
+    '''
+    Stands in for a connected networker, replaying a fixed list
+    of received games.
+    '''
+
+    def __init__(self, to_recv: List[Tuple[b.Board, str]]) -> None:
+        self.to_recv = to_recv
+        self.sent: List[str] = []
+        self.color: str = 'RED'
+
+    def recv_game(self) -> Tuple[b.Board, str]:
+        '''
+        Dummy function.
+        '''
+
+        return self.to_recv.pop(0)
+
+    def send_game(self, _: b.Board, state: str) -> None:
+        '''
+        Dummy function.
+        '''
+
+        self.sent.append(state)
+
+    def send_setup(self, _: b.Board, color: str) -> None:
+        '''
+        Dummy function.
+        '''
+
+        self.color = color
+        self.sent.append('SETUP')
+
+    def recv_setup(self) -> bytes:
+        '''
+        Replays the other color's setup from the next game.
+        '''
+
+        board, _ = self.to_recv.pop(0)
+        return board.encode_setup('BLUE' if self.color == 'RED' else 'RED')
+
+
+class TestBot(unittest.TestCase):
+    '''
+    Tests the stratego.bot module.
+    '''
+
+    def test_random_setup(self) -> None:
+        '''
+        Tests that setup fills exactly the right rows.
+        '''
+
+        for color, rows in bot.SETUP_ROWS.items():
+            board: b.Board = b.Board.detached()
+            bot.random_setup(board, color, random.Random(0))
+
+            for y in range(10):
+                for x in range(10):
+                    square: b.Square = board.get(x, y)
+
+                    if y in range(*rows):
+                        self.assertIsInstance(square, p.Piece)
+                        self.assertEqual(square.color, color)
+
+                    else:
+                        self.assertNotIsInstance(square, p.Piece)
+
+    def test_random_move(self) -> None:
+        '''
+        Tests picking random moves.
+        '''
+
+        board: b.Board = b.Board.detached()
+        self.assertIsNone(bot.random_move(board, 'RED', random.Random(0)))
+
+        board.set_piece(0, 0, p.Troop('RED', 5))
+        move = bot.random_move(board, 'RED', random.Random(0))
+
+        self.assertIsNotNone(move)
+        self.assertIn(move, [((0, 0), (1, 0)), ((0, 0), (0, 1))])
+
+    def test_play(self) -> None:
+        '''
+        Tests playing a game until the turn limit is reached.
+        '''
+
+        for color in ['RED', 'BLUE']:
+
+            board: b.Board = b.Board.detached()
+            bot.random_setup(board, 'RED', random.Random(1))
+            bot.random_setup(board, 'BLUE', random.Random(2))
+
+            net: FakeNet = FakeNet([(board, 'GOOD')] * 100)
+
+            player: bot.RandomBot = bot.RandomBot(net, color, seed=3, max_turns=5)
+
+            with mock.patch.object(b.Board, 'move', return_value='GOOD'):
+                self.assertEqual(player.play(), 'HALT')
+
+            self.assertEqual(player.moves, 5)
+            self.assertEqual(len(player.round_trips), 5)
+            self.assertEqual(net.sent[0], 'SETUP')
+            self.assertEqual(net.sent[-1], 'HALT')
+
+    def test_play_lose(self) -> None:
+        '''
+        Tests that the bot stops when the other player wins.
+        '''
+
+        board: b.Board = b.Board.detached()
+        bot.random_setup(board, 'RED', random.Random(0))
+
+        net: FakeNet = FakeNet([(board, 'GOOD'), (board, 'RED')])
+
+        player: bot.RandomBot = bot.RandomBot(net, 'BLUE', seed=0)
+        self.assertEqual(player.play(), 'RED')
+
+    def test_local_match(self) -> None:
+        '''
+        Tests playing a whole game between two bots in memory.
+        '''
+
+        red, blue = bot.local_match(seed=0, max_turns=20, transport=t.MemoryTransport())
+
+        self.assertLessEqual(red.moves, 20)
+        self.assertLessEqual(blue.moves, 20)
+        self.assertGreater(red.moves, 0)
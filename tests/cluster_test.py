@@ -0,0 +1,119 @@
+'''
+Tests sharding the game server across processes.
+'''
+
+import threading
+import time
+from typing import Dict, List, Optional
+import unittest
+
+from stratego import cluster as c
+from stratego import loadtest
+from stratego import network as n
+from stratego import server as s
+from stratego import transport as t
+
+
+class TestCluster(unittest.TestCase):
+    '''
+    Tests stratego.cluster, and redirecting joiners.
+    '''
+
+    def test_hash_ring(self) -> None:
+        '''
+        Tests that names spread evenly, and that adding a node
+        only moves names onto it.
+        '''
+
+        names: List[str] = [f'{i:04X}' for i in range(4000)]
+
+        three: c.HashRing = c.HashRing(3)
+        four: c.HashRing = c.HashRing(4)
+
+        counts: Dict[int, int] = {}
+        for name in names:
+            counts[three.node_for(name)] = counts.get(three.node_for(name), 0) + 1
+
+        self.assertEqual(sorted(counts), [0, 1, 2])
+        self.assertGreater(min(counts.values()), len(names) / 3 * 0.7)
+
+        moved: List[str] = [name for name in names
+                            if three.node_for(name) != four.node_for(name)]
+
+        self.assertTrue(all(four.node_for(name) == 3 for name in moved))
+        self.assertLess(len(moved), len(names) / 4 * 1.3)
+
+    def test_redirect(self) -> None:
+        '''
+        Tests that a joiner is redirected to the server which
+        owns their game, and plays there.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+        owner: s.GameServer = s.GameServer('127.0.0.1', 0, None, max_turns=1, transport=local)
+
+        def router(name: str) -> Optional[t.Address]:
+            return owner.address if name == 'AAAA' else None
+
+        front: s.GameServer = s.GameServer('127.0.0.1', 0, None, max_turns=1,
+                                           transport=local, router=router)
+
+        net: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+        try:
+            for server in (owner, front):
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            self.assertEqual(net.join_game(*front.address, 'AAAA'), 0)
+
+            start: float = time.monotonic()
+            while owner.games_started < 1:
+                self.assertLess(time.monotonic() - start, 5.0)
+                time.sleep(0.001)
+
+            self.assertEqual(front.redirects, 1)
+            self.assertEqual(front.games_started, 0)
+
+        finally:
+            net.close_game()
+            owner.shutdown(1.0)
+            front.shutdown(1.0)
+
+    def test_advertise(self) -> None:
+        '''
+        Tests that joiners are redirected to the advertised
+        address rather than the one bound, and that settings
+        which would break sharding are refused.
+        '''
+
+        router: s.Router = c._router(0, '192.0.2.1', [1001, 1002])
+        owners: List[Optional[t.Address]] = [router(f'{i:04X}') for i in range(100)]
+
+        self.assertIn(None, owners)
+        self.assertIn(('192.0.2.1', 1002), owners)
+        self.assertNotIn(('192.0.2.1', 1001), owners)
+
+        cluster: c.Cluster = c.Cluster('0.0.0.0', 0, 2, advertise='192.0.2.1')
+
+        try:
+            self.assertEqual(cluster.address[0], '192.0.2.1')
+            self.assertEqual({ip for ip, _ in cluster.worker_addresses}, {'192.0.2.1'})
+        finally:
+            cluster.shutdown()
+
+        with self.assertRaises(ValueError):
+            c.Cluster('0.0.0.0', 0, 2)
+
+        with self.assertRaises(ValueError):
+            c.Cluster('127.0.0.1', 0, 2, password='AAAA')
+
+    def test_cluster(self) -> None:
+        '''
+        Runs a small load test against a cluster of workers.
+        '''
+
+        report: loadtest.LoadReport = loadtest.run_load_test(4, max_turns=5, timeout=60.0,
+                                                             workers=2)
+
+        self.assertEqual(report.errors, 0)
+        self.assertGreater(report.moves, 0)
@@ -0,0 +1,73 @@
+'''
+Tests payload compression for Stratego.
+'''
+
+import unittest
+
+from stratego import board as b
+from stratego import codec as c
+from stratego import pieces as p
+
+
+class TestCodec(unittest.TestCase):
+    '''
+    Tests the stratego.codec module.
+    '''
+
+    def test_round_trip(self) -> None:
+        '''
+        Tests that every codec restores boards, and that zlib
+        shrinks them most against the previous board.
+        '''
+
+        board: b.Board = b.Board.detached()
+        board.fill((0, 0), (10, 4), lambda x, y: p.Scout('RED') if (x + y) % 2 else p.Bomb('RED'))
+        previous: bytes = board.encode()
+
+        board.move('RED', (0, 3), (0, 4))
+        payload: bytes = board.encode()
+
+        for name in c.CODEC_NAMES:
+            with self.subTest(name):
+                codec: c.Codec = c.make_codec(name)
+
+                alone: bytes = codec.compress(payload, None)
+                self.assertEqual(codec.decompress(alone, None), payload)
+
+                delta: bytes = codec.compress(payload, previous)
+                self.assertEqual(codec.decompress(delta, previous), payload)
+
+        zlib: c.Codec = c.make_codec('zlib')
+        self.assertLess(len(zlib.compress(payload, None)), len(payload))
+        self.assertLess(len(zlib.compress(payload, previous)), 16)
+
+    def test_corrupt(self) -> None:
+        '''
+        Tests that corrupt or oversized payloads are refused.
+        '''
+
+        zlib: c.Codec = c.make_codec('zlib')
+        payload: bytes = b.Board.detached().encode()
+
+        with self.assertRaises(ValueError):
+            zlib.decompress(b'\xff' * 8, None)
+
+        with self.assertRaises(ValueError):
+            zlib.decompress(zlib.compress(payload, None)[:-2], None)
+
+        with self.assertRaises(ValueError):
+            zlib.decompress(zlib.compress(bytes(1 << 17), None), None)
+
+        with self.assertRaises(ValueError):
+            c.make_codec('lzma')
+
+    def test_negotiate(self) -> None:
+        '''
+        Tests picking the codec for a connection.
+        '''
+
+        self.assertEqual(c.negotiate(['zlib', 'raw'], ['zlib', 'raw']), 'zlib')
+        self.assertEqual(c.negotiate(['zlib', 'raw'], ['raw']), 'raw')
+        self.assertEqual(c.negotiate(['lzma', 'zlib'], ['zlib']), 'zlib')
+        self.assertEqual(c.negotiate(['lzma'], ['lzma']), 'raw')
+        self.assertEqual(c.negotiate([''], c.CODEC_NAMES), 'raw')
@@ -3,6 +3,10 @@ Some tests of the Stratego GUI.
 Jordan Dehmel, 2024
 '''
 
+import inspect
+import json
+import os
+import tempfile
 from typing import Callable, Dict, List, Tuple
 import unittest
 from unittest import mock
@@ -13,6 +17,8 @@ import stratego.gui as g
 import stratego.pieces as p
 import stratego.board as b
 import stratego.network as n
+from stratego import metrics as m
+from stratego import boardview as bv
 
 
 class GUITest(unittest.TestCase):
@@ -37,6 +43,26 @@ class GUITest(unittest.TestCase):
             Dummy function
             '''
 
+        def send_setup(self, _, color):
+            '''
+            Remembers our color, to answer with the other's setup
+            '''
+
+            GUITest.DummyNet.color = color
+
+        def recv_setup(self):
+            '''
+            Returns a setup for the other color
+            '''
+
+            other = 'BLUE' if GUITest.DummyNet.color == 'RED' else 'RED'
+            board = b.Board.detached()
+            start, end = b.SETUP_ROWS[other]
+            pieces = b.Board.all_pieces(other)
+            board.fill((0, start), (10, end), lambda _, __: pieces.pop())
+
+            return board.encode_setup(other)
+
         def host_game(self, _, port):
             '''
             Dummy function
@@ -62,6 +88,104 @@ class GUITest(unittest.TestCase):
 
             return 0
 
+        def cancel(self):
+            '''
+            Dummy function
+            '''
+
+        def disconnect(self):
+            '''
+            Dummy function
+            '''
+
+        def rematch(self):
+            '''
+            Dummy function
+            '''
+
+            return True
+
+    class FlakyNet(DummyNet):
+        '''
+        Dummy class whose first receive fails
+        '''
+
+        failed = False
+
+        def recv_game(self):
+            '''
+            Fails the first time, then succeeds
+            '''
+
+            if not GUITest.FlakyNet.failed:
+                GUITest.FlakyNet.failed = True
+                raise ConnectionError('This was raised by a dummy')
+
+            return super().recv_game()
+
+    class DummyTask:
+        '''
+        Replaces background networking tasks, running the call
+        immediately so that screen transitions are synchronous.
+        '''
+
+        def __init__(self, call):
+            self.call = call
+            self.value = None
+            self.error = None
+            self.cancelled = False
+
+        def start(self):
+            '''
+            Runs the call in the foreground.
+            '''
+
+            try:
+                self.value = self.call()
+            except Exception as e:
+                self.error = e
+
+        def done(self):
+            '''
+            Dummy function
+            '''
+
+            return True
+
+        def result(self):
+            '''
+            Returns or raises the stored outcome.
+            '''
+
+            if self.error is not None:
+                raise self.error
+
+            return self.value
+
+        def cancel(self):
+            '''
+            Dummy function
+            '''
+
+            self.cancelled = True
+
+    class HangingTask(DummyTask):
+        '''
+        A background networking task which never finishes.
+        '''
+
+        def start(self):
+            '''
+            Dummy function
+            '''
+
+        def done(self):
+            '''
+            Dummy function
+            '''
+
+            return False
+
     @classmethod
     def setUpClass(cls) -> None:
         '''
@@ -70,6 +194,22 @@ class GUITest(unittest.TestCase):
 
         cls.root = tk.Tk(':99')
 
+    def setUp(self) -> None:
+        '''
+        Makes all background networking synchronous, and shows
+        the board as buttons.
+        '''
+
+        patcher = mock.patch.object(n, 'NetworkTask', GUITest.DummyTask)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # These tests press the board's buttons; see test_canvas
+        # for the canvas
+        patcher = mock.patch.object(g.StrategoGUI, '_BOARD_VIEW', 'buttons')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_resize_image(self) -> None:
         '''
         Tests resizing images.
@@ -117,6 +257,27 @@ class GUITest(unittest.TestCase):
 
             gui.quit()
 
+    def test_preload_sprites(self) -> None:
+        '''
+        Tests that every sprite is sliced from one atlas, built
+        in the background, as the GUI starts.
+        '''
+
+        with (mock.patch('tkinter.Tk'),
+              mock.patch.object(g, 'build_atlas', return_value=b'atlas') as build_atlas,
+              mock.patch.object(g, 'slice_atlas', return_value={}) as slice_atlas):
+
+            g.StrategoGUI.clear_instance()
+            gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+
+            paths = build_atlas.call_args.args[0]
+            self.assertIn('stratego/images/RED_9.png', paths)
+            self.assertEqual(len(paths), len(set(paths)))
+
+            slice_atlas.assert_called_once_with(b'atlas', paths, g.StrategoGUI._BUTTON_SIZE)
+
+            gui.quit()
+
     @given(some.text())
     def test_gen_screens(self, text) -> None:
         '''
@@ -290,8 +451,8 @@ class GUITest(unittest.TestCase):
 
     def test_error_1(self) -> None:
         '''
-        Tests receiving an error via the GUI. This should
-        result in an error screen.
+        Tests failing to send a move. This should result in an
+        error screen, with the move kept on the board.
         '''
 
         for color in ['RED', 'BLUE']:
@@ -355,6 +516,251 @@ class GUITest(unittest.TestCase):
 
                 self.assertEqual(gui.screen, 'ERROR')
 
+                # The move is kept, to be replayed on reconnecting
+                self.assertIsNone(gui.board.get(0, 9))
+
+    def test_pending_move(self) -> None:
+        '''
+        Tests that a move is shown before it has been sent.
+        '''
+
+        with (mock.patch('tkinter.Tk') as fake_tk,
+              mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+              mock.patch.object(GUITest.DummyNet, 'send_game') as fake_send,
+              mock.patch.object(n, 'NetworkTask', GUITest.HangingTask),
+              mock.patch('tkinter.Button') as fake_button):
+
+            fake_tk.return_value = fake_tk
+            fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+            g.StrategoGUI.clear_instance()
+            b.Board.get_instance().clear()
+            gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+            gui.color = 'RED'
+
+            gui.board.set_piece(0, 9, p.Scout('RED'))
+            gui.board.set_piece(9, 9, p.Flag('BLUE'))
+
+            gui.screen = 'YOUR_TURN'
+
+            buttons: List[Callable[[], None]] = [
+                item[2]['command'] for item in fake_button.mock_calls
+                if 'command' in item[2] and 'text' not in item[2]]
+
+            for x, y in ((0, 9), (5, 9)):
+                next(item for item in buttons if (item.x, item.y) == (x, y))()
+
+            # Shown, but still being sent
+            self.assertEqual(gui.screen, 'THEIR_TURN')
+            self.assertIsNone(gui.board.get(0, 9))
+            self.assertIsInstance(gui.board.get(5, 9), p.Scout)
+            fake_send.assert_not_called()
+
+            gui.quit()
+
+    def test_dirty_refresh(self) -> None:
+        '''
+        Tests that a move reconfigures only the two squares it
+        changed, and that their buttons keep their callbacks.
+        '''
+
+        with (mock.patch('tkinter.Tk') as fake_tk,
+              mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+              mock.patch.object(n, 'NetworkTask', GUITest.HangingTask),
+              mock.patch('tkinter.Button') as fake_button):
+
+            fake_tk.return_value = fake_tk
+            fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+            g.StrategoGUI.clear_instance()
+            b.Board.get_instance().clear()
+            gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+            gui.color = 'RED'
+
+            gui.board.set_piece(0, 9, p.Scout('RED'))
+            gui.board.set_piece(9, 9, p.Flag('BLUE'))
+
+            gui.screen = 'YOUR_TURN'
+
+            buttons: List[Callable[[], None]] = [
+                item[2]['command'] for item in fake_button.mock_calls
+                if 'command' in item[2] and 'text' not in item[2]]
+            self.assertEqual(len(buttons), 100)
+
+            fake_button.reset_mock()
+
+            for x, y in ((0, 9), (5, 9)):
+                next(item for item in buttons if (item.x, item.y) == (x, y))()
+
+            self.assertEqual(gui.screen, 'THEIR_TURN')
+            self.assertEqual(gui.squares_refreshed, 2)
+
+            configured = [item for item in fake_button.mock_calls if 'image' in item[2]]
+            self.assertEqual(len(configured), 2)
+            self.assertFalse(any('command' in item[2] for item in fake_button.mock_calls))
+
+            gui.quit()
+
+    def test_canvas(self) -> None:
+        '''
+        Tests playing a move on the canvas renderer, which draws
+        the board as one widget and animates moves.
+        '''
+
+        with (mock.patch('tkinter.Tk') as fake_tk,
+              mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+              mock.patch.object(n, 'NetworkTask', GUITest.HangingTask),
+              mock.patch.object(g.StrategoGUI, '_BOARD_VIEW', 'canvas'),
+              mock.patch('tkinter.Button') as fake_button):
+
+            fake_tk.return_value = fake_tk
+            fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+            g.StrategoGUI.clear_instance()
+            b.Board.get_instance().clear()
+            gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+            gui.color = 'RED'
+
+            gui.board.set_piece(0, 9, p.Scout('RED'))
+            gui.board.set_piece(9, 9, p.Flag('BLUE'))
+
+            gui.screen = 'YOUR_TURN'
+
+            view = gui.board_view
+            assert isinstance(view, bv.CanvasBoard)
+
+            # No square is a button
+            self.assertFalse([item for item in fake_button.mock_calls
+                              if 'command' in item[2] and 'text' not in item[2]])
+
+            view.click(0, 9)
+            view.click(*view.square_at(5 * 32 + 16, 9 * 32 + 16))
+
+            self.assertEqual(gui.screen, 'THEIR_TURN')
+            self.assertIsInstance(gui.board.get(5, 9), p.Scout)
+            self.assertEqual(gui.squares_refreshed, 2)
+
+            # The move slides in over later frames, ended early
+            # once the screen changes
+            animator = gui.animator
+            assert animator is not None
+            self.assertEqual(animator.running, 1)
+            self.assertIn(mock.call(animator._FRAME_MS, mock.ANY), fake_tk.after.mock_calls)
+
+            gui.clear()
+            self.assertEqual(animator.running, 0)
+            self.assertIsNone(gui.animator)
+
+            gui.quit()
+
+    def test_highlight_moves(self) -> None:
+        '''
+        Tests that clicking a piece highlights where it can go,
+        from moves found once per board.
+        '''
+
+        with (mock.patch('tkinter.Tk') as fake_tk,
+              mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+              mock.patch.object(n, 'NetworkTask', GUITest.HangingTask)):
+
+            fake_tk.return_value = fake_tk
+            fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+            g.StrategoGUI.clear_instance()
+            b.Board.get_instance().clear()
+            gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+            gui.color = 'RED'
+
+            gui.board.set_piece(0, 9, p.Troop('RED', 5))
+            gui.board.set_piece(9, 9, p.Flag('BLUE'))
+
+            gui.screen = 'YOUR_TURN'
+            self.assertEqual(gui.move_lists_built, 1)
+
+            view = gui.board_view
+            assert view is not None
+
+            view.click(0, 9)
+            self.assertEqual(view.highlighted, {(0, 8), (1, 9)})
+
+            # An invalid move changes nothing, so nothing is found
+            # again
+            view.click(5, 5)
+            self.assertEqual(gui.screen, 'YOUR_TURN')
+            self.assertEqual(view.highlighted, set())
+
+            view.click(0, 9)
+            self.assertEqual(view.highlighted, {(0, 8), (1, 9)})
+            view.click(0, 8)
+
+            self.assertEqual(gui.screen, 'THEIR_TURN')
+            self.assertEqual(view.highlighted, set())
+            self.assertEqual(gui.move_lists_built, 1)
+
+            # Their move changes the board
+            gui.board.move('RED', (0, 8), (0, 7))
+            gui.screen = 'YOUR_TURN'
+            self.assertEqual(gui.move_lists_built, 2)
+
+            gui.quit()
+
+    def test_trace(self) -> None:
+        '''
+        Tests timing a click until the board is repainted, and
+        dumping the trace on quitting.
+        '''
+
+        with (mock.patch('tkinter.Tk') as fake_tk,
+              mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+              mock.patch.object(n, 'NetworkTask', GUITest.HangingTask),
+              tempfile.TemporaryDirectory() as directory):
+
+            fake_tk.return_value = fake_tk
+            fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+            tracer: m.FrameTracer = m.FrameTracer(os.path.join(directory, 'trace.json'),
+                                                  metrics=None)
+
+            g.StrategoGUI.clear_instance()
+            b.Board.get_instance().clear()
+            gui: g.StrategoGUI = g.StrategoGUI(tracer=tracer)
+            self.assertIs(gui.tracer, tracer)
+            gui.color = 'RED'
+
+            gui.board.set_piece(0, 9, p.Scout('RED'))
+
+            gui.screen = 'YOUR_TURN'
+
+            view = gui.board_view
+            assert view is not None
+
+            # Selecting does not repaint itself, so Tk is asked to
+            # close the frame once idle
+            view.click(0, 9)
+            self.assertTrue(tracer.pending)
+            fake_tk.after_idle.assert_called_with(tracer.repainted)
+
+            view.click(5, 9)
+            self.assertFalse(tracer.pending)
+
+            self.assertEqual(len(tracer.durations('click')), 2)
+            self.assertEqual(len(tracer.durations('frame')), 1)
+            self.assertTrue(tracer.durations('repaint'))
+            self.assertTrue(tracer.durations('screen'))
+
+            # The overlay shows the frame times
+            overlay = gui._StrategoGUI__overlay
+            self.assertIsInstance(overlay, tk.Label)
+
+            with mock.patch.object(overlay, 'configure') as fake_configure:
+                gui._StrategoGUI__update_overlay()
+                fake_configure.assert_called_once_with(text=tracer.summary())
+
+            gui.quit()
+
+            with open(tracer.path, encoding='UTF-8') as file:
+                self.assertIn('traceEvents', json.load(file))
+
     def test_error_2(self) -> None:
         '''
         Tests receiving an error via the GUI. This should
@@ -507,6 +913,129 @@ class GUITest(unittest.TestCase):
             gui: g.StrategoGUI = g.StrategoGUI.get_instance()
             gui.screen = 'YOUR_TURN'
 
+    def test_reconnect(self) -> None:
+        '''
+        Tests resuming a game from the error screen after the
+        connection drops mid-game.
+        '''
+
+        for color in ['RED', 'BLUE']:
+
+            with (mock.patch('tkinter.Tk') as fake_tk,
+                  mock.patch.object(n, 'StrategoNetworker', GUITest.FlakyNet),
+                  mock.patch('tkinter.Button') as fake_button):
+
+                fake_tk.return_value = fake_tk
+                fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+                GUITest.FlakyNet.failed = False
+
+                g.StrategoGUI.clear_instance()
+                gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+                gui.color = color
+
+                gui.screen = 'THEIR_TURN'
+                self.assertEqual(gui.screen, 'ERROR')
+
+                buttons: Dict[str, Callable[[], None]] = {}
+                for item in fake_button.mock_calls:
+                    if 'command' in item[2] and 'text' in item[2]:
+                        buttons[item[2]['text']] = item[2]['command']
+
+                # The resumed game awaits their move, which then
+                # arrives
+                self.assertIn('Reconnect', buttons)
+                buttons['Reconnect']()
+
+                self.assertEqual(gui.screen, 'YOUR_TURN')
+
+                gui.quit()
+
+    def test_rematch(self) -> None:
+        '''
+        Tests playing again after a game, which should start a
+        new setup phase without reconnecting.
+        '''
+
+        for screen in ['WIN', 'LOSE']:
+
+            with (mock.patch('tkinter.Tk') as fake_tk,
+                  mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+                  mock.patch.object(GUITest.DummyNet, 'host_wait_for_join') as fake_wait,
+                  mock.patch('tkinter.Button') as fake_button):
+
+                fake_tk.return_value = fake_tk
+                fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+                g.StrategoGUI.clear_instance()
+                gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+                gui.board.set_piece(0, 0, p.Scout('RED'))
+
+                gui.screen = screen
+
+                buttons: Dict[str, Callable[[], None]] = {}
+                for item in fake_button.mock_calls:
+                    if 'command' in item[2] and 'text' in item[2]:
+                        buttons[item[2]['text']] = item[2]['command']
+
+                buttons['Play Again']()
+
+                self.assertEqual(gui.screen, 'SETUP')
+                self.assertIsNone(gui.board.get(0, 0))
+                self.assertIsInstance(gui.board.get(2, 4), b.LakeSquare)
+                fake_wait.assert_not_called()
+
+                gui.quit()
+
+    def test_long_session(self) -> None:
+        '''
+        Tests playing game after game, which should neither
+        nest event loops nor deepen the stack.
+        '''
+
+        depths: List[int] = []
+        lose_screen = g.StrategoGUI._StrategoGUI__lose_screen
+
+        def record(gui: g.StrategoGUI) -> None:
+            depths.append(len(inspect.stack(0)))
+            lose_screen(gui)
+
+        with (mock.patch('tkinter.Tk') as fake_tk,
+              mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+              mock.patch.object(GUITest.DummyNet, 'recv_game',
+                                lambda _: (b.Board.get_instance(), 'RED')),
+              mock.patch.object(g.StrategoGUI, '_StrategoGUI__lose_screen',
+                                autospec=True, side_effect=record),
+              mock.patch('tkinter.Button') as fake_button):
+
+            fake_tk.return_value = fake_tk
+            fake_tk.winfo_children.return_value = [fake_tk for _ in range(5)]
+
+            g.StrategoGUI.clear_instance()
+            gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+            gui.color = 'BLUE'
+
+            gui.screen = 'THEIR_TURN'
+
+            for _ in range(50):
+                for text in ['Play Again', 'Randomize all']:
+                    buttons: Dict[str, Callable[[], None]] = {}
+                    for item in fake_button.mock_calls:
+                        if 'command' in item[2] and 'text' in item[2]:
+                            buttons[item[2]['text']] = item[2]['command']
+
+                    fake_button.reset_mock()
+                    buttons[text]()
+
+                self.assertEqual(gui.screen, 'LOSE')
+
+            self.assertEqual(len(depths), 51)
+            self.assertEqual(len(set(depths[1:])), 1)
+            self.assertEqual(gui.transitions_queued, 1)
+            fake_tk.mainloop.assert_called_once()
+
+            gui.quit()
+
     def test_host(self) -> None:
         '''
         Test the GUI's hosting screen via patching.
@@ -543,6 +1072,38 @@ class GUITest(unittest.TestCase):
 
             gui.quit()
 
+    def test_cancel_wait(self) -> None:
+        '''
+        Tests cancelling the wait for another player, which
+        should return to the home screen without blocking.
+        '''
+
+        for screen in ['HOST_GAME', 'JOIN_GAME']:
+
+            with (mock.patch('tkinter.Tk') as fake_tk,
+                  mock.patch.object(n, 'StrategoNetworker', GUITest.DummyNet),
+                  mock.patch.object(GUITest.DummyNet, 'cancel') as fake_cancel,
+                  mock.patch.object(n, 'NetworkTask', GUITest.HangingTask)):
+
+                fake_tk.return_value = fake_tk
+
+                g.StrategoGUI.clear_instance()
+                gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+
+                gui.screen = screen
+                gui.press_key('<Return>')
+
+                # Still waiting; The poll was rescheduled
+                self.assertEqual(gui.screen, '')
+                fake_tk.after.assert_called()
+
+                gui.press_key('<Escape>')
+
+                self.assertEqual(gui.screen, 'HOME')
+                fake_cancel.assert_called_once()
+
+                gui.quit()
+
     def test_join_2(self) -> None:
         '''
         Test the GUI's joining screen via patching.
@@ -708,3 +1269,44 @@ class GUITest(unittest.TestCase):
                     else:
                         for y in range(6, 10):
                             button_dict[(x, y)]()
+
+    def test_setup_fails(self) -> None:
+        '''
+        Tests that a setup which cannot be sent leads to the
+        error screen, rather than raising on the Tk thread.
+        '''
+
+        class UnsentNet(GUITest.DummyNet):
+            '''
+            Dummy class which cannot send its setup
+            '''
+
+            def send_setup(self, _, color):
+                '''
+                Fails, as if the connection had dropped
+                '''
+
+                raise ConnectionError('This was raised by a dummy')
+
+        with (mock.patch('tkinter.Tk'),
+              mock.patch('tkinter.Button') as fake_button,
+              mock.patch.object(n, 'StrategoNetworker', UnsentNet)):
+
+            g.StrategoGUI.clear_instance()
+            b.Board.clear_instance()
+
+            gui: g.StrategoGUI = g.StrategoGUI.get_instance()
+
+            gui.screen = 'HOST_GAME'
+            gui.press_key('<Return>')
+            gui.color = 'RED'
+
+            buttons: Dict[str, Callable[[], None]] = {
+                item[2]['text']: item[2]['command'] for item in fake_button.mock_calls
+                if 'command' in item[2] and 'text' in item[2]
+            }
+
+            buttons['Randomize all']()
+            self.assertEqual(gui.screen, 'ERROR')
+
+        gui.quit()
@@ -0,0 +1,320 @@
+'''
+Tests the matchmaking queue and server.
+'''
+
+import threading
+import time
+from typing import Dict, List
+import unittest
+
+from stratego import board as b
+from stratego import matchmaking as m
+from stratego import network as n
+from stratego import pieces as p
+from stratego import transport as t
+
+
+class FakeClock:
+    '''
+    A clock which only moves when told to.
+    '''
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestMatchmaking(unittest.TestCase):
+    '''
+    Tests stratego.matchmaking.
+    '''
+
+    def test_pairing(self) -> None:
+        '''
+        Tests that close ratings are paired at once, with the
+        longer-waiting player hosting.
+        '''
+
+        clock: FakeClock = FakeClock()
+        matchmaker: m.Matchmaker = m.Matchmaker(initial_gap=100, clock=clock)
+
+        first: m.Ticket = matchmaker.enqueue(1500)
+        self.assertFalse(first.done)
+        self.assertEqual(len(matchmaker), 1)
+
+        # Too far apart
+        far: m.Ticket = matchmaker.enqueue(1700)
+        self.assertFalse(far.done)
+        self.assertEqual(len(matchmaker), 2)
+
+        clock.now = 1.0
+        second: m.Ticket = matchmaker.enqueue(1580)
+
+        self.assertTrue(first.wait(0))
+        self.assertTrue(second.done)
+        self.assertIs(first.opponent, second)
+        self.assertIs(second.opponent, first)
+        self.assertTrue(first.is_host)
+        self.assertFalse(second.is_host)
+
+        self.assertEqual(len(matchmaker), 1)
+        self.assertEqual(matchmaker.matches, 1)
+
+    def test_widening(self) -> None:
+        '''
+        Tests that the acceptable gap widens with waiting, up to
+        its limit, and that those who wait too long expire.
+        '''
+
+        clock: FakeClock = FakeClock()
+        matchmaker: m.Matchmaker = m.Matchmaker(initial_gap=100, widen_rate=50,
+                                                max_gap=300, max_wait=20, clock=clock)
+
+        low: m.Ticket = matchmaker.enqueue(1000)
+        lonely: m.Ticket = matchmaker.enqueue(2000)
+
+        clock.now = 1.0
+        high: m.Ticket = matchmaker.enqueue(1250)
+
+        self.assertEqual(matchmaker.sweep(), 0)
+
+        clock.now = 2.0
+        self.assertEqual(matchmaker.gap(low, clock.now), 200)
+        self.assertEqual(matchmaker.sweep(), 0)
+
+        clock.now = 3.5
+        self.assertEqual(matchmaker.sweep(), 1)
+        self.assertIs(low.opponent, high)
+        self.assertTrue(low.is_host)
+
+        clock.now = 10.0
+        self.assertEqual(matchmaker.gap(lonely, clock.now), 300)
+
+        clock.now = 20.0
+        self.assertEqual(matchmaker.sweep(), 0)
+        self.assertTrue(lonely.done)
+        self.assertIsNone(lonely.opponent)
+        self.assertEqual(matchmaker.expired, 1)
+        self.assertEqual(len(matchmaker), 0)
+
+    def test_latency(self) -> None:
+        '''
+        Tests that, of acceptable opponents, those with lower
+        latency are preferred.
+        '''
+
+        matchmaker: m.Matchmaker = m.Matchmaker(initial_gap=120, latency_weight=1000,
+                                                clock=FakeClock())
+
+        slow: m.Ticket = matchmaker.enqueue(1500, 0.2)
+        fast: m.Ticket = matchmaker.enqueue(1630, 0.01)
+
+        # Both are within 120, and 10 rating is worth less than
+        # 190ms
+        player: m.Ticket = matchmaker.enqueue(1560, 0.01)
+        self.assertIs(player.opponent, fast)
+        self.assertFalse(slow.done)
+
+    def test_cancel(self) -> None:
+        '''
+        Tests that cancelled players are never matched.
+        '''
+
+        matchmaker: m.Matchmaker = m.Matchmaker(clock=FakeClock())
+
+        ticket: m.Ticket = matchmaker.enqueue(1500)
+        matchmaker.cancel(ticket)
+
+        self.assertTrue(ticket.done)
+        self.assertIsNone(ticket.opponent)
+        self.assertEqual(len(matchmaker), 0)
+
+        self.assertFalse(matchmaker.enqueue(1500).done)
+
+    def test_many(self) -> None:
+        '''
+        Tests queueing thousands of players, each of whom is
+        paired with a neighbour in rating.
+        '''
+
+        matchmaker: m.Matchmaker = m.Matchmaker(initial_gap=10, clock=FakeClock())
+        tickets: List[m.Ticket] = [matchmaker.enqueue(rating) for rating in range(0, 40000, 20)]
+
+        self.assertEqual(len(matchmaker), 2000)
+
+        tickets += [matchmaker.enqueue(rating + 5) for rating in range(0, 40000, 20)]
+
+        self.assertEqual(len(matchmaker), 0)
+        self.assertEqual(matchmaker.matches, 2000)
+
+        for ticket in tickets:
+            assert ticket.opponent is not None
+            self.assertEqual(abs(ticket.rating - ticket.opponent.rating), 5)
+
+    def test_sweep_only_due(self) -> None:
+        '''
+        Tests that a sweep retries only those whose gaps have
+        widened enough to reach a neighbour, or who expire.
+        '''
+
+        clock: FakeClock = FakeClock()
+        matchmaker: m.Matchmaker = m.Matchmaker(initial_gap=100, widen_rate=50,
+                                                max_gap=300, max_wait=20, clock=clock)
+
+        # Too far apart to ever be matched
+        lonely: List[m.Ticket] = [matchmaker.enqueue(rating)
+                                  for rating in range(0, 100000, 1000)]
+
+        low: m.Ticket = matchmaker.enqueue(100150)
+        high: m.Ticket = matchmaker.enqueue(100300)
+
+        clock.now = 0.5
+        self.assertEqual(matchmaker.sweep(), 0)
+        self.assertEqual(matchmaker.retries, 0)
+
+        # Their gaps now span the 150 between them
+        clock.now = 1.0
+        self.assertEqual(matchmaker.sweep(), 1)
+        self.assertEqual(matchmaker.retries, 1)
+        self.assertIs(low.opponent, high)
+
+        clock.now = 19.0
+        self.assertEqual(matchmaker.sweep(), 0)
+        self.assertEqual(matchmaker.retries, 1)
+
+        clock.now = 20.0
+        self.assertEqual(matchmaker.sweep(), 0)
+        self.assertEqual(matchmaker.retries, 1 + len(lonely))
+        self.assertEqual(matchmaker.expired, len(lonely))
+        self.assertEqual(len(matchmaker), 0)
+
+    def test_dead(self) -> None:
+        '''
+        Tests that players found to be dead are dropped, rather
+        than paired.
+        '''
+
+        matchmaker: m.Matchmaker = m.Matchmaker(is_alive=lambda ticket: ticket.context != 'gone',
+                                                clock=FakeClock())
+
+        gone: m.Ticket = matchmaker.enqueue(1500, context='gone')
+        alive: m.Ticket = matchmaker.enqueue(1550)
+
+        self.assertTrue(gone.done)
+        self.assertIsNone(gone.opponent)
+        self.assertFalse(alive.done)
+        self.assertEqual(matchmaker.dropped, 1)
+
+        player: m.Ticket = matchmaker.enqueue(1520)
+        self.assertIs(player.opponent, alive)
+        self.assertEqual(len(matchmaker), 0)
+
+    def test_join_any(self) -> None:
+        '''
+        Tests two players being matched by a server, then
+        playing each other through it.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+        server: m.MatchServer = m.MatchServer('127.0.0.1', 0, transport=local)
+        ip, port = server.address
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        nets: List[n.StrategoNetworker] = [n.StrategoNetworker.detached(local)
+                                           for _ in range(2)]
+        colors: Dict[int, str] = {}
+
+        def join(i: int) -> None:
+            colors[i] = nets[i].join_any(ip, port, 1500 + i)
+
+        try:
+            threads: List[threading.Thread] = [
+                threading.Thread(target=join, args=(i,), daemon=True) for i in range(2)]
+
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5.0)
+
+            self.assertEqual(sorted(colors.values()), ['BLUE', 'RED'])
+
+            red: n.StrategoNetworker = nets[0] if colors[0] == 'RED' else nets[1]
+            blue: n.StrategoNetworker = nets[1] if colors[0] == 'RED' else nets[0]
+
+            board: b.Board = b.Board.detached()
+            board.set_piece(0, 0, p.Scout('RED'))
+
+            red.send_game(board, 'GOOD')
+            self.assertEqual(blue.recv_game()[0].encode(), board.encode())
+
+            blue.send_game(board, 'GOOD')
+            self.assertEqual(red.recv_game()[0].encode(), board.encode())
+
+            self.assertEqual(server.relays, 1)
+
+        finally:
+            for net in nets:
+                net.close_game()
+            server.shutdown()
+
+    def test_join_any_timeout(self) -> None:
+        '''
+        Tests that a player with no one to play is told so.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+        matchmaker: m.Matchmaker = m.Matchmaker(max_wait=0.05)
+        server: m.MatchServer = m.MatchServer('127.0.0.1', 0, matchmaker, local)
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        net: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+        try:
+            with self.assertRaises(TimeoutError):
+                net.join_any(*server.address)
+
+        finally:
+            server.shutdown()
+
+        self.assertEqual(matchmaker.expired, 1)
+
+    def test_join_any_disconnected(self) -> None:
+        '''
+        Tests that a player who left the queue is not matched.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+        matchmaker: m.Matchmaker = m.Matchmaker(max_wait=0.5, is_alive=m._is_connected)
+        server: m.MatchServer = m.MatchServer('127.0.0.1', 0, matchmaker, local)
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            conn: t.Connection = local.connect(server.address)
+            conn.sendall(n.StrategoNetworker.make_record('QUEUE', 0, b'1500'))
+
+            # Answer the latency PING, then leave
+            conn.recv(len(n.StrategoNetworker.make_record('PING', 0, b'')))
+            conn.sendall(n.StrategoNetworker.make_record('PONG', 0, b''))
+
+            started: float = time.monotonic()
+            while len(matchmaker) == 0:
+                self.assertLess(time.monotonic() - started, 5.0)
+                time.sleep(0.01)
+
+            conn.close()
+
+            net: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+            with self.assertRaises(TimeoutError):
+                net.join_any(*server.address, 1500)
+
+        finally:
+            server.shutdown()
+
+        self.assertEqual(matchmaker.dropped, 1)
+        self.assertEqual(server.relays, 0)
@@ -0,0 +1,122 @@
+'''
+Tests the instrumentation for Stratego.
+'''
+
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from stratego import metrics as m
+
+
+class TestMetrics(unittest.TestCase):
+    '''
+    Tests the stratego.metrics module.
+    '''
+
+    def test_histogram(self) -> None:
+        '''
+        Tests bucketing observations.
+        '''
+
+        histogram: m.Histogram = m.Histogram('h', 'A histogram', [1.0, 2.0])
+
+        for value in [0.5, 1.0, 1.5, 3.0]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 6.0)
+        self.assertEqual(histogram.cumulative(), [(1.0, 2), (2.0, 3), (float('inf'), 4)])
+
+    def test_registry(self) -> None:
+        '''
+        Tests getting metrics by name, and dumping them.
+        '''
+
+        registry: m.Metrics = m.Metrics()
+
+        counter: m.Counter = registry.counter('c_total', 'A counter')
+        self.assertIs(registry.counter('c_total', 'A counter'), counter)
+        counter.inc(3)
+
+        registry.histogram('h_seconds', 'A histogram', [0.5]).observe(0.25)
+
+        with self.assertRaises(AssertionError):
+            registry.histogram('c_total', 'Not a histogram')
+
+        dumped = json.loads(registry.to_json())
+        self.assertEqual(dumped['c_total']['value'], 3)
+        self.assertEqual(dumped['h_seconds']['buckets'], {'0.5': 1, '+Inf': 1})
+
+        text: str = registry.to_prometheus()
+        self.assertIn('# TYPE c_total counter\nc_total 3\n', text)
+        self.assertIn('h_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn('h_seconds_count 1\n', text)
+
+    def test_server(self) -> None:
+        '''
+        Tests serving metrics over HTTP.
+        '''
+
+        registry: m.Metrics = m.Metrics()
+        registry.counter('c_total', 'A counter').inc()
+
+        server: m.MetricsServer = m.MetricsServer(registry)
+        server.start()
+
+        ip, port = server.address
+
+        try:
+            with urllib.request.urlopen(f'http://{ip}:{port}/metrics') as response:
+                self.assertIn(b'c_total 1', response.read())
+
+            with urllib.request.urlopen(f'http://{ip}:{port}/metrics.json') as response:
+                self.assertEqual(json.loads(response.read())['c_total']['value'], 1)
+
+        finally:
+            server.shutdown()
+
+    def test_frame_tracer(self) -> None:
+        '''
+        Tests timing spans and frames, and dumping them as a
+        trace.
+        '''
+
+        now: float = 0.0
+        registry: m.Metrics = m.Metrics()
+        tracer: m.FrameTracer = m.FrameTracer(metrics=registry, clock=lambda: now, capacity=5)
+
+        for took in [0.125, 0.25, 1.0]:
+            tracer.input()
+            self.assertTrue(tracer.pending)
+
+            with tracer.span('click'):
+                now += took
+
+            tracer.repainted()
+            self.assertFalse(tracer.pending)
+
+        # Nothing was input, so this closes no frame
+        tracer.repainted()
+
+        self.assertEqual(tracer.durations('frame'), [0.125, 0.25, 1.0])
+        self.assertEqual(tracer.summary(), 'frame p50 250.0 ms, p95 1000.0 ms (n=3)')
+        self.assertEqual(registry.histogram('stratego_gui_click_seconds', '').count, 3)
+
+        # Only the latest are kept
+        self.assertEqual(tracer.durations('click'), [0.25, 1.0])
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                tracer.dump()
+
+            tracer.path = os.path.join(directory, 'trace.json')
+            with open(tracer.dump(), encoding='UTF-8') as file:
+                events = json.load(file)['traceEvents']
+
+        self.assertEqual([event['name'] for event in events],
+                         ['frame', 'click', 'frame', 'click', 'frame'])
+        self.assertEqual(events[3], {'name': 'click', 'ph': 'X', 'pid': 0, 'tid': 0,
+                                     'ts': 375000.0, 'dur': 1000000.0})
@@ -2,13 +2,18 @@
 Tests network operations for Stratego.
 '''
 
+import random
 import unittest
 from unittest import mock
-import pickle
 import socket
-from typing import Tuple, Dict, Any
+import threading
+import time
+from typing import Tuple, Dict, Any, List
 from stratego import network as n
 from stratego import board as b
+from stratego import pieces as p
+from stratego import metrics as mc
+from stratego import transport as t
 
 
 class MockSocket:
@@ -47,6 +52,16 @@ class MockSocket:
         Dummy function.
         '''
 
+    def setsockopt(self, *_: object) -> None:
+        '''
+        Dummy function.
+        '''
+
+    def settimeout(self, _timeout: object) -> None:
+        '''
+        Dummy function.
+        '''
+
     def close(self) -> None:
         '''
         Dummy function.
@@ -57,6 +72,11 @@ class MockSocket:
         Dummy function.
         '''
 
+    def sendall(self, data: bytes) -> None:
+        '''
+        Dummy function.
+        '''
+
     def recv(self, _: int) -> bytes:
         '''
         Dummy function.
@@ -65,6 +85,41 @@ class MockSocket:
         return type(self).kwargs['recv'].pop(0)
 
 
+def field(value: str, size: int) -> bytes:
+    '''
+    Encodes a fixed-width protocol field.
+    '''
+
+    return bytes(value.ljust(size), 'UTF-8')
+
+
+def free_port() -> int:
+    '''
+    Finds a free loopback port.
+    '''
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def connect_pair(host: n.StrategoNetworker,
+                 client: n.StrategoNetworker,
+                 port: int,
+                 password: str) -> None:
+    '''
+    Joins the client to the (already hosting) host over
+    loopback.
+    '''
+
+    waiter: threading.Thread = threading.Thread(target=host.host_wait_for_join)
+    waiter.start()
+
+    assert client.join_game('127.0.0.1', port, password) == 0
+
+    waiter.join(5.0)
+
+
 class TestStrategoNetworking(unittest.TestCase):
     '''
     Tests the stratego networking class.
@@ -108,7 +163,8 @@ class TestStrategoNetworking(unittest.TestCase):
         with (mock.patch('random.choice', mock.Mock(return_value='0')),
               mock.patch('socket.socket', MockSocket) as fake_sock):
 
-            fake_sock.kwargs['recv'] = [b'0001', b'0000']
+            fake_sock.kwargs['recv'] = [b'0001', b'0000', field('0', 16), field('raw', 16),
+                                        field('', 16)]
 
             n.StrategoNetworker.clear_instance()
             net: n.StrategoNetworker = n.StrategoNetworker.get_instance()
@@ -145,12 +201,45 @@ class TestStrategoNetworking(unittest.TestCase):
             net: n.StrategoNetworker = n.StrategoNetworker.get_instance()
 
             net.host_game('127.0.0.1', 12345)
-            net.host_wait_for_join()
+
+            # Failed handshakes are dropped, so it waits on
+            with self.assertRaises(TimeoutError):
+                net.host_wait_for_join(0.05)
 
             net.close_game()
 
             n.StrategoNetworker.clear_instance()
 
+    def test_host_wait_malformed(self) -> None:
+        '''
+        Tests that a joiner sending a malformed handshake is
+        dropped, and the host goes on waiting for others.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+        client: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+        password: str = host.host_game('127.0.0.1', port)
+
+        # A password which is not UTF-8, then a correct password
+        # with a sequence number which is not a number
+        for handshake in [b'\xff\xfe\xfd\xfc', password.encode('UTF-8') + field('x', 16)]:
+            local.connect(('127.0.0.1', port)).sendall(handshake)
+
+        connect_pair(host, client, port, password)
+
+        board: b.Board = b.Board.detached()
+        board.set_piece(0, 0, p.Scout('RED'))
+        host.send_game(board, 'GOOD')
+        self.assertEqual(client.recv_game()[0].encode(), board.encode())
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
+
     def test_join(self) -> None:
         '''
         Tests the join_game function
@@ -158,7 +247,8 @@ class TestStrategoNetworking(unittest.TestCase):
         with (mock.patch('random.choice', mock.Mock(return_value='0')),
               mock.patch('socket.socket', MockSocket)):
 
-            MockSocket.kwargs['recv'] = [b'GOOD', b'FOOO']
+            MockSocket.kwargs['recv'] = [field('GOOD', 8), field('0', 16), field('raw', 16),
+                                         field('0123456789abcdef', 16), field('FOOO', 8)]
 
             n.StrategoNetworker.clear_instance()
             net: n.StrategoNetworker = n.StrategoNetworker.get_instance()
@@ -181,7 +271,8 @@ class TestStrategoNetworking(unittest.TestCase):
 
         with mock.patch('socket.socket', MockSocket):
 
-            MockSocket.kwargs['recv'] = [b'GOOD']
+            MockSocket.kwargs['recv'] = [field('GOOD', 8), field('0', 16), field('raw', 16),
+                                         field('0123456789abcdef', 16)]
 
             net: n.StrategoNetworker = n.StrategoNetworker.get_instance()
             net.join_game('127.0.0.1', 12345, '0000')
@@ -194,13 +285,591 @@ class TestStrategoNetworking(unittest.TestCase):
 
         with mock.patch('socket.socket', MockSocket):
 
-            serialized: bytes = pickle.dumps(b.Board.get_instance())
-            size: int = len(serialized)
-            size_str: str = str(size)
-            size_str += (' ' * (16 - len(size_str)))
+            serialized: bytes = b.Board.get_instance().encode()
 
-            MockSocket.kwargs['recv'] = [b'GOOD', bytes(size_str, 'UTF-8'), serialized, b'GOOD']
+            MockSocket.kwargs['recv'] = [field('GOOD', 8),
+                                         field('0', 16),
+                                         field('raw', 16),
+                                         field('0123456789abcdef', 16),
+                                         field('GOOD', 8),
+                                         field('1', 16),
+                                         field(str(len(serialized)), 16),
+                                         serialized]
 
             net: n.StrategoNetworker = n.StrategoNetworker.get_instance()
             net.join_game('127.0.0.1', 12345, '0000')
-            net.recv_game()
+            board, state = net.recv_game()
+
+            self.assertEqual(board.encode(), serialized)
+            self.assertEqual(state, 'GOOD')
+            self.assertEqual(net.last_received_seq, 1)
+
+    def test_max_frame(self) -> None:
+        '''
+        Tests that records claiming to be huge are refused
+        before anything is allocated for them.
+        '''
+
+        stats: mc.NetworkMetrics = mc.NetworkMetrics(mc.DEFAULT)
+        rejected: float = stats.frames_rejected.value
+
+        with mock.patch('socket.socket', MockSocket):
+
+            MockSocket.kwargs['recv'] = [field('GOOD', 8),
+                                         field('0', 16),
+                                         field('raw', 16),
+                                         field('0123456789abcdef', 16),
+                                         field('GOOD', 8),
+                                         field('1', 16),
+                                         field(str(1 << 30), 16)]
+
+            net: n.StrategoNetworker = n.StrategoNetworker.get_instance()
+            net.join_game('127.0.0.1', 12345, '0000')
+
+            with self.assertRaises(ValueError):
+                net.recv_game()
+
+        self.assertEqual(stats.frames_rejected.value, rejected + 1)
+
+    def test_network_task(self) -> None:
+        '''
+        Tests running calls in the background.
+        '''
+
+        task: n.NetworkTask[int] = n.NetworkTask(lambda: 5)
+        task.start()
+
+        while not task.done():
+            time.sleep(0.001)
+
+        self.assertEqual(task.result(), 5)
+        self.assertFalse(task.cancelled)
+
+        def raiser() -> int:
+            '''
+            Dummy function
+            '''
+
+            raise ValueError('This was raised by a dummy')
+
+        task = n.NetworkTask(raiser)
+        task.start()
+
+        while not task.done():
+            time.sleep(0.001)
+
+        with self.assertRaises(ValueError):
+            task.result()
+
+        task.cancel()
+        self.assertTrue(task.cancelled)
+
+    def test_cancel(self) -> None:
+        '''
+        Tests cancelling a host which is waiting for a player
+        from another thread.
+        '''
+
+        n.StrategoNetworker.clear_instance()
+        net: n.StrategoNetworker = n.StrategoNetworker.get_instance()
+
+        net.host_game('127.0.0.1', 0)
+
+        task: n.NetworkTask[None] = n.NetworkTask(net.host_wait_for_join)
+        task.start()
+
+        time.sleep(0.05)
+        self.assertFalse(task.done())
+
+        net.cancel()
+
+        start: float = time.monotonic()
+        while not task.done():
+            self.assertLess(time.monotonic() - start, 5.0)
+            time.sleep(0.001)
+
+        task.result()
+
+        n.StrategoNetworker.clear_instance()
+
+    def test_resume(self) -> None:
+        '''
+        Tests resuming a game after the connection drops, with
+        records in flight in both directions.
+        '''
+
+        port: int = free_port()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached()
+        client: n.StrategoNetworker = n.StrategoNetworker.detached()
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+
+        board: b.Board = b.Board.detached()
+        board.set_piece(0, 0, p.Scout('BLUE'))
+
+        client.send_game(board, 'GOOD')
+        self.assertEqual(host.recv_game()[0].encode(), board.encode())
+
+        # Both send, but the connection drops before either
+        # record is read
+        board.set_piece(1, 1, p.Scout('RED'))
+        host.send_game(board, 'GOOD')
+        board.set_piece(2, 2, p.Bomb('BLUE'))
+        client.send_game(board, 'BLUE')
+
+        host.disconnect()
+        client.disconnect()
+
+        # Only the player who joined first was given the game's
+        # resume token, so no one else can take their place
+        waiter: threading.Thread = threading.Thread(target=host.host_wait_for_join)
+        waiter.start()
+
+        with self.assertRaises(ConnectionError):
+            n.StrategoNetworker.detached().join_game('127.0.0.1', port, password)
+
+        self.assertEqual(client.join_game('127.0.0.1', port, password), 0)
+        waiter.join(5.0)
+
+        received, state = client.recv_game()
+        self.assertIsInstance(received.get(1, 1), p.Scout)
+        self.assertIsNone(received.get(2, 2))
+        self.assertEqual(state, 'GOOD')
+
+        received, state = host.recv_game()
+        self.assertIsInstance(received.get(2, 2), p.Bomb)
+        self.assertEqual(state, 'BLUE')
+
+        self.assertEqual(host.last_sent_seq, 1)
+        self.assertEqual(host.last_received_seq, 2)
+        self.assertEqual(client.last_sent_seq, 2)
+        self.assertEqual(client.last_received_seq, 1)
+
+        # Leaving for good cannot be resumed
+        host.close_game()
+
+        with self.assertRaises(ConnectionError):
+            client.recv_game()
+
+        self.assertEqual(host.last_sent_seq, 0)
+        host.cancel()
+
+    def test_rematch(self) -> None:
+        '''
+        Tests starting a new game over the same connection, and
+        declining to.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+        client: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+
+        board: b.Board = b.Board.detached()
+        host.send_game(board, 'RED')
+        client.recv_game()
+
+        # Both offer at once
+        offer: n.NetworkTask[bool] = n.NetworkTask(host.rematch)
+        offer.start()
+        self.assertTrue(client.rematch())
+
+        start: float = time.monotonic()
+        while not offer.done():
+            self.assertLess(time.monotonic() - start, 5.0)
+            time.sleep(0.001)
+
+        self.assertTrue(offer.result())
+
+        # The new game is numbered from the start
+        self.assertEqual(host.last_sent_seq, 0)
+        client.send_game(board, 'GOOD')
+        host.recv_game()
+        self.assertEqual(host.last_received_seq, 1)
+
+        # This time, the host leaves instead
+        host.close_game()
+        self.assertFalse(client.rematch())
+
+        client.close_game()
+        host.cancel()
+
+    def test_ping(self) -> None:
+        '''
+        Tests that pings are answered while waiting for moves,
+        and are recorded along with everything else.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+        registry: mc.Metrics = mc.Metrics()
+
+        with mock.patch.object(n.StrategoNetworker, '_PING_EVERY', 1):
+            host: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+            client: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+
+            password: str = host.host_game('127.0.0.1', port)
+            connect_pair(host, client, port, password)
+
+            board: b.Board = b.Board.detached()
+
+            host.send_game(board, 'GOOD')
+            client.recv_game()
+            client.send_game(board, 'GOOD')
+
+            # The answer to the host's ping arrives first
+            host.recv_game()
+
+        self.assertIs(host.metrics, registry)
+
+        stats: mc.NetworkMetrics = mc.NetworkMetrics(registry)
+        self.assertEqual(stats.rtt.count, 1)
+        self.assertEqual(stats.encode_time.count, 2)
+        self.assertEqual(stats.decode_time.count, 2)
+        self.assertEqual(stats.record_sent_size.count, 2)
+
+        # Pings do not confuse rematches
+        offer: n.NetworkTask[bool] = n.NetworkTask(client.rematch)
+        offer.start()
+        self.assertTrue(host.rematch())
+        self.assertTrue(offer.wait(5.0))
+        self.assertTrue(offer.result())
+        self.assertEqual(stats.rtt.count, 2)
+
+        # Everything sent has now been read
+        self.assertEqual(stats.bytes_sent.value, stats.bytes_received.value)
+
+        # An answer which is not a time is refused, rather than
+        # ending the session with a struct.error
+        client._StrategoNetworker__send_bytes(n.StrategoNetworker.make_record('PONG', 0, b'abc'))
+
+        with self.assertRaises(ValueError):
+            host.recv_game()
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
+
+    def test_resume_snapshot(self) -> None:
+        '''
+        Tests that a player who missed more records than the log
+        holds is sent a single snapshot instead.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        with mock.patch.object(n.StrategoNetworker, '_LOG_SIZE', 2):
+            host: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+            client: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+            password: str = host.host_game('127.0.0.1', port)
+            connect_pair(host, client, port, password)
+
+        board: b.Board = b.Board.detached()
+
+        for x in range(3):
+            board.set_piece(x, 0, p.Scout('RED'))
+            host.send_game(board, 'GOOD')
+
+        host.disconnect()
+        client.disconnect()
+
+        connect_pair(host, client, port, password)
+
+        received, _ = client.recv_game()
+        self.assertEqual(received.encode(), board.encode())
+        self.assertEqual(client.last_received_seq, 3)
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
+
+    def test_export_session(self) -> None:
+        '''
+        Tests that a session exported from one networker is
+        resumed by another.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+        client: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+        with self.assertRaises(ValueError):
+            host.export_session()
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+
+        board: b.Board = b.Board.detached()
+        board.set_piece(0, 0, p.Scout('RED'))
+        host.send_game(board, 'GOOD')
+        client.recv_game()
+
+        board.set_piece(1, 0, p.Bomb('BLUE'))
+        client.send_game(board, 'GOOD')
+        host.recv_game()
+
+        # The host moves, but its connection drops, and another
+        # networker takes over
+        board.set_piece(2, 0, p.Scout('RED'))
+        host.send_game(board, 'GOOD')
+
+        session: bytes = host.export_session()
+        host.disconnect()
+        client.disconnect()
+        host.cancel()
+
+        resumed: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+        password = resumed.host_game('127.0.0.1', port)
+        resumed.restore_session(session)
+
+        self.assertEqual(resumed.last_sent_seq, 2)
+        self.assertEqual(resumed.last_received_seq, 1)
+
+        latest = resumed.latest
+        assert latest is not None
+        self.assertEqual(latest[0].encode(), board.encode())
+        self.assertEqual(latest[1], 'GOOD')
+
+        connect_pair(resumed, client, port, password)
+
+        # The client is sent a snapshot of what it missed, and
+        # later records still decompress
+        self.assertEqual(client.recv_game()[0].encode(), board.encode())
+
+        board.set_piece(3, 0, p.Bomb('BLUE'))
+        client.send_game(board, 'GOOD')
+        self.assertEqual(resumed.recv_game()[0].encode(), board.encode())
+
+        with self.assertRaises(ValueError):
+            resumed.restore_session(session[:-1])
+
+        resumed.close_game()
+        client.close_game()
+        resumed.cancel()
+
+    def test_resume_one_behind(self) -> None:
+        '''
+        Tests resuming an exported session, which has no log,
+        with a client one record behind: The snapshot is
+        numbered as the record after their last, but must not
+        be decompressed against it.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                rng: random.Random = random.Random(seed)
+
+                host: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+                client: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+                password: str = host.host_game('127.0.0.1', port)
+                connect_pair(host, client, port, password)
+
+                # Boards from the middle of a game, with pieces
+                # scattered about
+                boards: List[b.Board] = [b.Board.detached() for _ in range(2)]
+                for board in boards:
+                    for _ in range(20):
+                        board.set_piece(rng.randrange(10), rng.choice([0, 1, 2, 3, 6, 7, 8, 9]),
+                                        p.Troop(rng.choice(['RED', 'BLUE']), rng.randrange(4, 10)))
+
+                host.send_game(boards[0], 'GOOD')
+                client.recv_game()
+
+                # The client misses only the last record
+                host.send_game(boards[1], 'BLUE')
+
+                session: bytes = host.export_session()
+                host.disconnect()
+                client.disconnect()
+                host.cancel()
+
+                resumed: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+                password = resumed.host_game('127.0.0.1', port)
+                resumed.restore_session(session)
+
+                connect_pair(resumed, client, port, password)
+
+                received, state = client.recv_game()
+                self.assertEqual(received.encode(), boards[1].encode())
+                self.assertEqual(state, 'BLUE')
+                self.assertEqual(client.last_received_seq, 2)
+
+                resumed.close_game()
+                client.close_game()
+                resumed.cancel()
+
+    def test_idle_timeout(self) -> None:
+        '''
+        Tests that a silent player is given up on, rather than
+        waited for forever.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+        registry: mc.Metrics = mc.Metrics()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+        client: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+
+        host.set_timeouts(None, 0.05)
+        client.set_timeouts(None, None)
+
+        password: str = host.host_game('127.0.0.1', port)
+
+        # No one joins
+        with self.assertRaises(TimeoutError):
+            host.host_wait_for_join(0.05)
+
+        connect_pair(host, client, port, password)
+
+        with self.assertRaises(TimeoutError):
+            host.recv_game()
+
+        self.assertEqual(mc.NetworkMetrics(registry).idle_timeouts.value, 1)
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
+
+    def test_heartbeat(self) -> None:
+        '''
+        Tests that heartbeats keep a quiet, but live, connection
+        from timing out.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+        registry: mc.Metrics = mc.Metrics()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+        client: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+
+        for net in (host, client):
+            net.set_timeouts(0.01, 0.25)
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+
+        waiting: n.NetworkTask[Tuple[b.Board, str]] = n.NetworkTask(client.recv_game)
+        waiting.start()
+
+        # Thinking for several idle timeouts
+        time.sleep(0.3)
+
+        board: b.Board = b.Board.detached()
+        host.send_game(board, 'RED')
+
+        self.assertTrue(waiting.wait(5.0))
+        self.assertEqual(waiting.result()[1], 'RED')
+        self.assertGreater(mc.NetworkMetrics(registry).heartbeats_sent.value, 0)
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
+
+    def test_codec(self) -> None:
+        '''
+        Tests negotiating compression, including resuming with a
+        player who no longer compresses.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+        registry: mc.Metrics = mc.Metrics()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+        client: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+
+        self.assertEqual(host.codec, 'zlib')
+        self.assertEqual(client.codec, 'zlib')
+
+        board: b.Board = b.Board.detached()
+
+        for x in range(3):
+            board.set_piece(x, 0, p.Scout('RED'))
+            host.send_game(board, 'GOOD')
+            self.assertEqual(client.recv_game()[0].encode(), board.encode())
+
+        stats: mc.NetworkMetrics = mc.NetworkMetrics(registry)
+        self.assertGreater(stats.payload_bytes_saved.value, 3 * 50)
+        self.assertEqual(stats.decompress_time.count, 3)
+
+        # Sent compressed, but never received
+        board.set_piece(3, 0, p.Scout('RED'))
+        host.send_game(board, 'GOOD')
+
+        host.disconnect()
+        client.disconnect()
+
+        # An offer which would not fit its field is refused, not cut short
+        with self.assertRaises(ValueError):
+            client.set_codecs(['zlib', 'raw'] * 3)
+
+        client.set_codecs(['raw'])
+        connect_pair(host, client, port, password)
+
+        self.assertEqual(host.codec, 'raw')
+        self.assertEqual(client.recv_game()[0].encode(), board.encode())
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
+
+    def test_setup(self) -> None:
+        '''
+        Tests exchanging setups, which are much smaller than
+        boards.
+        '''
+
+        port: int = 12345
+        local: t.MemoryTransport = t.MemoryTransport()
+        registry: mc.Metrics = mc.Metrics()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+        client: n.StrategoNetworker = n.StrategoNetworker.detached(local, registry)
+
+        for net in (host, client):
+            net.set_codecs(['raw'])
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+
+        board: b.Board = b.Board.detached()
+        pieces: List[p.Piece] = b.Board.all_pieces('BLUE')
+        board.fill((0, 6), (10, 10), lambda _, __: pieces.pop())
+
+        client.send_setup(board, 'BLUE')
+        self.assertEqual(host.recv_setup(), board.encode_setup('BLUE'))
+
+        stats: mc.NetworkMetrics = mc.NetworkMetrics(registry)
+        self.assertEqual(stats.record_sent_size.sum, 40 + 40)
+
+        # Boards and setups are not interchangeable
+        host.send_game(board, 'GOOD')
+        with self.assertRaises(ValueError):
+            client.recv_setup()
+
+        client.send_setup(board, 'BLUE')
+        with self.assertRaises(ValueError):
+            host.recv_game()
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
@@ -0,0 +1,74 @@
+'''
+Tests rate limiting.
+'''
+
+import unittest
+
+from stratego import ratelimit as r
+
+
+class FakeClock:
+    '''
+    A clock which only moves when told to.
+    '''
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateLimit(unittest.TestCase):
+    '''
+    Tests stratego.ratelimit.
+    '''
+
+    def test_token_bucket(self) -> None:
+        '''
+        Tests bursting, then refilling at the given rate.
+        '''
+
+        bucket: r.TokenBucket = r.TokenBucket(rate=2.0, burst=3.0, now=0.0)
+
+        self.assertTrue(all(bucket.take(0.0) for _ in range(3)))
+        self.assertFalse(bucket.take(0.0))
+
+        # Half a second refills one token
+        self.assertTrue(bucket.take(0.5))
+        self.assertFalse(bucket.take(0.5))
+
+        # Never refills past the burst
+        self.assertFalse(bucket.take(100.0, cost=4.0))
+        self.assertTrue(bucket.take(100.0, cost=3.0))
+
+    def test_rate_limiter(self) -> None:
+        '''
+        Tests that keys are limited separately, and that only
+        the most recent keys are remembered.
+        '''
+
+        clock: FakeClock = FakeClock()
+        limiter: r.RateLimiter = r.RateLimiter(rate=1.0, burst=1.0, max_keys=2, clock=clock)
+
+        self.assertTrue(limiter.allow('a'))
+        self.assertFalse(limiter.allow('a'))
+        self.assertTrue(limiter.allow('b'))
+        self.assertEqual(limiter.refused, 1)
+
+        # 'a' is forgotten, so starts over with a full bucket
+        self.assertTrue(limiter.allow('c'))
+        self.assertTrue(limiter.allow('a'))
+
+        clock.now = 1.0
+        self.assertTrue(limiter.allow('c'))
+
+    def test_peer_key(self) -> None:
+        '''
+        Tests keying TCP peers by IP, and local peers together.
+        '''
+
+        self.assertEqual(r.peer_key(('10.0.0.1', 5000)), '10.0.0.1')
+        self.assertEqual(r.peer_key(('10.0.0.1', 5001)), '10.0.0.1')
+        self.assertEqual(r.peer_key(None), 'local')
+        self.assertEqual(r.peer_key(''), 'local')
@@ -0,0 +1,312 @@
+'''
+Tests the headless game server and the load testing harness.
+'''
+
+import random
+import tempfile
+import threading
+import time
+from typing import List, Tuple
+import unittest
+
+from stratego import board as b
+from stratego import bot
+from stratego import loadtest
+from stratego import network as n
+from stratego import server as s
+from stratego import sessions
+from stratego import transport as t
+
+
+class TestServer(unittest.TestCase):
+    '''
+    Tests stratego.server and stratego.loadtest over loopback.
+    '''
+
+    def test_bad_password(self) -> None:
+        '''
+        Tests that joiners with the wrong password are refused.
+        '''
+
+        server: s.GameServer = s.GameServer('127.0.0.1', 0, 'GOOD')
+        ip, port = server.address
+
+        net: n.StrategoNetworker = n.StrategoNetworker.detached()
+
+        try:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            self.assertEqual(net.join_game(ip, port, 'BAAD'), 2)
+
+        finally:
+            server.shutdown(1.0)
+
+        self.assertEqual(server.games_started, 0)
+
+    def test_silent_joiner(self) -> None:
+        '''
+        Tests that a joiner who never speaks is timed out and
+        reaped, rather than held forever.
+        '''
+
+        server: s.GameServer = s.GameServer('127.0.0.1', 0, 'GOOD',
+                                            heartbeat_interval=0.01,
+                                            idle_timeout=0.05)
+
+        try:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            conn: t.Connection = server.transport.connect(server.address)
+
+            start: float = time.monotonic()
+            while server.timeouts < 1:
+                self.assertLess(time.monotonic() - start, 5.0)
+                time.sleep(0.001)
+
+            # The server closed its end
+            self.assertEqual(conn.recv(8), b'')
+            conn.close()
+
+            start = time.monotonic()
+            while server.active_games > 0:
+                self.assertLess(time.monotonic() - start, 5.0)
+                time.sleep(0.001)
+
+        finally:
+            server.shutdown(1.0)
+
+        self.assertEqual(server.games_started, 0)
+        self.assertEqual(server.errors, 0)
+
+    def test_rate_limit(self) -> None:
+        '''
+        Tests that an address joining too often is hung up on,
+        without a game being started.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+        server: s.GameServer = s.GameServer('127.0.0.1', 0, 'GOOD', transport=local,
+                                            join_rate=0.001, join_burst=2)
+
+        try:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            conns: List[t.Connection] = [local.connect(server.address) for _ in range(3)]
+
+            # The third is closed unanswered
+            self.assertEqual(conns[2].recv(8), b'')
+            self.assertEqual(server.rate_limited, 1)
+
+            for conn in conns:
+                conn.close()
+
+        finally:
+            server.shutdown(1.0)
+
+        self.assertEqual(server.games_started, 0)
+
+    def test_resume(self) -> None:
+        '''
+        Tests that a named game whose player leaves is parked,
+        spilled to disk, kept through failed attempts to resume
+        it, then resumed when they join again.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        with tempfile.TemporaryDirectory() as directory:
+            store: sessions.SessionStore = sessions.SessionStore(directory, idle_time=0)
+            server: s.GameServer = s.GameServer('127.0.0.1', 0, None, transport=local,
+                                                join_rate=None, sessions=store)
+            ip, port = server.address
+
+            net: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+            rng: random.Random = random.Random(1)
+
+            try:
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+
+                self.assertEqual(net.join_game(ip, port, 'GAME'), 0)
+
+                board: b.Board = b.Board.detached()
+                bot.random_setup(board, 'BLUE', rng)
+                net.send_setup(board, 'BLUE')
+                board.place_setup('RED', net.recv_setup())
+
+                board, _ = net.recv_game()
+                move = bot.random_move(board, 'BLUE', rng)
+                assert move is not None
+                net.send_game(board, board.move('BLUE', *move))
+
+                net.disconnect()
+
+                start: float = time.monotonic()
+                while server.parked < 1:
+                    self.assertLess(time.monotonic() - start, 5.0)
+                    time.sleep(0.001)
+
+                self.assertIn('GAME', store)
+                self.assertEqual(store.hot, 0)
+
+                # A malformed handshake for the game leaves it
+                # parked
+                errors: int = server.errors
+                conn: t.Connection = local.connect((ip, port))
+                conn.sendall(b'GAME' + b'x'.ljust(16))
+                start = time.monotonic()
+
+                while server.errors == errors:
+                    self.assertLess(time.monotonic() - start, 5.0)
+                    time.sleep(0.001)
+
+                while 'GAME' not in store:
+                    self.assertLess(time.monotonic() - start, 5.0)
+                    time.sleep(0.001)
+
+                conn.close()
+
+                # Nor does anyone else who names the game, since
+                # they do not know its resume token
+                errors = server.errors
+                intruder: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+
+                with self.assertRaises(ConnectionError):
+                    intruder.join_game(ip, port, 'GAME')
+
+                while server.errors == errors or 'GAME' not in store:
+                    self.assertLess(time.monotonic() - start, 5.0)
+                    time.sleep(0.001)
+
+                # We missed the bot's reply, so are one record
+                # behind, and are sent a snapshot, which follows
+                # on from our move
+                self.assertEqual(net.join_game(ip, port, 'GAME'), 0)
+                reply, state = net.recv_game()
+
+                self.assertEqual(state, 'GOOD')
+                self.assertEqual(net.last_received_seq, 3)
+
+                changed: List[Tuple[int, int]] = [
+                    (x, y) for y in range(board.height) for x in range(board.width)
+                    if b.encode_square(reply.get(x, y)) != b.encode_square(board.get(x, y))]
+                self.assertIn(len(changed), (1, 2))
+
+                net.close_game()
+
+            finally:
+                server.shutdown(1.0)
+
+        self.assertEqual(server.games_started, 1)
+        self.assertEqual(server.resumed, 1)
+        self.assertEqual(store.reloads, 3)
+
+    def test_park_silently(self) -> None:
+        '''
+        Tests that a player who goes silent mid-game has it
+        parked, and is not told that it is over.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        with tempfile.TemporaryDirectory() as directory:
+            server: s.GameServer = s.GameServer('127.0.0.1', 0, None, transport=local,
+                                                heartbeat_interval=None, idle_timeout=0.2,
+                                                join_rate=None,
+                                                sessions=sessions.SessionStore(directory))
+            ip, port = server.address
+
+            net: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+            net.set_timeouts(None, None)
+
+            try:
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+
+                self.assertEqual(net.join_game(ip, port, 'GAME'), 0)
+
+                board: b.Board = b.Board.detached()
+                bot.random_setup(board, 'BLUE', random.Random(1))
+                net.send_setup(board, 'BLUE')
+                net.recv_setup()
+                net.recv_game()
+
+                # Then say nothing until the server gives up
+                with self.assertRaises(ConnectionError) as caught:
+                    net.recv_game()
+
+                self.assertNotIn('left the game', str(caught.exception))
+                self.assertEqual(server.parked, 1)
+                self.assertEqual(server.timeouts, 1)
+
+            finally:
+                net.disconnect()
+                server.shutdown(1.0)
+
+    def test_in_play(self) -> None:
+        '''
+        Tests that a joiner naming a game already in play is
+        hung up on.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        with tempfile.TemporaryDirectory() as directory:
+            server: s.GameServer = s.GameServer('127.0.0.1', 0, None, transport=local,
+                                                join_rate=None,
+                                                sessions=sessions.SessionStore(directory))
+            ip, port = server.address
+
+            nets: List[n.StrategoNetworker] = [n.StrategoNetworker.detached(local)
+                                               for _ in range(2)]
+
+            try:
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+
+                self.assertEqual(nets[0].join_game(ip, port, 'GAME'), 0)
+
+                with self.assertRaises(ConnectionError):
+                    nets[1].join_game(ip, port, 'GAME')
+
+                self.assertEqual(server.collisions, 1)
+
+                # Once it ends, the name is free again
+                nets[0].close_game()
+                start: float = time.monotonic()
+
+                while server.active_games:
+                    self.assertLess(time.monotonic() - start, 5.0)
+                    time.sleep(0.001)
+
+                self.assertEqual(nets[1].join_game(ip, port, 'GAME'), 0)
+                nets[1].close_game()
+
+            finally:
+                server.shutdown(1.0)
+
+        self.assertEqual(server.games_started, 2)
+
+    def test_percentile(self) -> None:
+        '''
+        Tests the nearest-rank percentile.
+        '''
+
+        values = [float(i) for i in range(1, 101)]
+
+        self.assertEqual(loadtest.percentile(values, 50), 50.0)
+        self.assertEqual(loadtest.percentile(values, 99), 99.0)
+        self.assertEqual(loadtest.percentile(values, 100), 100.0)
+        self.assertEqual(loadtest.percentile([], 50), 0.0)
+
+    def test_load_test(self) -> None:
+        '''
+        Runs a small load test end to end.
+        '''
+
+        report: loadtest.LoadReport = loadtest.run_load_test(2, max_turns=5, timeout=60.0)
+
+        self.assertEqual(report.clients, 2)
+        self.assertEqual(report.errors, 0)
+        # Random games may end before the turn limit
+        self.assertLessEqual(report.moves, 10)
+        self.assertLessEqual(len(report.round_trips), report.moves)
+        self.assertGreater(report.throughput, 0.0)
+        self.assertIn('p99', report.summary())
@@ -0,0 +1,140 @@
+'''
+Tests the store of parked games.
+'''
+
+import os
+import tempfile
+import unittest
+
+from stratego import sessions as s
+
+
+class FakeClock:
+    '''
+    A clock which only moves when told to.
+    '''
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSessions(unittest.TestCase):
+    '''
+    Tests stratego.sessions.
+    '''
+
+    def setUp(self) -> None:
+        self.directory: tempfile.TemporaryDirectory[str] = tempfile.TemporaryDirectory()
+        self.clock: FakeClock = FakeClock()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_hot(self) -> None:
+        '''
+        Tests that recently parked sessions stay in memory, and
+        are removed when taken.
+        '''
+
+        store: s.SessionStore = s.SessionStore(self.directory.name, clock=self.clock)
+
+        store.put('GAME', b'session')
+        self.assertIn('GAME', store)
+        self.assertNotIn('OTHER', store)
+        self.assertEqual((len(store), store.hot), (1, 1))
+
+        self.assertEqual(store.take('GAME'), b'session')
+        self.assertIsNone(store.take('GAME'))
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.spills, 0)
+
+    def test_idle(self) -> None:
+        '''
+        Tests that sessions left idle are spilled to disk, then
+        reloaded when taken.
+        '''
+
+        store: s.SessionStore = s.SessionStore(self.directory.name, idle_time=10,
+                                               clock=self.clock)
+
+        store.put('OLD', b'old' * 100)
+        self.clock.now = 5.0
+        store.put('NEW', b'new')
+
+        self.assertEqual(store.spill_idle(), 0)
+
+        self.clock.now = 12.0
+        self.assertEqual(store.spill_idle(), 1)
+        self.assertEqual((len(store), store.hot), (2, 1))
+        self.assertIn('OLD', store)
+
+        # Compressed on disk
+        files = os.listdir(self.directory.name)
+        self.assertEqual(len(files), 1)
+        self.assertLess(os.path.getsize(os.path.join(self.directory.name, files[0])), 100)
+
+        self.assertEqual(store.take('OLD'), b'old' * 100)
+        self.assertEqual(store.reloads, 1)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+        store.discard('NEW')
+        self.assertEqual(len(store), 0)
+
+    def test_lru(self) -> None:
+        '''
+        Tests that beyond max_hot, the least recently parked
+        sessions are spilled first.
+        '''
+
+        store: s.SessionStore = s.SessionStore(self.directory.name, max_hot=2,
+                                               clock=self.clock)
+
+        for name in ['A/1', 'B/2', 'C/3']:
+            store.put(name, name.encode())
+
+        self.assertEqual((len(store), store.hot), (3, 2))
+        self.assertEqual(store.spills, 1)
+
+        # Parked again, so no longer the least recent
+        store.put('B/2', b'again')
+        store.put('D/4', b'D/4')
+        store.discard('B/2')
+
+        self.assertEqual((len(store), store.hot), (3, 1))
+        self.assertEqual(store.spills, 2)
+        self.assertEqual(store.take('A/1'), b'A/1')
+        self.assertEqual(store.take('C/3'), b'C/3')
+        self.assertEqual(store.reloads, 2)
+
+        # Parking a spilled session again replaces it on disk
+        store.put('E/5', b'stale')
+        store.put('F/6', b'F/6')
+        store.put('G/7', b'G/7')
+        store.put('E/5', b'fresh')
+        self.assertEqual(store.take('E/5'), b'fresh')
+        self.assertEqual(len(os.listdir(self.directory.name)), len(store) - store.hot)
+
+    def test_close(self) -> None:
+        '''
+        Tests that closing a store deletes what it spilled, and
+        removes its directory only if it made it.
+        '''
+
+        for given in [True, False]:
+            store: s.SessionStore = s.SessionStore(self.directory.name if given else None,
+                                                   max_hot=1, clock=self.clock)
+
+            store.put('A/1', b'A/1')
+            store.put('B/2', b'B/2')
+            self.assertEqual(len(os.listdir(store.directory)), 1)
+
+            store.close()
+            self.assertEqual(len(store), 0)
+
+            if given:
+                self.assertEqual(os.listdir(store.directory), [])
+            else:
+                self.assertFalse(os.path.exists(store.directory))
@@ -0,0 +1,147 @@
+'''
+Tests spectating for Stratego.
+'''
+
+import socket
+import time
+import unittest
+
+from stratego import board as b
+from stratego import network as n
+from stratego import pieces as p
+from stratego import spectate as s
+from tests.network_test import connect_pair, free_port
+
+
+class TestSpectate(unittest.TestCase):
+    '''
+    Tests stratego.spectate over loopback.
+    '''
+
+    def test_watch(self) -> None:
+        '''
+        Tests that every spectator sees every move, encoded
+        only once.
+        '''
+
+        port: int = free_port()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached()
+        client: n.StrategoNetworker = n.StrategoNetworker.detached()
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+
+        hub: s.SpectatorHub = s.SpectatorHub()
+        host.add_observer(hub.publish)
+        ip, hub_port = hub.listen('127.0.0.1', 0)
+
+        viewers = [n.StrategoNetworker.detached() for _ in range(3)]
+        for viewer in viewers:
+            self.assertEqual(viewer.watch_game(ip, hub_port), 0)
+
+        # Subscribing happens on the hub's accepting thread
+        start: float = time.monotonic()
+        while hub.spectators < len(viewers):
+            self.assertLess(time.monotonic() - start, 5.0)
+            time.sleep(0.001)
+
+        # Moves in both directions reach the hub via the host
+        board: b.Board = b.Board.detached()
+        board.set_piece(0, 0, p.Scout('BLUE'))
+        client.send_game(board, 'GOOD')
+        host.recv_game()
+
+        board.set_piece(1, 1, p.Scout('RED'))
+        host.send_game(board, 'RED')
+
+        for viewer in viewers:
+            first, state = viewer.recv_game()
+            self.assertIsNone(first.get(1, 1))
+            self.assertEqual(state, 'GOOD')
+
+            second, state = viewer.recv_game()
+            self.assertEqual(second.encode(), board.encode())
+            self.assertEqual(state, 'RED')
+
+        self.assertEqual(hub.records_encoded, 2)
+
+        hub.close(1.0)
+
+        for viewer in viewers:
+            with self.assertRaises(ConnectionError):
+                viewer.recv_game()
+            viewer.close_game()
+
+        host.close_game()
+        client.close_game()
+        host.cancel()
+
+    def test_watch_after_game(self) -> None:
+        '''
+        Tests that a networker which played a compressed game
+        can then watch one, which is sent uncompressed.
+        '''
+
+        port: int = free_port()
+
+        host: n.StrategoNetworker = n.StrategoNetworker.detached()
+        client: n.StrategoNetworker = n.StrategoNetworker.detached()
+
+        password: str = host.host_game('127.0.0.1', port)
+        connect_pair(host, client, port, password)
+        self.assertEqual(client.codec, 'zlib')
+
+        board: b.Board = b.Board.detached()
+        board.set_piece(0, 0, p.Scout('RED'))
+        host.send_game(board, 'GOOD')
+        client.recv_game()
+
+        client.close_game()
+        host.close_game()
+        host.cancel()
+
+        hub: s.SpectatorHub = s.SpectatorHub()
+        ip, hub_port = hub.listen('127.0.0.1', 0)
+
+        self.assertEqual(client.watch_game(ip, hub_port), 0)
+        self.assertEqual(client.codec, 'raw')
+
+        start: float = time.monotonic()
+        while hub.spectators < 1:
+            self.assertLess(time.monotonic() - start, 5.0)
+            time.sleep(0.001)
+
+        board.set_piece(1, 1, p.Bomb('BLUE'))
+        hub.publish('GOOD', board.encode())
+
+        self.assertEqual(client.recv_game()[0].encode(), board.encode())
+
+        hub.close(1.0)
+        client.close_game()
+
+    def test_slow_spectator(self) -> None:
+        '''
+        Tests that a spectator who falls behind is skipped
+        ahead instead of queueing without bound.
+        '''
+
+        ours, theirs = socket.socketpair()
+
+        # Not started, so nothing is written until close
+        sub: s.Subscriber = s.Subscriber(ours, max_pending=2)
+
+        for i in range(5):
+            sub.push(bytes([i]))
+
+        self.assertEqual(sub.dropped, 4)
+
+        sub.start()
+        sub.close()
+        sub.join(1.0)
+
+        self.assertEqual(theirs.recv(16), bytes([4]))
+        self.assertEqual(sub.sent, 1)
+        self.assertFalse(sub.is_alive)
+
+        theirs.close()
@@ -0,0 +1,160 @@
+'''
+Tests sprite scaling.
+'''
+
+import io
+import os
+import shutil
+import tempfile
+import tkinter as tk
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from stratego import gui as g
+from stratego import sprites as s
+
+PATH: str = 'stratego/images/RED_9.png'
+
+
+class TestSprites(unittest.TestCase):
+    '''
+    Tests stratego.sprites.
+    '''
+
+    def test_scale_png(self) -> None:
+        '''
+        Tests that Pillow resamples to any size, and that
+        nearest neighbour keeps every pixel exact.
+        '''
+
+        with Image.open(PATH) as source:
+            original: Image.Image = source.convert('RGBA')
+
+        for quality in ['nearest', 'bilinear', 'lanczos']:
+            with Image.open(io.BytesIO(s.scale_png(PATH, 37, 20, quality))) as scaled:
+                self.assertEqual(scaled.size, (37, 20))
+
+        with Image.open(io.BytesIO(s.scale_png(PATH, 32, 32))) as doubled:
+            for x in range(32):
+                for y in range(32):
+                    self.assertEqual(doubled.getpixel((x, y)),
+                                     original.getpixel((x // 2, y // 2)))
+
+    def test_scale_photo(self) -> None:
+        '''
+        Tests that ratios of small whole numbers are scaled by Tk,
+        and others refused.
+        '''
+
+        # Connect to virtual display as set up externally
+        tk.Tk()
+
+        img: tk.PhotoImage = tk.PhotoImage(file=PATH)
+
+        for w, h in [(32, 32), (8, 8), (24, 48), (16, 16)]:
+            scaled = s.scale_photo(img, w, h)
+            assert scaled is not None
+            self.assertEqual((scaled.width(), scaled.height()), (w, h))
+
+        self.assertIsNone(s.scale_photo(img, 37, 37))
+        self.assertIsNone(s.scale_photo(img, 0, 16))
+
+        sprite: tk.PhotoImage = s.load_sprite(PATH, 32, 32)
+        self.assertEqual((sprite.width(), sprite.height()), (32, 32))
+
+    def test_cache(self) -> None:
+        '''
+        Tests that scaled sprites are read back from disk, until
+        their source changes.
+        '''
+
+        with tempfile.TemporaryDirectory() as directory:
+            source: str = os.path.join(directory, 'sprite.png')
+            shutil.copy(PATH, source)
+
+            cache: s.SpriteCache = s.SpriteCache(os.path.join(directory, 'cache'))
+            scaled: bytes = cache.get(source, 32, 32)
+
+            self.assertEqual(scaled, s.scale_png(source, 32, 32))
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+            # Another launch reads it back
+            cache = s.SpriteCache(cache.directory)
+            self.assertEqual(cache.get(source, 32, 32), scaled)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+            # As is each size and quality apart
+            cache.get(source, 48, 48)
+            cache.get(source, 32, 32, 'lanczos')
+            self.assertEqual(cache.misses, 2)
+
+            stat: os.stat_result = os.stat(source)
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+            cache.get(source, 32, 32)
+            self.assertEqual(cache.misses, 3)
+
+            pattern: str = os.path.join(directory, '*.png')
+            self.assertEqual(cache.prewarm([32, 48], pattern=pattern), 1)
+            self.assertEqual(cache.prewarm([32, 48], pattern=pattern), 0)
+            self.assertEqual(cache.prewarm([16], pattern=pattern), 1)
+
+    def test_cache_unwritable(self) -> None:
+        '''
+        Tests that a cache which cannot be written still scales.
+        '''
+
+        with tempfile.NamedTemporaryFile() as file:
+            cache: s.SpriteCache = s.SpriteCache(os.path.join(file.name, 'cache'))
+
+            self.assertEqual(cache.get(PATH, 32, 32), s.scale_png(PATH, 32, 32))
+            self.assertEqual(cache.get(PATH, 32, 32), s.scale_png(PATH, 32, 32))
+            self.assertEqual(cache.misses, 2)
+
+    def test_cache_write_fails(self) -> None:
+        '''
+        Tests that a sprite which cannot be written to the cache
+        leaves nothing behind.
+        '''
+
+        with (tempfile.TemporaryDirectory() as directory,
+              mock.patch('os.replace', side_effect=OSError('This was raised by a dummy'))):
+            cache: s.SpriteCache = s.SpriteCache(directory)
+
+            self.assertEqual(cache.get(PATH, 32, 32), s.scale_png(PATH, 32, 32))
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_shipped_sizes(self) -> None:
+        '''
+        Tests that prewarming covers the size the GUI shows.
+        '''
+
+        self.assertIn(g.StrategoGUI._BUTTON_SIZE, s.SHIPPED_SIZES)
+
+    def test_atlas(self) -> None:
+        '''
+        Tests that sprites are packed side by side into an atlas,
+        then sliced back out.
+        '''
+
+        paths = [PATH, 'stratego/images/lake.png', 'stratego/images/BLUE_B.png']
+        png: bytes = s.build_atlas(paths, 20, 'bilinear')
+
+        with Image.open(io.BytesIO(png)) as atlas:
+            self.assertEqual(atlas.size, (60, 20))
+
+            for i, path in enumerate(paths):
+                with Image.open(io.BytesIO(s.scale_png(path, 20, 20, 'bilinear'))) as sprite:
+                    self.assertEqual(atlas.crop((i * 20, 0, i * 20 + 20, 20)).tobytes(),
+                                     sprite.convert('RGBA').tobytes())
+
+        # Connect to virtual display as set up externally
+        tk.Tk()
+
+        sprites = s.slice_atlas(png, paths, 20)
+        self.assertEqual(list(sprites), paths)
+
+        for sprite in sprites.values():
+            self.assertEqual((sprite.width(), sprite.height()), (20, 20))
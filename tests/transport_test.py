@@ -0,0 +1,134 @@
+'''
+Tests the transports for Stratego.
+'''
+
+import os
+import socket
+import tempfile
+import unittest
+
+from stratego import board as b
+from stratego import network as n
+from stratego import transport as t
+from tests.network_test import connect_pair, free_port
+
+
+class TestTransport(unittest.TestCase):
+    '''
+    Tests the stratego.transport module.
+    '''
+
+    def test_memory_pipe(self) -> None:
+        '''
+        Tests partial reads and closing of in-memory pipes.
+        '''
+
+        pipe: t.MemoryPipe = t.MemoryPipe()
+
+        with self.assertRaises(TimeoutError):
+            pipe.read(8, timeout=0.01)
+
+        pipe.write(b'abc')
+        pipe.write(b'de')
+
+        self.assertEqual(pipe.read(2), b'ab')
+        self.assertEqual(pipe.read(8), b'c')
+
+        # Written data outlives closing
+        pipe.close()
+        self.assertEqual(pipe.read(8), b'de')
+        self.assertEqual(pipe.read(8), b'')
+        self.assertEqual(pipe.read(8), b'')
+
+        with self.assertRaises(BrokenPipeError):
+            pipe.write(b'f')
+
+    def test_memory_backpressure(self) -> None:
+        '''
+        Tests that writes block once too much is unread.
+        '''
+
+        pipe: t.MemoryPipe = t.MemoryPipe(capacity=4)
+
+        pipe.write(b'abcd')
+
+        with self.assertRaises(TimeoutError):
+            pipe.write(b'e', timeout=0.01)
+
+        # Taking a chunk frees its space, even if partly read
+        self.assertEqual(pipe.read(2), b'ab')
+        pipe.write(b'e', timeout=0.01)
+
+        pipe.close()
+
+        with self.assertRaises(BrokenPipeError):
+            pipe.write(b'f', timeout=0.01)
+
+    def test_memory_listen(self) -> None:
+        '''
+        Tests addressing in-memory listeners.
+        '''
+
+        local: t.MemoryTransport = t.MemoryTransport()
+
+        listener, address = local.listen(('127.0.0.1', 0))
+
+        with self.assertRaises(OSError):
+            local.listen(address)
+
+        listener.close()
+
+        with self.assertRaises(ConnectionRefusedError):
+            local.connect(address)
+
+        net: n.StrategoNetworker = n.StrategoNetworker.detached(local)
+        self.assertEqual(net.join_game(*address, '0000'), 1)
+
+    def test_games(self) -> None:
+        '''
+        Tests that games work the same over every transport.
+        '''
+
+        with tempfile.TemporaryDirectory() as directory:
+
+            transports = [t.TCPTransport(), t.MemoryTransport()]
+            if hasattr(socket, 'AF_UNIX'):
+                transports.append(t.UnixTransport(directory))
+
+            for transport in transports:
+                with self.subTest(transport=type(transport).__name__):
+                    port: int = free_port()
+
+                    host: n.StrategoNetworker = n.StrategoNetworker.detached(transport)
+                    client: n.StrategoNetworker = n.StrategoNetworker.detached(transport)
+
+                    password: str = host.host_game('127.0.0.1', port)
+                    self.assertEqual(host.host_address, ('127.0.0.1', port))
+                    connect_pair(host, client, port, password)
+
+                    board: b.Board = b.Board.detached()
+                    client.send_game(board, 'GOOD')
+                    received, state = host.recv_game()
+                    self.assertEqual(received.encode(), board.encode())
+                    self.assertEqual(state, 'GOOD')
+
+                    host.close_game()
+                    with self.assertRaises(ConnectionError):
+                        client.recv_game()
+
+                    client.close_game()
+                    host.cancel()
+
+            # Unix sockets clean up after themselves
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_make_transport(self) -> None:
+        '''
+        Tests creating transports by name.
+        '''
+
+        self.assertIsInstance(t.make_transport('tcp'), t.TCPTransport)
+        self.assertIsInstance(t.make_transport('memory'), t.MemoryTransport)
+
+        with self.assertRaises(ValueError):
+            t.make_transport('carrier pigeon')
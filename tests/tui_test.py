@@ -0,0 +1,323 @@
+'''
+Tests the terminal front end.
+'''
+
+import random
+import threading
+import unittest
+from typing import Dict, List, Tuple, Union
+
+from stratego import board as b
+from stratego import bot
+from stratego import pieces as p
+from stratego import tui
+
+# Typed while a networking call is awaited, to give up on it
+CANCEL: int = -2
+
+Key = Union[str, int]
+
+
+class FakeWindow:
+    '''
+    Stands in for a curses window, replaying a fixed list of
+    keys and keeping whatever was drawn.
+    '''
+
+    def __init__(self, keys: List[Key]) -> None:
+        self.keys: List[Key] = list(keys)
+        self.delay: int = -1
+        self.lines: Dict[int, str] = {}
+        self.drawn: List[str] = []
+        self.y: int = 0
+
+    def getch(self) -> int:
+        '''
+        Returns the next key, or times out if polling and the
+        next key is not CANCEL.
+        '''
+
+        if self.delay >= 0:
+            if self.keys and self.keys[0] == CANCEL:
+                self.keys.pop(0)
+                return ord('q')
+
+            threading.Event().wait(self.delay / 1000)
+            return -1
+
+        assert self.keys, 'Ran out of keys'
+        key: Key = self.keys.pop(0)
+        assert key != CANCEL, 'Cancelled while not waiting'
+
+        return ord(key) if isinstance(key, str) else key
+
+    def timeout(self, delay: int) -> None:
+        '''
+        Dummy function.
+        '''
+
+        self.delay = delay
+
+    def addstr(self, y: int, _: int, text: str) -> None:
+        '''
+        Keeps the text.
+        '''
+
+        self.lines[y] = text
+        self.drawn.append(text)
+        self.y = y
+
+    def erase(self) -> None:
+        '''
+        Dummy function.
+        '''
+
+        self.lines = {}
+
+    def getyx(self) -> Tuple[int, int]:
+        '''
+        Dummy function.
+        '''
+
+        return (self.y, 0)
+
+    def refresh(self) -> None:
+        '''
+        Dummy function.
+        '''
+
+    def move(self, _: int, __: int) -> None:
+        '''
+        Dummy function.
+        '''
+
+    def clrtoeol(self) -> None:
+        '''
+        Dummy function.
+        '''
+
+
+class FakeNet:
+    '''
+    Stands in for a networker. The other player plays BLUE with
+    a fixed setup, and answers each move with the next of a
+    fixed list of states.
+    '''
+
+    def __init__(self, states: List[str], join_result: int = 0) -> None:
+        self.states: List[str] = states
+        self.join_result: int = join_result
+        self.sent: List[str] = []
+        self.closed: int = 0
+        self.board: b.Board = b.Board.detached()
+        self.cancelled: threading.Event = threading.Event()
+        self.hang: bool = False
+
+    def host_game(self, _: str, __: int) -> str:
+        '''
+        Dummy function.
+        '''
+
+        return 'PASSWORD'
+
+    def host_wait_for_join(self) -> None:
+        '''
+        Returns at once, or once cancelled if hanging.
+        '''
+
+        if self.hang:
+            self.cancelled.wait()
+            raise OSError('Cancelled')
+
+    def join_game(self, _: str, __: int, ___: str) -> int:
+        '''
+        Dummy function.
+        '''
+
+        return self.join_result
+
+    def send_setup(self, board: b.Board, _: str) -> None:
+        '''
+        Dummy function.
+        '''
+
+        self.board = board
+        self.sent.append('SETUP')
+
+    def recv_setup(self) -> bytes:
+        '''
+        Returns a setup for BLUE.
+        '''
+
+        board: b.Board = b.Board.detached()
+        bot.random_setup(board, 'BLUE', random.Random(0))
+
+        return board.encode_setup('BLUE')
+
+    def send_game(self, _: b.Board, state: str) -> None:
+        '''
+        Dummy function.
+        '''
+
+        self.sent.append(state)
+
+    def recv_game(self) -> Tuple[b.Board, str]:
+        '''
+        Answers with the next state, or fails if there is none.
+        '''
+
+        if not self.states:
+            raise ConnectionError('This was raised by a dummy')
+
+        return (self.board, self.states.pop(0))
+
+    def rematch(self) -> bool:
+        '''
+        Dummy function.
+        '''
+
+        return True
+
+    def cancel(self) -> None:
+        '''
+        Unblocks any hanging call.
+        '''
+
+        self.cancelled.set()
+
+    def close_game(self) -> None:
+        '''
+        Dummy function.
+        '''
+
+        self.closed += 1
+
+
+class Replay(random.Random):
+    '''
+    A source of randomness which deals the same setup every
+    time.
+    '''
+
+    def shuffle(self, x: List[p.Piece]) -> None:
+        '''
+        Shuffles the same way every time.
+        '''
+
+        random.Random(0).shuffle(x)
+
+
+def first_move() -> str:
+    '''
+    :returns: A legal first move for RED, set up as the TUI does
+        with Replay, typed as the TUI reads it.
+    '''
+
+    board: b.Board = b.Board.detached()
+    bot.random_setup(board, 'RED', Replay())
+
+    origin, destination = bot.random_move(board, 'RED', random.Random(0)) or ((0, 0), (0, 0))
+
+    return ' '.join(f'{"abcdefghij"[x]}{y}' for x, y in (origin, destination))
+
+
+def typed(text: str) -> List[Key]:
+    '''
+    :returns: The keys typing the text, then Enter.
+    '''
+
+    return list(text) + ['\n']
+
+
+class TestTUI(unittest.TestCase):
+    '''
+    Tests the stratego.tui module.
+    '''
+
+    def test_render(self) -> None:
+        '''
+        Tests drawing the board, hiding the other player's
+        pieces.
+        '''
+
+        board: b.Board = b.Board.detached()
+        board.set_piece(0, 0, p.Scout('RED'))
+        board.set_piece(1, 0, p.Marshal('BLUE'))
+
+        red: List[str] = tui.render(board, 'RED')
+        blue: List[str] = tui.render(board, 'BLUE')
+
+        self.assertEqual(len(red), 11)
+        self.assertEqual(red[0], '   a b c d e f g h i j')
+        self.assertEqual(red[1], ' 0 2 ? . . . . . . . .')
+        self.assertEqual(blue[1], ' 0 ? T . . . . . . . .')
+        self.assertEqual(red[5], ' 4 . . ~ ~ . . ~ ~ . .')
+
+    def test_parse(self) -> None:
+        '''
+        Tests reading squares and moves.
+        '''
+
+        self.assertEqual(tui.parse_square('c3'), (2, 3))
+        self.assertEqual(tui.parse_square(' J9 '), (9, 9))
+        self.assertEqual(tui.parse_move('a0 a1'), ((0, 0), (0, 1)))
+
+        for bad in ['', 'a', '3c', 'k1', 'a0', 'a0 a1 a2', 'a0a1']:
+            with self.assertRaises(ValueError):
+                tui.parse_move(bad)
+
+    def test_play(self) -> None:
+        '''
+        Tests hosting a game, making a move, losing, then
+        playing again and leaving.
+        '''
+
+        window: FakeWindow = FakeWindow(['h', '\n', '\n', 'r', '\n']
+                                        + typed('zz') + typed('a0 j9') + typed(first_move())
+                                        + ['a', '\n'] + typed('q') + ['q'])
+        net: FakeNet = FakeNet(['BLUE'])
+
+        game: tui.StrategoTUI = tui.StrategoTUI(window,
+                                                net,
+                                                rng=Replay())
+        game.run()
+
+        self.assertIsNone(game.screen)
+        self.assertEqual(game.color, 'RED')
+        self.assertEqual(net.sent, ['SETUP', 'GOOD', 'SETUP'])
+        self.assertIn('Type a move as in c3 c4.', window.drawn)
+        self.assertIn('Invalid move.', window.drawn)
+        self.assertIn('RED: You lose...', window.drawn)
+        self.assertGreater(net.closed, 0)
+
+    def test_join_failed(self) -> None:
+        '''
+        Tests failing to join, then giving up on hosting.
+        '''
+
+        window: FakeWindow = FakeWindow(['j', '\n', '\n', '\n',
+                                         'h', '\n', '\n', CANCEL,
+                                         'q'])
+        net: FakeNet = FakeNet([], join_result=1)
+        net.hang = True
+
+        game: tui.StrategoTUI = tui.StrategoTUI(window, net)
+        game.run()
+
+        self.assertIn('Failed to join.', window.drawn)
+        self.assertTrue(net.cancelled.is_set())
+        self.assertEqual(net.sent, [])
+
+    def test_error(self) -> None:
+        '''
+        Tests losing the connection mid-game.
+        '''
+
+        window: FakeWindow = FakeWindow(['x', 'q'])
+        net: FakeNet = FakeNet([])
+
+        game: tui.StrategoTUI = tui.StrategoTUI(window, net)
+        game.run('THEIR_TURN')
+
+        self.assertIn('Error: Connection terminated.', window.drawn)
+        self.assertIsNone(game.screen)